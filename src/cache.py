@@ -0,0 +1,218 @@
+"""Key-value cache shared by every session, and by every worker process when configured.
+
+Streamlit keeps session state in the process serving the session, so data
+that all users share (profiles, supplier options, dashboard aggregates and
+login attempt counters) goes through a CacheBackend instead. The default
+backend keeps entries in process memory. Set SHARED_CACHE to a SQLite file,
+e.g. ``SHARED_CACHE=sqlite:////var/lib/vivita/cache.db``, so that several
+Streamlit processes on one host share one store. Values must be
+JSON-serialisable.
+"""
+import abc
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+class CacheBackend(abc.ABC):
+    """Interface of the shared cache. ``ttl`` is in seconds; None keeps an entry until it is deleted."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if it is missing or expired"""
+        ...
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get the values of several keys; missing and expired keys are left out"""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def delete_prefix(self, prefix: str) -> None:
+        """Delete every key starting with ``prefix``"""
+        ...
+
+    @abc.abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add to a counter and get its new value.
+
+        A missing or expired counter starts from zero and gets ``ttl``; an
+        existing counter keeps the expiry it was created with.
+        """
+        ...
+
+    def get_or_set(self, key: str, load: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Get a value, calling ``load`` and storing its result on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = load()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+
+class MemoryBackend(CacheBackend):
+    """Cache held in this process, shared by its sessions"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}
+
+    def _live(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        with self._lock:
+            entries = {key: self._live(key) for key in keys}
+        return {key: entry[0] for key, entry in entries.items() if entry}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl if ttl is not None else None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                entry = (0, self.clock() + ttl if ttl is not None else None)
+            value = entry[0] + amount
+            self._entries[key] = (value, entry[1])
+            return value
+
+class SQLiteBackend(CacheBackend):
+    """Cache in a SQLite file in WAL mode, shared by every process that opens it.
+
+    Expiry uses wall-clock time so all processes agree on it. Each thread
+    and process gets its own connection.
+    """
+
+    # Expired rows are purged every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = str(path)
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().execute(
+            "create table if not exists cache ("
+            " key text primary key, value text not null, expires_at real)"
+        )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            import sqlite3
+            # Autocommit; every statement below is atomic on its own
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('pragma journal_mode=wal')
+            connection.execute('pragma synchronous=normal')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def _expiry(self, ttl: Optional[float]) -> Optional[float]:
+        return self.clock() + ttl if ttl is not None else None
+
+    def _wrote(self) -> None:
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._connection().execute("delete from cache where expires_at <= ?", (self.clock(),))
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "select value from cache where key = ? and (expires_at is null or expires_at > ?)",
+            (key, self.clock())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        found = {}
+        # Stay under SQLite's limit on bound parameters
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._connection().execute(
+                f"select key, value from cache where key in ({','.join('?' * len(chunk))})"
+                " and (expires_at is null or expires_at > ?)",
+                (*chunk, self.clock())
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._connection().execute(
+            "insert into cache (key, value, expires_at) values (?, ?, ?)"
+            " on conflict (key) do update set value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value), self._expiry(ttl))
+        )
+        self._wrote()
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("delete from cache where key = ?", (key,))
+
+    def delete_prefix(self, prefix: str) -> None:
+        self._connection().execute("delete from cache where substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = self.clock()
+        row = self._connection().execute(
+            "insert into cache (key, value, expires_at) values (:key, :amount, :expires)"
+            " on conflict (key) do update set"
+            "  value = case when cache.expires_at <= :now then :amount"
+            "               else cast(cache.value as integer) + :amount end,"
+            "  expires_at = case when cache.expires_at <= :now then :expires else cache.expires_at end"
+            " returning value",
+            {'key': key, 'amount': amount, 'expires': self._expiry(ttl), 'now': now}
+        ).fetchone()
+        self._wrote()
+        return int(row[0])
+
+def backend_from_url(url: Optional[str]) -> CacheBackend:
+    """Create the backend named by a SHARED_CACHE value: empty for memory or sqlite:///path"""
+    if not url or url == 'memory':
+        return MemoryBackend()
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported SHARED_CACHE: {url}")
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+def get_shared_cache() -> CacheBackend:
+    """Get the cache shared by all sessions, configured by SHARED_CACHE"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = backend_from_url(os.environ.get('SHARED_CACHE'))
+        return _cache
@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass
-import yaml
+from functools import lru_cache
 from pathlib import Path
 
 # Load configuration from YAML
@@ -13,6 +13,8 @@ class Config:
 
     @classmethod
     def from_yaml(cls, yaml_path: str) -> 'Config':
+        import yaml
+
         with open(yaml_path, 'r') as f:
             config_data = yaml.safe_load(f)
             
@@ -24,4 +26,14 @@ class Config:
         )
 
 config_path = Path(__file__).parent.parent / 'config' / 'config.yaml'
-config = Config.from_yaml(str(config_path))
+
+@lru_cache(maxsize=None)
+def get_config() -> Config:
+    """Load config.yaml on first use"""
+    return Config.from_yaml(str(config_path))
+
+def __getattr__(name):
+    # Keeps `from src.config import config` working without parsing at import
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
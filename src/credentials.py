@@ -0,0 +1,219 @@
+"""Per-user auth tokens kept fresh by a background refresher"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+# Tokens are renewed once they are this close to expiring
+REFRESH_MARGIN = 300
+# Seconds between refresher passes
+REFRESH_INTERVAL = 60
+# Users whose tokens no session has read for this long are dropped rather
+# than renewed; their next rerun renews the session's own copy instead
+IDLE_TIMEOUT = 2 * 3600
+
+@dataclass(frozen=True)
+class Credentials:
+    access_token: str
+    refresh_token: str
+    expires_at: float
+
+    @classmethod
+    def from_session(cls, session) -> 'Credentials':
+        """Build credentials from a gotrue Session"""
+        return cls(session.access_token, session.refresh_token, float(session.expires_at))
+
+    def expires_within(self, seconds: float, now: float) -> bool:
+        return self.expires_at - now <= seconds
+
+    def to_dict(self) -> Dict:
+        return {
+            'access_token': self.access_token,
+            'refresh_token': self.refresh_token,
+            'expires_at': self.expires_at
+        }
+
+class CredentialStore:
+    """Latest tokens of every signed-in user, shared by all sessions in the process.
+
+    A background thread renews tokens ``margin`` seconds ahead of expiry, so
+    reruns read a valid access token without an auth round trip. Supabase
+    rotates refresh tokens on use, which is why there is one holder per user
+    rather than one per session.
+
+    Args:
+        refresh: Function exchanging a refresh token for new Credentials
+        margin (float): Seconds before expiry at which tokens are renewed
+        interval (float): Seconds between refresher passes
+        idle_timeout (float): Seconds without a put or get after which a user is dropped
+        clock: Returns the current epoch time
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[str], Optional[Credentials]],
+        margin: float = REFRESH_MARGIN,
+        interval: float = REFRESH_INTERVAL,
+        idle_timeout: float = IDLE_TIMEOUT,
+        clock: Callable[[], float] = time.time
+    ):
+        self.refresh = refresh
+        self.margin = margin
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._credentials: Dict[str, Credentials] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, user_id, credentials: Credentials) -> None:
+        """Store a user's credentials, keeping whichever expires last"""
+        with self._lock:
+            self._keep_latest(str(user_id), credentials)
+            self._last_seen[str(user_id)] = self.clock()
+
+    def get(self, user_id) -> Optional[Credentials]:
+        """Get a user's credentials if they haven't expired"""
+        with self._lock:
+            credentials = self._credentials.get(str(user_id))
+            if credentials is not None:
+                self._last_seen[str(user_id)] = self.clock()
+        if credentials is None or credentials.expires_within(0, self.clock()):
+            return None
+        return credentials
+
+    def remove(self, user_id) -> None:
+        """Forget a user's credentials, e.g. on logout"""
+        with self._lock:
+            self._credentials.pop(str(user_id), None)
+            self._last_seen.pop(str(user_id), None)
+
+    def renew(self, user_id, credentials: Credentials) -> Optional[Credentials]:
+        """Exchange a user's refresh token now, storing and returning the new credentials"""
+        try:
+            fresh = self.refresh(credentials.refresh_token)
+        except Exception as e:
+            print(f"Error refreshing session: {str(e)}")
+            fresh = None
+
+        if fresh is not None:
+            # Renewing doesn't count as the user being seen
+            with self._lock:
+                if str(user_id) in self._last_seen:
+                    self._keep_latest(str(user_id), fresh)
+        elif credentials.expires_within(0, self.clock()):
+            # Expired and can't be renewed; the user has to sign in again
+            self._drop(str(user_id), credentials)
+        return fresh
+
+    def refresh_due(self) -> int:
+        """Drop idle users and renew every other token that is close to expiring.
+
+        Returns:
+            int: Number of users whose tokens were renewed
+        """
+        now = self.clock()
+        with self._lock:
+            idle = [
+                user_id for user_id, seen in self._last_seen.items()
+                if now - seen >= self.idle_timeout
+            ]
+            for user_id in idle:
+                self._credentials.pop(user_id, None)
+                del self._last_seen[user_id]
+            due = {
+                user_id: credentials for user_id, credentials in self._credentials.items()
+                if credentials.expires_within(self.margin, now)
+            }
+
+        return sum(1 for user_id, credentials in due.items() if self.renew(user_id, credentials) is not None)
+
+    def _keep_latest(self, user_id: str, credentials: Credentials) -> None:
+        current = self._credentials.get(user_id)
+        if current is None or credentials.expires_at >= current.expires_at:
+            self._credentials[user_id] = credentials
+
+    def _drop(self, user_id: str, credentials: Credentials) -> None:
+        """Forget a user's credentials unless newer ones were stored meanwhile"""
+        with self._lock:
+            if self._credentials.get(user_id) is credentials:
+                del self._credentials[user_id]
+                self._last_seen.pop(user_id, None)
+
+    def start(self) -> threading.Thread:
+        """Run refresher passes every ``interval`` seconds on a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+
+        def run():
+            while not self._stop.wait(self.interval):
+                self.refresh_due()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='token-refresher', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+def _supabase_refresh(url: str, key: str) -> Callable[[str], Optional[Credentials]]:
+    from supabase import create_client
+    from supabase.lib.client_options import ClientOptions
+
+    # Dedicated client that never schedules refreshes of its own
+    client = create_client(url, key, options=ClientOptions(auto_refresh_token=False, persist_session=False))
+
+    def refresh(refresh_token: str) -> Optional[Credentials]:
+        response = client.auth.refresh_session(refresh_token)
+        if response and response.session:
+            return Credentials.from_session(response.session)
+        return None
+    return refresh
+
+_store: Optional[CredentialStore] = None
+_store_lock = threading.Lock()
+
+def get_credential_store() -> CredentialStore:
+    """Get the process-wide credential store, starting its refresher on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            import streamlit as st
+            _store = CredentialStore(_supabase_refresh(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"]))
+            _store.start()
+        return _store
+
+def current_credentials() -> Optional[Credentials]:
+    """Get the signed-in session user's current credentials.
+
+    Prefers the shared store, which the refresher keeps current, and syncs
+    the session's copy of the tokens with it. A user dropped from the store
+    while idle comes back with the session's copy, renewed here if expired.
+    """
+    import streamlit as st
+
+    session = st.session_state.get('session')
+    user = st.session_state.get('user')
+    if not session:
+        return None
+
+    fallback = Credentials(session['access_token'], session['refresh_token'], float(session['expires_at']))
+    if not user:
+        return fallback
+
+    store = get_credential_store()
+    credentials = store.get(user['id'])
+    if credentials is None:
+        store.put(user['id'], fallback)
+        credentials = store.get(user['id']) or store.renew(user['id'], fallback)
+        if credentials is None:
+            return None
+
+    if credentials.access_token != session['access_token']:
+        st.session_state.session = credentials.to_dict()
+    return credentials
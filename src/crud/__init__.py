@@ -2,5 +2,6 @@
 from .purchase_request import PurchaseRequestManager
 from .supplier import SupplierManager
 from .expense import ExpenseManager
+from .errors import UpdateConflictError
 
-__all__ = ['PurchaseRequestManager', 'SupplierManager', 'ExpenseManager']
+__all__ = ['PurchaseRequestManager', 'SupplierManager', 'ExpenseManager', 'UpdateConflictError']
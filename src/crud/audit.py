@@ -0,0 +1,375 @@
+"""Buffered audit trail writer"""
+import atexit
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from src.models import AuditAction
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: lock the first byte of the lock file instead
+    fcntl = None
+    import msvcrt
+
+# Seconds between background flushes
+FLUSH_INTERVAL = 2.0
+# Rows per insert request
+BATCH_SIZE = 100
+
+DEFAULT_SPOOL_DIR = Path(__file__).parent.parent.parent / 'audit_spool'
+DEAD_LETTER_FILE = 'dead_letter.jsonl'
+
+# PostgREST errors for rows the database will never accept, e.g. an unknown
+# user_id (23503) or a malformed uuid (22P02); anything else is retried
+_REJECTED = re.compile(r"'code': '2[23][0-9A-Z]{3}'")
+
+class AuditWriter:
+    """Collects audit entries in process and inserts them in batches.
+
+    Every entry is appended to this process's spool file before ``record``
+    returns and stays there until it has been inserted. Each writer holds a
+    lock on its spool for as long as it runs; a new writer takes over the
+    spools whose lock is free, so entries buffered when a process dies are
+    written by the next one. A daemon thread flushes every ``interval``
+    seconds; ``request_flush`` wakes it early, e.g. at the end of a rerun.
+
+    A batch the database rejects is split until the rows it rejects are
+    alone; those are moved to the dead-letter file so they don't hold back
+    the entries behind them.
+
+    Args:
+        client_factory: Returns the Supabase client used for inserts
+        spool_dir: Directory of the spool files of entries not inserted yet
+        interval (float): Seconds between background flushes
+        batch_size (int): Maximum rows per insert
+        worker (str): Name of this writer's spool, the process id by default
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable,
+        spool_dir: Union[str, Path] = DEFAULT_SPOOL_DIR,
+        interval: float = FLUSH_INTERVAL,
+        batch_size: int = BATCH_SIZE,
+        worker: Optional[str] = None
+    ):
+        self.client_factory = client_factory
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.spool_path = self.spool_dir / f"audit-{worker or os.getpid()}.jsonl"
+        self.dead_letter_path = self.spool_dir / DEAD_LETTER_FILE
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._spool_lock = self._claim(self.spool_path, wait=True)
+        self._buffer: List[Dict] = _read_entries(self.spool_path)
+        self._spool = open(self.spool_path, 'a')
+        self._adopt_orphans()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        pr_id: UUID,
+        action: Union[AuditAction, str],
+        user_id: Union[UUID, str],
+        details: Optional[str] = None
+    ) -> bool:
+        """Queue an audit entry.
+
+        Returns:
+            bool: False if the action isn't allowed by the audit table
+        """
+        entry = _audit_row(pr_id, action, user_id, details)
+        if entry is None:
+            return False
+        with self._lock:
+            self._spool.write(json.dumps(entry) + '\n')
+            self._spool.flush()
+            self._buffer.append(entry)
+        return True
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """Insert buffered entries in batches.
+
+        Returns:
+            int: Number of entries written. When the database can't be
+            reached, the entries left stay buffered and spooled for the next
+            flush.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._buffer[:self.batch_size]
+                if not batch:
+                    break
+
+                inserted, rejected, unreachable = self._insert(batch)
+                done = {id(entry) for entry in inserted} | {id(entry) for entry, _ in rejected}
+                with self._lock:
+                    if rejected:
+                        with open(self.dead_letter_path, 'a') as f:
+                            f.writelines(
+                                json.dumps({'entry': entry, 'error': error}) + '\n' for entry, error in rejected
+                            )
+                    self._buffer = [entry for entry in self._buffer if id(entry) not in done]
+                    self._rewrite_spool()
+                written += len(inserted)
+                if unreachable:
+                    break
+        return written
+
+    def _insert(self, rows: List[Dict]) -> Tuple[List[Dict], List[Tuple[Dict, str]], bool]:
+        """Insert rows, splitting the batch when the database rejects some of them.
+
+        Returns:
+            Rows inserted, rows rejected with their error, and whether the
+            database couldn't be reached
+        """
+        try:
+            self.client_factory().table('purchase_request_audit')\
+                .insert(rows)\
+                .execute()
+            return rows, [], False
+        except Exception as e:
+            error = str(e)
+            if not _REJECTED.search(error):
+                print(f"Error flushing audit entries: {error}")
+                return [], [], True
+            if len(rows) == 1:
+                print(f"Moving rejected audit entry to {self.dead_letter_path.name}: {error}")
+                return [], [(rows[0], error)], False
+
+        middle = len(rows) // 2
+        inserted, rejected, unreachable = self._insert(rows[:middle])
+        if unreachable:
+            return inserted, rejected, True
+        more_inserted, more_rejected, unreachable = self._insert(rows[middle:])
+        return inserted + more_inserted, rejected + more_rejected, unreachable
+
+    def request_flush(self) -> None:
+        """Ask the background thread to flush now instead of at its next interval"""
+        self._wake.set()
+
+    def start(self) -> threading.Thread:
+        """Flush on a daemon thread every ``interval`` seconds"""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+
+        def run():
+            while not self._stop.is_set():
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                self.flush()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='audit-writer', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Stop the background thread, write what is left and release the spool"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        with self._lock:
+            self._spool.close()
+            if self._buffer:
+                self._spool_lock.close()
+            else:
+                self.spool_path.unlink(missing_ok=True)
+                _release(self._spool_lock, _lock_path(self.spool_path))
+
+    def _claim(self, spool_path: Path, wait: bool = False) -> Optional[IO]:
+        """Lock a spool, or return None if a running writer holds it.
+
+        The lock lives on a file next to the spool, which is replaced on
+        every rewrite. A lock file unlinked by a writer that took the spool
+        over in the meantime doesn't count.
+        """
+        path = _lock_path(spool_path)
+        while True:
+            f = open(path, 'a')
+            if not _lock(f, wait):
+                f.close()
+                return None
+            try:
+                if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+            if not wait:
+                return None
+
+    def _adopt_orphans(self) -> None:
+        """Take over the entries of spools left behind by writers that have stopped"""
+        for path in sorted(self.spool_dir.glob('audit-*.jsonl')):
+            if path == self.spool_path:
+                continue
+            lock = self._claim(path)
+            if lock is None:
+                continue
+            try:
+                entries = _read_entries(path)
+                with self._lock:
+                    self._spool.writelines(json.dumps(entry) + '\n' for entry in entries)
+                    self._spool.flush()
+                    self._buffer.extend(entries)
+                path.unlink(missing_ok=True)
+            finally:
+                _release(lock, _lock_path(path))
+
+    def _rewrite_spool(self) -> None:
+        # Caller holds self._lock
+        tmp_path = self.spool_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            f.writelines(json.dumps(entry) + '\n' for entry in self._buffer)
+        self._spool.close()
+        os.replace(tmp_path, self.spool_path)
+        self._spool = open(self.spool_path, 'a')
+
+class DirectAuditWriter:
+    """Inserts each audit entry at once through the given client.
+
+    Used when there is no service key for the batched AuditWriter; entries
+    are then written with the signed-in user's own client.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def record(
+        self,
+        pr_id: UUID,
+        action: Union[AuditAction, str],
+        user_id: Union[UUID, str],
+        details: Optional[str] = None
+    ) -> bool:
+        """Insert an audit entry.
+
+        Returns:
+            bool: False if the action isn't allowed or the insert failed
+        """
+        entry = _audit_row(pr_id, action, user_id, details)
+        if entry is None:
+            return False
+        try:
+            self.client.table('purchase_request_audit').insert(entry).execute()
+            return True
+        except Exception as e:
+            print(f"Error adding audit entry: {str(e)}")
+            return False
+
+def _audit_row(pr_id, action, user_id, details) -> Optional[Dict]:
+    """Build an audit row, or None if the action isn't allowed by the audit table"""
+    try:
+        action = AuditAction(action)
+    except ValueError:
+        print(f"Error adding audit entry: invalid action '{action}'")
+        return None
+    return {
+        'purchase_request_id': str(pr_id),
+        'action': action.value,
+        'details': details,
+        'user_id': str(user_id)
+    }
+
+def _lock(f: IO, wait: bool) -> bool:
+    """Take an exclusive lock on an open lock file; False if another process holds it"""
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+    f.seek(0)
+    try:
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _release(lock: IO, path: Path) -> None:
+    """Remove a lock file and release the lock held on it"""
+    if fcntl is not None:
+        # Unlinked while still held, so a writer waiting on it sees it's gone
+        path.unlink(missing_ok=True)
+        lock.close()
+        return
+    # Windows can't remove an open file
+    lock.close()
+    try:
+        path.unlink(missing_ok=True)
+    except PermissionError:
+        # Another writer locked it in the meantime
+        pass
+
+def _lock_path(spool_path: Path) -> Path:
+    return spool_path.with_suffix('.lock')
+
+def _read_entries(path: Path) -> List[Dict]:
+    if not path.exists():
+        return []
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A line cut short by a crash mid-write
+                continue
+    return entries
+
+_writer: Optional[AuditWriter] = None
+_writer_started = False
+_writer_lock = threading.Lock()
+
+def get_audit_writer() -> Optional[AuditWriter]:
+    """Get the process-wide audit writer, starting it on first use.
+
+    Needs ``SUPABASE_SERVICE_KEY``: flushes run outside any user's request
+    and write rows for every user, so they go past row level security like
+    the realtime listener. Without the key there is no writer and callers
+    insert entries directly (see DirectAuditWriter).
+    """
+    global _writer, _writer_started
+    with _writer_lock:
+        if not _writer_started:
+            _writer_started = True
+            try:
+                import streamlit as st
+                key = st.secrets.get("SUPABASE_SERVICE_KEY")
+                if not key:
+                    print("SUPABASE_SERVICE_KEY is not set; audit entries are inserted one by one")
+                    return None
+                from supabase import create_client
+                client = create_client(st.secrets["SUPABASE_URL"], key)
+                writer = AuditWriter(lambda: client, os.environ.get('AUDIT_SPOOL_DIR', DEFAULT_SPOOL_DIR))
+                writer.start()
+                atexit.register(writer.stop)
+                _writer = writer
+            except Exception as e:
+                print(f"Error starting audit writer: {str(e)}")
+        return _writer
+
+def request_audit_flush() -> None:
+    """Ask the audit writer to flush now, if one has been started"""
+    if _writer is not None:
+        _writer.request_flush()
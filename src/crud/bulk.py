@@ -0,0 +1,10 @@
+"""Results of the set-based bulk_update_*_status database functions"""
+from typing import Dict, List, Optional
+from uuid import UUID
+
+def bulk_outcomes(rows: List[Dict]) -> Dict[UUID, Optional[str]]:
+    """Map each requested id to None when it was updated, or to the reason it wasn't"""
+    return {
+        UUID(str(row['id'])): None if row['updated'] else (row.get('error') or 'Not updated')
+        for row in rows or []
+    }
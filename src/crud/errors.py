@@ -0,0 +1,21 @@
+"""Errors raised by the CRUD managers"""
+from typing import Dict, Optional
+
+class UpdateConflictError(Exception):
+    """A conditional update matched no row because someone else changed it first.
+
+    Args:
+        table (str): Table that was being updated
+        current (dict, optional): The row as it is now, or None if it was deleted
+    """
+
+    def __init__(self, table: str, current: Optional[Dict] = None):
+        self.table = table
+        self.current = current
+        if current is None:
+            message = "This record was deleted by someone else"
+        else:
+            message = "This record was changed by someone else"
+            if current.get('status'):
+                message += f" and is now {current['status']}"
+        super().__init__(f"{message}. Reload to see the latest version.")
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
-from typing import List, Optional
+from typing import Dict, List, Optional
 from decimal import Decimal
 
 from ..models.expense import (
@@ -10,30 +10,68 @@ from ..models.expense import (
     Voucher,
     VoucherEntry
 )
+from ..models.hydration import (
+    RowParser, expense_forms_from_rows, expense_items_from_rows, voucher_entries_from_rows, vouchers_from_rows
+)
 from ..database import get_supabase_client
+from .projection import select_columns
+from .bulk import bulk_outcomes
+from .errors import UpdateConflictError
+from .query_cache import ALL_ROWS, cached_read, get_query_cache, invalidates
+from ..tracing import traced_methods
+
+ERF_PAGE_SIZE = 20
 
+def _version(updated_at) -> str:
+    """The updated_at a row was read at, as sent back in a conditional update"""
+    return updated_at.isoformat() if isinstance(updated_at, datetime) else str(updated_at)
+
+@traced_methods
 class ExpenseManager:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, supabase=None, query_cache=None):
+        self.supabase = supabase or get_supabase_client()
+        self.query_cache = query_cache if query_cache is not None else get_query_cache()
 
-    def create_erf(self, erf: ExpenseReimbursementForm) -> ExpenseReimbursementForm:
-        """Create a new Expense Reimbursement Form."""
-        data = {
+    @invalidates('expense_reimbursement_forms')
+    def create_expense_form(self, erf: ExpenseReimbursementForm) -> ExpenseReimbursementForm:
+        """Create an ERF with all of its items in one transaction and one round trip.
+
+        The create_expense_form database function assigns the YYYY-NNN form
+        number, totals the items and returns the stored form with its items.
+        """
+        form = {
             'employee_id': str(erf.employee_id),
             'designation': erf.designation,
             'date': erf.date.isoformat(),
             'total_amount': str(erf.total_amount),
-            'status': erf.status.value if isinstance(erf.status, ExpenseFormStatus) else erf.status,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
+            'status': erf.status.value if isinstance(erf.status, ExpenseFormStatus) else erf.status
         }
-        
-        result = self.supabase.table('expense_reimbursement_forms').insert(data).execute()
-        created_erf = result.data[0]
-        return ExpenseReimbursementForm(**created_erf)
+        items = [
+            {
+                'date': item.date.isoformat(),
+                'description': item.description,
+                'payee': item.payee,
+                'reference_number': item.reference_number,
+                'amount': str(item.amount),
+                'account': item.account
+            }
+            for item in erf.items
+        ]
+
+        result = self.supabase.rpc('create_expense_form', {'p_form': form, 'p_items': items}).execute()
+        row = result.data[0] if isinstance(result.data, list) else result.data
+        return expense_forms_from_rows([row])[0]
+
+    def create_erf(self, erf: ExpenseReimbursementForm) -> ExpenseReimbursementForm:
+        """Create a new Expense Reimbursement Form."""
+        return self.create_expense_form(erf)
 
+    @invalidates('expense_reimbursement_forms', row='erf.id')
     def update_erf(self, erf: ExpenseReimbursementForm) -> ExpenseReimbursementForm:
-        """Update an existing Expense Reimbursement Form."""
+        """Update an existing Expense Reimbursement Form.
+
+        Raises UpdateConflictError if the ERF changed since it was read.
+        """
         if not erf.id:
             raise ValueError("ERF ID is required for update")
 
@@ -41,30 +79,38 @@ class ExpenseManager:
             'employee_id': str(erf.employee_id),
             'designation': erf.designation,
             'date': erf.date.isoformat(),
-            'total_amount': str(erf.total_amount),
-            'status': erf.status.value if isinstance(erf.status, ExpenseFormStatus) else erf.status,
-            'updated_at': datetime.now().isoformat()
+            'status': erf.status.value if isinstance(erf.status, ExpenseFormStatus) else erf.status
         }
-        
-        result = self.supabase.table('expense_reimbursement_forms').update(data).eq('id', str(erf.id)).execute()
-        updated_erf = result.data[0]
-        return ExpenseReimbursementForm(**updated_erf)
+        # total_amount is left to the expense_items trigger and updated_at to
+        # the database clock
 
+        query = self.supabase.table('expense_reimbursement_forms').update(data).eq('id', str(erf.id))
+        if erf.updated_at:
+            # Only overwrite the version the ERF was read at
+            query = query.eq('updated_at', _version(erf.updated_at))
+        result = query.execute()
+        if not result.data:
+            raise UpdateConflictError('expense_reimbursement_forms', self._current_version('expense_reimbursement_forms', erf.id))
+        return expense_forms_from_rows(result.data)[0]
+
+    @invalidates('expense_reimbursement_forms', row='erf_id')
     def delete_erf(self, erf_id: UUID) -> bool:
         """Delete an Expense Reimbursement Form."""
         result = self.supabase.table('expense_reimbursement_forms').delete().eq('id', str(erf_id)).execute()
         return len(result.data) > 0
 
-    def get_erf(self, erf_id: UUID) -> Optional[ExpenseReimbursementForm]:
+    @cached_read('expense_reimbursement_forms', row='erf_id')
+    def get_erf(self, erf_id: UUID, view: str = 'detail', fields=None) -> Optional[ExpenseReimbursementForm]:
         """Get an Expense Reimbursement Form by ID."""
-        result = self.supabase.table('expense_reimbursement_forms').select('*').eq('id', str(erf_id)).execute()
+        result = self.supabase.table('expense_reimbursement_forms').select(select_columns('expense_reimbursement_forms', view, fields)).eq('id', str(erf_id)).execute()
         if not result.data:
             return None
-        return ExpenseReimbursementForm(**result.data[0])
+        return expense_forms_from_rows(result.data)[0]
 
-    def list_erfs(self, employee_id: Optional[UUID] = None, status: Optional[str] = None) -> List[ExpenseReimbursementForm]:
-        """List Expense Reimbursement Forms."""
-        query = self.supabase.table('expense_reimbursement_forms').select('*')
+    @cached_read('expense_reimbursement_forms')
+    def list_erfs(self, employee_id: Optional[UUID] = None, status: Optional[str] = None, view: str = 'list', fields=None) -> List[ExpenseReimbursementForm]:
+        """List Expense Reimbursement Forms, selecting only the columns of a named view or field set."""
+        query = self.supabase.table('expense_reimbursement_forms').select(select_columns('expense_reimbursement_forms', view, fields))
         
         if employee_id:
             query = query.eq('employee_id', str(employee_id))
@@ -72,8 +118,77 @@ class ExpenseManager:
             query = query.eq('status', status)
             
         result = query.execute()
-        return [ExpenseReimbursementForm(**item) for item in result.data]
+        return expense_forms_from_rows(result.data)
+
+    @cached_read('expense_reimbursement_forms')
+    def get_expense_forms(
+        self,
+        status: Optional[ExpenseFormStatus] = None,
+        employee_id: Optional[UUID] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        limit: int = ERF_PAGE_SIZE,
+        before: Optional[ExpenseReimbursementForm] = None,
+        include_items: bool = True,
+        view: str = 'list'
+    ) -> List[ExpenseReimbursementForm]:
+        """Get a page of ERFs, newest first, with their items.
 
+        Pages are keyed on (created_at, id) rather than offsets, so every page
+        costs the same however many ERFs exist. Pass the last form of a page
+        as ``before`` to get the next one. Items are embedded in the same
+        request.
+        """
+        columns = select_columns('expense_reimbursement_forms', view)
+        if include_items:
+            columns += f", expense_items({select_columns('expense_items', view)})"
+        query = self.supabase.table('expense_reimbursement_forms').select(columns)
+
+        if status:
+            query = query.eq('status', status.value if isinstance(status, ExpenseFormStatus) else status)
+        if employee_id:
+            query = query.eq('employee_id', str(employee_id))
+        if start_date:
+            query = query.gte('date', start_date.isoformat())
+        if end_date:
+            query = query.lte('date', end_date.isoformat())
+        if before is not None:
+            created_at = before.created_at.isoformat()
+            query = query.or_(
+                f"created_at.lt.{created_at},"
+                f"and(created_at.eq.{created_at},id.lt.{before.id})"
+            )
+
+        result = query\
+            .order('created_at', desc=True)\
+            .order('id', desc=True)\
+            .limit(limit)\
+            .execute()
+        return expense_forms_from_rows(result.data or [])
+
+    @invalidates('expense_reimbursement_forms', row='erf_ids')
+    def bulk_update_status(self, erf_ids: List[UUID], status: ExpenseFormStatus) -> Dict[UUID, Optional[str]]:
+        """Change the status of several ERFs in one round trip.
+
+        Transitions are checked by the bulk_update_expense_form_status database
+        function, which also stamps approved_by and approved_at on approval.
+        Returns None for each updated ERF, otherwise the reason it wasn't.
+        """
+        if not erf_ids:
+            return {}
+        result = self.supabase.rpc('bulk_update_expense_form_status', {
+            'p_ids': [str(erf_id) for erf_id in erf_ids],
+            'p_status': status.value if isinstance(status, ExpenseFormStatus) else status
+        }).execute()
+        return bulk_outcomes(result.data)
+
+    def update_expense_form_status(self, erf_id: UUID, status: ExpenseFormStatus) -> bool:
+        """Change the status of a single ERF."""
+        erf_id = UUID(str(erf_id))
+        outcomes = self.bulk_update_status([erf_id], status)
+        return erf_id in outcomes and outcomes[erf_id] is None
+
+    @invalidates('expense_reimbursement_forms', row='item.erf_id')
     def create_expense_item(self, item: ExpenseItem) -> ExpenseItem:
         """Create a new Expense Item."""
         data = {
@@ -92,6 +207,8 @@ class ExpenseManager:
         created_item = result.data[0]
         return ExpenseItem(**created_item)
 
+    # The item's ERF isn't known for certain, so every cached ERF read goes
+    @invalidates('expense_reimbursement_forms', row=ALL_ROWS)
     def update_expense_item(self, item: ExpenseItem) -> ExpenseItem:
         """Update an existing Expense Item."""
         if not item.id:
@@ -111,16 +228,19 @@ class ExpenseManager:
         updated_item = result.data[0]
         return ExpenseItem(**updated_item)
 
+    @invalidates('expense_reimbursement_forms', row=ALL_ROWS)
     def delete_expense_item(self, item_id: UUID) -> bool:
         """Delete an Expense Item."""
         result = self.supabase.table('expense_items').delete().eq('id', str(item_id)).execute()
         return len(result.data) > 0
 
-    def get_expense_items(self, erf_id: UUID) -> List[ExpenseItem]:
+    @cached_read('expense_reimbursement_forms', row='erf_id')
+    def get_expense_items(self, erf_id: UUID, view: str = 'detail', fields=None) -> List[ExpenseItem]:
         """Get all Expense Items for an ERF."""
-        result = self.supabase.table('expense_items').select('*').eq('erf_id', str(erf_id)).execute()
-        return [ExpenseItem(**item) for item in result.data]
+        result = self.supabase.table('expense_items').select(select_columns('expense_items', view, fields)).eq('erf_id', str(erf_id)).execute()
+        return expense_items_from_rows(result.data)
 
+    @invalidates('vouchers')
     def create_voucher(self, voucher: Voucher) -> Voucher:
         """Create a new Voucher."""
         data = {
@@ -138,9 +258,7 @@ class ExpenseManager:
             'form_date': voucher.form_date.isoformat() if voucher.form_date else None,
             'requested_by': voucher.requested_by,
             'status': voucher.status,
-            'voucher_number': voucher.voucher_number,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
+            'voucher_number': voucher.voucher_number
         }
         
         result = self.supabase.table('vouchers').insert(data).execute()
@@ -153,23 +271,25 @@ class ExpenseManager:
                 'account_title': entry.account_title,
                 'activity': entry.activity,
                 'debit_amount': str(entry.debit_amount) if entry.debit_amount else None,
-                'credit_amount': str(entry.credit_amount) if entry.credit_amount else None,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
+                'credit_amount': str(entry.credit_amount) if entry.credit_amount else None
             }
             self.supabase.table('voucher_entries').insert(entry_data).execute()
         
         return self.get_voucher(UUID(created_voucher['id']))
 
+    @invalidates('vouchers', row='voucher.id')
     def update_voucher(self, voucher: Voucher) -> Voucher:
-        """Update an existing Voucher."""
+        """Update an existing Voucher.
+
+        Raises UpdateConflictError if the voucher changed since it was read.
+        """
         if not voucher.id:
             raise ValueError("Voucher ID is required for update")
 
-        data = {
+        header = {
+            'id': str(voucher.id),
             'date': voucher.date.isoformat(),
             'payee': voucher.payee,
-            'total_amount': str(voucher.total_amount),
             'particulars': voucher.particulars,
             'bank_name': voucher.bank_name,
             'transaction_type': voucher.transaction_type,
@@ -180,29 +300,38 @@ class ExpenseManager:
             'form_date': voucher.form_date.isoformat() if voucher.form_date else None,
             'requested_by': voucher.requested_by,
             'status': voucher.status,
-            'voucher_number': voucher.voucher_number,
-            'updated_at': datetime.now().isoformat()
+            'voucher_number': voucher.voucher_number
         }
-        
-        result = self.supabase.table('vouchers').update(data).eq('id', str(voucher.id)).execute()
-        updated_voucher = result.data[0]
-        
-        # Update voucher entries
-        self.supabase.table('voucher_entries').delete().eq('voucher_id', str(voucher.id)).execute()
-        for entry in voucher.entries:
-            entry_data = {
-                'voucher_id': str(voucher.id),
+        entries = [
+            {
                 'account_title': entry.account_title,
                 'activity': entry.activity,
                 'debit_amount': str(entry.debit_amount) if entry.debit_amount else None,
-                'credit_amount': str(entry.credit_amount) if entry.credit_amount else None,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
+                'credit_amount': str(entry.credit_amount) if entry.credit_amount else None
             }
-            self.supabase.table('voucher_entries').insert(entry_data).execute()
-        
-        return self.get_voucher(voucher.id)
+            for entry in voucher.entries
+        ]
+        # The header and entries are written in one transaction; the total
+        # comes from the voucher_entries triggers
+        result = self.supabase.rpc('update_voucher', {
+            'p_voucher': header,
+            'p_entries': entries,
+            'p_expected_updated_at': _version(voucher.updated_at) if voucher.updated_at else None
+        }).execute()
+        row = result.data[0] if isinstance(result.data, list) and result.data else result.data
+        if not row:
+            raise UpdateConflictError('vouchers', self._current_version('vouchers', voucher.id))
+
+        updated = vouchers_from_rows([row])[0]
+        updated.entries = voucher_entries_from_rows(row['entries'])
+        return updated
 
+    def _current_version(self, table: str, row_id: UUID) -> Optional[Dict]:
+        """Read the id, status and version of a row a conditional update missed"""
+        current = self.supabase.table(table).select('id, status, updated_at').eq('id', str(row_id)).execute()
+        return current.data[0] if current.data else None
+
+    @invalidates('vouchers', row='voucher_id')
     def delete_voucher(self, voucher_id: UUID) -> bool:
         """Delete a Voucher and its entries."""
         # Delete entries first due to foreign key constraint
@@ -210,31 +339,39 @@ class ExpenseManager:
         result = self.supabase.table('vouchers').delete().eq('id', str(voucher_id)).execute()
         return len(result.data) > 0
 
-    def get_voucher(self, voucher_id: UUID) -> Optional[Voucher]:
+    @cached_read('vouchers', row='voucher_id')
+    def get_voucher(self, voucher_id: UUID, view: str = 'detail', fields=None) -> Optional[Voucher]:
         """Get a Voucher by ID, including its entries."""
-        voucher_result = self.supabase.table('vouchers').select('*').eq('id', str(voucher_id)).execute()
+        voucher_result = self.supabase.table('vouchers').select(select_columns('vouchers', view, fields)).eq('id', str(voucher_id)).execute()
         if not voucher_result.data:
             return None
             
-        entries_result = self.supabase.table('voucher_entries').select('*').eq('voucher_id', str(voucher_id)).execute()
-        entries = [VoucherEntry(**entry) for entry in entries_result.data]
-        
-        voucher_data = voucher_result.data[0]
-        voucher_data['entries'] = entries
-        return Voucher(**voucher_data)
+        entries_result = self.supabase.table('voucher_entries').select(select_columns('voucher_entries', view)).eq('voucher_id', str(voucher_id)).execute()
+        voucher = vouchers_from_rows(voucher_result.data)[0]
+        voucher.entries = voucher_entries_from_rows(entries_result.data)
+        return voucher
+
+    @cached_read('vouchers')
+    def list_vouchers(self, status: Optional[str] = None, view: str = 'list', fields=None) -> List[Voucher]:
+        """List Vouchers with optional status filter.
 
-    def list_vouchers(self, status: Optional[str] = None) -> List[Voucher]:
-        """List Vouchers with optional status filter."""
-        query = self.supabase.table('vouchers').select('*')
+        The 'list' view returns headers only; other views also load the
+        entries of every voucher in one query.
+        """
+        query = self.supabase.table('vouchers').select(select_columns('vouchers', view, fields))
         if status:
             query = query.eq('status', status)
             
         result = query.execute()
-        vouchers = []
-        for voucher_data in result.data:
-            entries_result = self.supabase.table('voucher_entries').select('*').eq('voucher_id', voucher_data['id']).execute()
-            entries = [VoucherEntry(**entry) for entry in entries_result.data]
-            voucher_data['entries'] = entries
-            vouchers.append(Voucher(**voucher_data))
-            
-        return vouchers
+        
+        parser = RowParser()
+        entries_by_voucher = {}
+        if view != 'list' and result.data:
+            voucher_ids = [voucher_data['id'] for voucher_data in result.data]
+            entries_result = self.supabase.table('voucher_entries').select(select_columns('voucher_entries', view)).in_('voucher_id', voucher_ids).execute()
+            entries = voucher_entries_from_rows(entries_result.data, parser)
+            for row, entry in zip(entries_result.data, entries):
+                entries_by_voucher.setdefault(row['voucher_id'], []).append(entry)
+        
+        # The 'list' view's totals come from the headers, kept by the voucher_entries trigger
+        return vouchers_from_rows(result.data, entries_by_voucher, parser)
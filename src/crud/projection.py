@@ -0,0 +1,105 @@
+"""Column projections for CRUD reads"""
+from dataclasses import MISSING, fields as dataclass_fields
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar('T')
+
+# Named column sets per table. 'detail' selects every column; 'list' and
+# 'export' select only what those screens show, leaving out wide columns
+# such as bank_details, addresses and remarks.
+COLUMN_VIEWS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    'purchase_requests': {
+        'list': ('id', 'form_number', 'requestor_id', 'supplier_id', 'status',
+                 'total_amount', 'created_at', 'updated_at'),
+        'detail': ('*',),
+        'export': ('id', 'form_number', 'requestor_id', 'supplier_id', 'status',
+                   'total_amount', 'remarks', 'created_at', 'updated_at'),
+    },
+    'purchase_request_items': {
+        'list': ('id', 'purchase_request_id', 'item_description', 'quantity', 'unit',
+                 'unit_price', 'total_price'),
+        'detail': ('*',),
+        'export': ('id', 'purchase_request_id', 'item_description', 'quantity', 'unit',
+                   'unit_price', 'total_price', 'account_code'),
+    },
+    'suppliers': {
+        'list': ('id', 'name', 'contact_person', 'phone', 'email'),
+        'detail': ('*',),
+        'export': ('id', 'name', 'contact_person', 'phone', 'email', 'address',
+                   'tax_id', 'preferred_payment_method'),
+    },
+    'expense_reimbursement_forms': {
+        'list': ('id', 'form_number', 'employee_id', 'designation', 'date',
+                 'total_amount', 'status', 'created_at', 'updated_at'),
+        'detail': ('*',),
+        'export': ('id', 'form_number', 'employee_id', 'designation', 'date',
+                   'total_amount', 'status', 'approved_by', 'approved_at'),
+    },
+    'expense_items': {
+        'list': ('id', 'erf_id', 'date', 'description', 'payee', 'amount'),
+        'detail': ('*',),
+        'export': ('id', 'erf_id', 'date', 'description', 'payee', 'amount',
+                   'account', 'reference_number'),
+    },
+    'vouchers': {
+        'list': ('id', 'voucher_number', 'date', 'payee', 'total_amount', 'status',
+                 'prepared_by', 'created_at', 'updated_at'),
+        'detail': ('*',),
+        'export': ('id', 'voucher_number', 'date', 'payee', 'total_amount', 'status',
+                   'particulars', 'bank_name', 'transaction_type', 'reference_number',
+                   'form_type', 'form_number', 'form_date', 'requested_by'),
+    },
+    'voucher_entries': {
+        'list': ('id', 'voucher_id', 'account_title', 'activity', 'debit_amount',
+                 'credit_amount'),
+        'detail': ('*',),
+        'export': ('id', 'voucher_id', 'account_title', 'activity', 'debit_amount',
+                   'credit_amount'),
+    },
+}
+
+def select_columns(table: str, view: str = 'detail', fields: Optional[Iterable[str]] = None) -> str:
+    """Build the select clause for a table from a named view or an explicit field set.
+
+    Args:
+        table (str): Table name with an entry in COLUMN_VIEWS.
+        view (str, optional): 'list', 'detail' or 'export'. Defaults to 'detail'.
+        fields (iterable, optional): Explicit columns; overrides view. 'id' is
+            always included so rows can still be identified.
+
+    Returns:
+        str: Comma-separated column list for ``.select()``
+    """
+    if fields:
+        columns = tuple(fields)
+        if 'id' not in columns and '*' not in columns:
+            columns = ('id',) + columns
+    else:
+        views = COLUMN_VIEWS[table]
+        if view not in views:
+            raise ValueError(f"Unknown view '{view}' for {table}; expected one of {', '.join(views)}")
+        columns = views[view]
+
+    return ', '.join(columns)
+
+@lru_cache(maxsize=None)
+def _model_fields(model: type) -> Tuple[FrozenSet[str], Tuple[str, ...]]:
+    names = frozenset(f.name for f in dataclass_fields(model))
+    required = tuple(
+        f.name for f in dataclass_fields(model)
+        if f.default is MISSING and f.default_factory is MISSING
+    )
+    return names, required
+
+def hydrate(model: Type[T], row: Dict) -> T:
+    """Build a model from a row that may hold only a projection of its columns.
+
+    Columns the model doesn't know are dropped and required fields missing
+    from the projection are set to None.
+    """
+    names, required = _model_fields(model)
+    data = {k: v for k, v in row.items() if k in names}
+    for name in required:
+        data.setdefault(name, None)
+    return model(**data)
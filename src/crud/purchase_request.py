@@ -1,25 +1,76 @@
+import functools
 from typing import List, Optional, Dict, Tuple
 from datetime import datetime
 from uuid import UUID
 from decimal import Decimal
-from src.models import PurchaseRequest, PurchaseRequestStatus, AuditEntry, PurchaseRequestItem
+from src.models import PurchaseRequest, PurchaseRequestStatus, AuditAction, AuditEntry, PurchaseRequestItem
+from src.models.hydration import RowParser, purchase_request_items_from_rows, purchase_requests_from_rows
 from ..database import get_supabase_client
+from .projection import select_columns
+from .bulk import bulk_outcomes
+from .errors import UpdateConflictError
+from .query_cache import cached_read, get_query_cache, invalidates
+from ..tracing import traced_methods
+from ..cache import get_shared_cache
+from ..profiles import get_profile_cache
 
+AUDIT_PAGE_SIZE = 20
+AUDIT_COLUMNS = 'id, purchase_request_id, user_id, action, details, created_at, profile_names(full_name)'
+
+# Allowed status changes; the bulk_update_purchase_request_status function mirrors these
+STATUS_TRANSITIONS = {
+    PurchaseRequestStatus.DRAFT: [PurchaseRequestStatus.PENDING],
+    PurchaseRequestStatus.PENDING: [PurchaseRequestStatus.APPROVED, PurchaseRequestStatus.REJECTED],
+    PurchaseRequestStatus.APPROVED: [],  # Final state
+    PurchaseRequestStatus.REJECTED: [PurchaseRequestStatus.PENDING]  # Can resubmit
+}
+
+# Shared cache keys of the dashboard's PRF counts per status, one per viewer scope
+STATUS_COUNTS_PREFIX = 'dashboard:prf_status_counts:'
+
+def drops_status_counts(func):
+    """Drop the dashboard's shared status counts once a PRF write returns or fails"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self.cache.delete_prefix(STATUS_COUNTS_PREFIX)
+    return wrapper
+
+def _previous_statuses(status: PurchaseRequestStatus) -> List[PurchaseRequestStatus]:
+    """Statuses a PRF may be in to move to ``status``"""
+    return [current for current, allowed in STATUS_TRANSITIONS.items() if status in allowed]
+
+def _parse_timestamps(pr_data: Dict) -> Dict:
+    """Convert a row's created_at and updated_at strings to datetimes in place"""
+    for column in ('created_at', 'updated_at'):
+        if isinstance(pr_data.get(column), str):
+            pr_data[column] = datetime.fromisoformat(pr_data[column].replace('Z', '+00:00'))
+    return pr_data
+
+@traced_methods
 class PurchaseRequestManager:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, supabase=None, audit_writer=None, query_cache=None, cache=None):
+        self.supabase = supabase or get_supabase_client()
+        self.audit_writer = audit_writer
+        self.cache = cache or get_shared_cache()
+        self.query_cache = query_cache if query_cache is not None else get_query_cache()
     
     def generate_form_number(self) -> str:
         """Generate a new PRF number using database sequence"""
         try:
             result = self.supabase.rpc('generate_prf_number').execute()
             if result.data:
-                return result.data[0]
+                # Scalar functions come back as the bare value, not a row list
+                return result.data[0] if isinstance(result.data, list) else result.data
             raise Exception("Failed to generate form number")
         except Exception as e:
             print(f"Error generating form number: {str(e)}")
             raise
     
+    @invalidates('purchase_requests', row='pr.id')
+    @drops_status_counts
     def create_purchase_request(self, pr: PurchaseRequest) -> Optional[PurchaseRequest]:
         """Create a new purchase request with retry logic for form number conflicts"""
         max_retries = 3
@@ -37,7 +88,7 @@ class PurchaseRequestManager:
                     'requestor_id': str(pr.requestor_id),
                     'supplier_id': str(pr.supplier_id),
                     'status': pr.status.value,
-                    'total_amount': float(pr.total_amount) if pr.total_amount else None,
+                    'total_amount': str(pr.total_amount) if pr.total_amount is not None else None,
                     'remarks': pr.remarks
                 }
                 
@@ -65,10 +116,9 @@ class PurchaseRequestManager:
                         items_data.append({
                             'purchase_request_id': str(pr_id),
                             'item_description': item.item_description,
-                            'quantity': float(item.quantity),
+                            'quantity': str(item.quantity),
                             'unit': item.unit,
-                            'unit_price': float(item.unit_price),
-                            'total_price': float(item.total_price),
+                            'unit_price': str(item.unit_price),
                             'account_code': item.account_code,
                             'remarks': item.remarks
                         })
@@ -86,7 +136,7 @@ class PurchaseRequestManager:
                         .execute()
                 
                 # Add audit entry
-                action = "Updated purchase request" if pr.id else "Created purchase request"
+                action = AuditAction.UPDATED if pr.id else AuditAction.CREATED
                 self._add_audit_entry(pr_id, action)
                 
                 return self.get_purchase_request(pr_id)
@@ -106,12 +156,13 @@ class PurchaseRequestManager:
         print("Failed to create purchase request after multiple retries")
         return None
     
-    def get_purchase_request(self, pr_id: UUID) -> Optional[PurchaseRequest]:
-        """Get a purchase request by ID"""
+    @cached_read('purchase_requests', row='pr_id')
+    def get_purchase_request(self, pr_id: UUID, view: str = 'detail', fields=None) -> Optional[PurchaseRequest]:
+        """Get a purchase request by ID, selecting the columns of a named view or field set"""
         try:
             # Get purchase request
             result = self.supabase.table('purchase_requests')\
-                .select('*')\
+                .select(select_columns('purchase_requests', view, fields))\
                 .eq('id', str(pr_id))\
                 .single()\
                 .execute()
@@ -119,54 +170,27 @@ class PurchaseRequestManager:
             if not result.data:
                 return None
             
-            # Get items
-            items_result = self.supabase.table('purchase_request_items')\
-                .select('*')\
-                .eq('purchase_request_id', str(pr_id))\
-                .execute()
-            
-            pr_data = result.data
-            
-            # Convert items to PurchaseRequestItem objects
-            if items_result.data:
-                pr_data['items'] = [
-                    PurchaseRequestItem(
-                        purchase_request_id=UUID(item['purchase_request_id']),
-                        item_description=item['item_description'],
-                        quantity=Decimal(str(item['quantity'])),
-                        unit=item['unit'],
-                        unit_price=Decimal(str(item['unit_price'])),
-                        total_price=Decimal(str(item['total_price'])),
-                        account_code=item.get('account_code'),
-                        remarks=item.get('remarks'),
-                        id=UUID(item['id']) if item.get('id') else None,
-                        created_at=datetime.fromisoformat(item['created_at'].replace('Z', '+00:00')) if item.get('created_at') else None,
-                        updated_at=datetime.fromisoformat(item['updated_at'].replace('Z', '+00:00')) if item.get('updated_at') else None
-                    )
-                    for item in items_result.data
-                ]
-            else:
-                pr_data['items'] = []
-            
-            # Convert datetime strings to datetime objects
-            if pr_data.get('created_at'):
-                pr_data['created_at'] = datetime.fromisoformat(pr_data['created_at'].replace('Z', '+00:00'))
-            if pr_data.get('updated_at'):
-                pr_data['updated_at'] = datetime.fromisoformat(pr_data['updated_at'].replace('Z', '+00:00'))
-            
-            return PurchaseRequest(**pr_data)
+            pr = purchase_requests_from_rows([result.data])[0]
+            pr.items = self.get_purchase_request_items(pr_id, view=view)
+            return pr
             
         except Exception as e:
             print(f"Error getting purchase request: {str(e)}")
             return None
     
-    def get_purchase_requests(self, filters=None, page=1, page_size=10) -> Tuple[List[PurchaseRequest], int]:
+    @cached_read('purchase_requests')
+    def get_purchase_requests(self, filters=None, page=1, page_size=10, include_items=False, view='list', fields=None) -> Tuple[List[PurchaseRequest], int]:
         """Get purchase requests with pagination and filters.
         
         Args:
             filters (dict, optional): Filter conditions for PRFs. Defaults to None.
             page (int, optional): Page number, starting from 1. Defaults to 1.
             page_size (int, optional): Number of items per page. Defaults to 10.
+            include_items (bool, optional): Also fetch line items. Defaults to False;
+                use get_purchase_request_items to load items on demand.
+            view (str, optional): Named column set ('list', 'detail' or 'export').
+                Defaults to 'list'.
+            fields (iterable, optional): Explicit columns to select instead of a view.
             
         Returns:
             tuple[list[PurchaseRequest], int]: List of PRFs and total count
@@ -174,46 +198,14 @@ class PurchaseRequestManager:
         try:
             # First get total count
             count_query = self.supabase.table('purchase_requests').select('id', count='exact')
-            
-            if filters:
-                if filters.get('status'):
-                    # Convert status values to list if not already
-                    status_values = filters['status']
-                    if isinstance(status_values, str):
-                        status_values = [status_values]
-                    count_query = count_query.in_('status', status_values)
-                if filters.get('start_date'):
-                    count_query = count_query.gte('created_at', filters['start_date'].isoformat())
-                if filters.get('end_date'):
-                    count_query = count_query.lte('created_at', filters['end_date'].isoformat())
-                if filters.get('search'):
-                    count_query = count_query.or_(
-                        f"form_number.ilike.%{filters['search']}%,"
-                        f"supplier_id.eq.{filters['search']}"
-                    )
-                if filters.get('requestor_id'):
-                    count_query = count_query.eq('requestor_id', str(filters['requestor_id']))
+            count_query = self._apply_filters(count_query, filters)
             
             count_result = count_query.execute()
             total_count = len(count_result.data) if count_result.data else 0
             
             # Now get the actual data with pagination
-            query = self.supabase.table('purchase_requests').select('*')
-            
-            if filters:
-                if filters.get('status'):
-                    query = query.in_('status', status_values)
-                if filters.get('start_date'):
-                    query = query.gte('created_at', filters['start_date'].isoformat())
-                if filters.get('end_date'):
-                    query = query.lte('created_at', filters['end_date'].isoformat())
-                if filters.get('search'):
-                    query = query.or_(
-                        f"form_number.ilike.%{filters['search']}%,"
-                        f"supplier_id.eq.{filters['search']}"
-                    )
-                if filters.get('requestor_id'):
-                    query = query.eq('requestor_id', str(filters['requestor_id']))
+            query = self.supabase.table('purchase_requests').select(select_columns('purchase_requests', view, fields))
+            query = self._apply_filters(query, filters)
             
             # Add pagination
             query = query\
@@ -225,93 +217,229 @@ class PurchaseRequestManager:
             if not result.data:
                 return [], total_count
             
+            return self._hydrate_purchase_requests(result.data, include_items, view), total_count
+        except Exception as e:
+            print(f"Error getting purchase requests: {str(e)}")
+            return [], 0
+    
+    def get_purchase_request_watermark(self, filters=None) -> Optional[Tuple[int, Optional[datetime]]]:
+        """Get the row count and latest updated_at of the filtered PRF set.
+        
+        This is the cheap "anything new?" probe used by the list replica: a
+        single request returning at most one row.
+        
+        Returns:
+            tuple[int, datetime | None]: Row count and high-water mark, or None on error
+        """
+        try:
+            query = self.supabase.table('purchase_requests').select('updated_at', count='exact')
+            query = self._apply_filters(query, filters)
+            result = query.order('updated_at', desc=True).limit(1).execute()
+            
+            latest = None
+            if result.data and result.data[0].get('updated_at'):
+                latest = datetime.fromisoformat(result.data[0]['updated_at'].replace('Z', '+00:00'))
+            
+            return (result.count or 0), latest
+        except Exception as e:
+            print(f"Error getting purchase request watermark: {str(e)}")
+            return None
+    
+    def get_purchase_requests_changed_since(self, since: Optional[datetime], filters=None, include_items=False, view='list', fields=None) -> Optional[List[PurchaseRequest]]:
+        """Get filtered PRFs updated at or after a watermark.
+        
+        Args:
+            since (datetime, optional): High-water mark; None fetches the whole filtered set.
+            filters (dict, optional): Same filter conditions as get_purchase_requests.
+            include_items (bool, optional): Also fetch line items. Defaults to False.
+            view (str, optional): Named column set. Defaults to 'list'.
+            fields (iterable, optional): Explicit columns to select instead of a view.
+            
+        Returns:
+            list[PurchaseRequest] | None: Changed PRFs, or None on error
+        """
+        try:
+            query = self.supabase.table('purchase_requests').select(select_columns('purchase_requests', view, fields))
+            query = self._apply_filters(query, filters)
+            if since:
+                query = query.gte('updated_at', since.isoformat())
+            
+            result = query.execute()
+            
+            if not result.data:
+                return []
+            
+            return self._hydrate_purchase_requests(result.data, include_items, view)
+        except Exception as e:
+            print(f"Error getting changed purchase requests: {str(e)}")
+            return None
+    
+    def _apply_filters(self, query, filters=None):
+        """Apply list filter conditions to a purchase_requests query"""
+        if not filters:
+            return query
+        
+        if filters.get('status'):
+            # Convert status values to list if not already
+            status_values = filters['status']
+            if isinstance(status_values, str):
+                status_values = [status_values]
+            query = query.in_('status', status_values)
+        if filters.get('start_date'):
+            query = query.gte('created_at', filters['start_date'].isoformat())
+        if filters.get('end_date'):
+            query = query.lte('created_at', filters['end_date'].isoformat())
+        if filters.get('search'):
+            query = query.or_(
+                f"form_number.ilike.%{filters['search']}%,"
+                f"supplier_id.eq.{filters['search']}"
+            )
+        if filters.get('requestor_id'):
+            query = query.eq('requestor_id', str(filters['requestor_id']))
+        
+        return query
+    
+    @cached_read('purchase_requests', row='pr_id')
+    def get_purchase_request_items(self, pr_id: UUID, view: str = 'detail', fields=None) -> List[PurchaseRequestItem]:
+        """Get the line items of a purchase request"""
+        try:
+            result = self.supabase.table('purchase_request_items')\
+                .select(select_columns('purchase_request_items', view, fields))\
+                .eq('purchase_request_id', str(pr_id))\
+                .execute()
+            
+            return purchase_request_items_from_rows(result.data) if result.data else []
+            
+        except Exception as e:
+            print(f"Error getting purchase request items: {str(e)}")
+            return []
+    
+    def _hydrate_purchase_requests(self, rows: List[Dict], include_items: bool = True, view: str = 'detail') -> List[PurchaseRequest]:
+        """Convert purchase_requests rows into PurchaseRequest objects, optionally with their items"""
+        # Group items by PR ID
+        parser = RowParser()
+        items_by_pr = {}
+        if include_items:
             # Get all items for these PRFs
-            pr_ids = [pr['id'] for pr in result.data]
+            pr_ids = [pr['id'] for pr in rows]
             items_result = self.supabase.table('purchase_request_items')\
-                .select('*')\
+                .select(select_columns('purchase_request_items', view))\
                 .in_('purchase_request_id', pr_ids)\
                 .execute()
             
-            # Group items by PR ID
-            items_by_pr = {}
             if items_result.data:
-                for item in items_result.data:
-                    pr_id = item['purchase_request_id']
+                items = purchase_request_items_from_rows(items_result.data, parser)
+                for row, item in zip(items_result.data, items):
+                    pr_id = row['purchase_request_id']
                     if pr_id not in items_by_pr:
                         items_by_pr[pr_id] = []
-                    items_by_pr[pr_id].append(
-                        PurchaseRequestItem(
-                            purchase_request_id=UUID(item['purchase_request_id']),
-                            item_description=item['item_description'],
-                            quantity=Decimal(str(item['quantity'])),
-                            unit=item['unit'],
-                            unit_price=Decimal(str(item['unit_price'])),
-                            total_price=Decimal(str(item['total_price'])),
-                            account_code=item.get('account_code'),
-                            remarks=item.get('remarks'),
-                            id=UUID(item['id']) if item.get('id') else None,
-                            created_at=datetime.fromisoformat(item['created_at'].replace('Z', '+00:00')) if item.get('created_at') else None,
-                            updated_at=datetime.fromisoformat(item['updated_at'].replace('Z', '+00:00')) if item.get('updated_at') else None
-                        )
-                    )
-            
-            # Create PurchaseRequest objects
-            purchase_requests = []
-            for pr_data in result.data:
-                # Convert datetime strings to datetime objects
-                if pr_data.get('created_at'):
-                    pr_data['created_at'] = datetime.fromisoformat(pr_data['created_at'].replace('Z', '+00:00'))
-                if pr_data.get('updated_at'):
-                    pr_data['updated_at'] = datetime.fromisoformat(pr_data['updated_at'].replace('Z', '+00:00'))
-                    
-                pr_data['items'] = items_by_pr.get(pr_data['id'], [])
-                purchase_requests.append(PurchaseRequest(**pr_data))
-            
-            return purchase_requests, total_count
-        except Exception as e:
-            print(f"Error getting purchase requests: {str(e)}")
-            return [], 0
+                    items_by_pr[pr_id].append(item)
+        
+        # Header totals are kept by the database, so they hold with or without items
+        return purchase_requests_from_rows(rows, items_by_pr, parser)
     
+    @invalidates('purchase_requests', row='pr_id')
+    @drops_status_counts
     def update_purchase_request_status(
         self,
         pr_id: UUID,
         status: PurchaseRequestStatus,
-        remarks: Optional[str] = None
-    ) -> bool:
-        """Update purchase request status"""
+        remarks: Optional[str] = None,
+        expected_updated_at: Optional[datetime] = None
+    ) -> Optional[PurchaseRequest]:
+        """Update purchase request status with a single conditional update.
+
+        The update only matches while the PRF is in a status that may move to
+        ``status`` and, when ``expected_updated_at`` is given, hasn't changed
+        since it was read, so concurrent approvals can't both succeed.
+
+        Returns:
+            Optional[PurchaseRequest]: The updated PRF without items, or None
+            if it doesn't exist or the transition isn't allowed
+
+        Raises:
+            UpdateConflictError: If someone else changed or deleted the PRF first
+        """
         try:
-            # Get current status
-            current_pr = self.get_purchase_request(pr_id)
-            if not current_pr:
-                return False
-            
-            # Validate status transition
-            if not self._is_valid_status_transition(current_pr.status, status):
-                return False
-            
             update_data = {'status': status.value}
             if remarks:
                 update_data['remarks'] = remarks
             
-            result = self.supabase.table('purchase_requests')\
+            query = self.supabase.table('purchase_requests')\
                 .update(update_data)\
                 .eq('id', str(pr_id))\
-                .execute()
+                .in_('status', [s.value for s in _previous_statuses(status)])
+            if expected_updated_at:
+                query = query.eq('updated_at', expected_updated_at.isoformat())
+            result = query.execute()
             
-            if result.data:
-                # Add audit entry
-                self._add_audit_entry(
-                    pr_id,
-                    f"Updated status to {status.value}",
-                    remarks
-                )
-                return True
-            return False
+            if not result.data:
+                self._raise_if_conflict(pr_id, status, expected_updated_at)
+                return None
+            
+            # The status change itself is logged by the on_purchase_request_status_change trigger
+            if remarks:
+                self._add_audit_entry(pr_id, AuditAction.COMMENT_ADDED, remarks)
+            return purchase_requests_from_rows(result.data)[0]
             
+        except UpdateConflictError:
+            raise
         except Exception as e:
             print(f"Error updating purchase request status: {str(e)}")
-            return False
-    
+            return None
+
+    def _raise_if_conflict(
+        self,
+        pr_id: UUID,
+        status: PurchaseRequestStatus,
+        expected_updated_at: Optional[datetime]
+    ) -> None:
+        """Explain a conditional update that matched nothing; only runs on failure"""
+        result = self.supabase.table('purchase_requests')\
+            .select('id, status, updated_at')\
+            .eq('id', str(pr_id))\
+            .execute()
+        if not result.data:
+            if expected_updated_at:
+                raise UpdateConflictError('purchase_requests')
+            return
+        
+        current = result.data[0]
+        if expected_updated_at and _parse_timestamps(dict(current))['updated_at'] != expected_updated_at:
+            raise UpdateConflictError('purchase_requests', current)
+        # Unchanged, so the transition itself isn't allowed
+
+    @invalidates('purchase_requests', row='pr_ids')
+    @drops_status_counts
+    def bulk_update_status(
+        self,
+        pr_ids: List[UUID],
+        status: PurchaseRequestStatus,
+        remarks: Optional[str] = None
+    ) -> Dict[UUID, Optional[str]]:
+        """Change the status of several purchase requests in one round trip.
+
+        Transitions are checked by the bulk_update_purchase_request_status
+        database function, which also logs the changes and remarks.
+
+        Returns:
+            Dict[UUID, Optional[str]]: None for each updated PRF, otherwise why it wasn't
+        """
+        if not pr_ids:
+            return {}
+        try:
+            result = self.supabase.rpc('bulk_update_purchase_request_status', {
+                'p_ids': [str(pr_id) for pr_id in pr_ids],
+                'p_status': status.value,
+                'p_remarks': remarks
+            }).execute()
+            return bulk_outcomes(result.data)
+        except Exception as e:
+            print(f"Error updating purchase request statuses: {str(e)}")
+            return {UUID(str(pr_id)): str(e) for pr_id in pr_ids}
+
+    @invalidates('purchase_requests', row='pr_id')
+    @drops_status_counts
     def delete_purchase_request(self, pr_id: UUID) -> bool:
         """Delete a purchase request"""
         try:
@@ -333,6 +461,7 @@ class PurchaseRequestManager:
             print(f"Error deleting purchase request: {str(e)}")
             return False
     
+    @cached_read('suppliers')
     def get_suppliers(self) -> List[Dict]:
         """Get list of suppliers"""
         result = self.supabase.table('suppliers')\
@@ -342,6 +471,7 @@ class PurchaseRequestManager:
         
         return result.data if result.data else []
 
+    @cached_read('suppliers', row='supplier_id')
     def get_supplier_name(self, supplier_id: UUID) -> Optional[str]:
         """Get supplier name by ID"""
         if not supplier_id:
@@ -361,66 +491,104 @@ class PurchaseRequestManager:
             return None
         
         try:
-            result = self.supabase.table('profiles')\
-                .select('first_name, last_name')\
-                .eq('id', str(requestor_id))\
-                .limit(1)\
-                .execute()
-            
-            if result.data:
-                profile = result.data[0]
-                return f"{profile['first_name']} {profile['last_name']}"
-            
-            return None
-            
+            return get_profile_cache().name(requestor_id, self.supabase)
         except Exception as e:
             print(f"Error getting requestor name: {str(e)}")
             return None
     
-    def get_audit_trail(self, pr_id: UUID) -> List[AuditEntry]:
-        """Get audit trail for a purchase request"""
-        try:
-            result = self.supabase.table('purchase_request_audit')\
-                .select("*")\
-                .eq('purchase_request_id', str(pr_id))\
-                .order('created_at', desc=True)\
-                .execute()
-            
-            if not result.data:
-                return []
+    def get_audit_trail(
+        self,
+        pr_id: UUID,
+        limit: int = AUDIT_PAGE_SIZE,
+        before: Optional[AuditEntry] = None
+    ) -> List[AuditEntry]:
+        """Get a page of a purchase request's audit trail, newest first.
+        
+        Args:
+            pr_id (UUID): Purchase request ID
+            limit (int, optional): Entries per page. Defaults to AUDIT_PAGE_SIZE.
+            before (AuditEntry, optional): Last entry of the previous page
             
-            return [AuditEntry(**entry) for entry in result.data]
+        Returns:
+            List[AuditEntry]: Entries with author names joined from profile_names
+        """
+        try:
+            query = self.supabase.table('purchase_request_audit')\
+                .select(AUDIT_COLUMNS)\
+                .eq('purchase_request_id', str(pr_id))
+            return self._audit_page(query, limit, before)
             
         except Exception as e:
             print(f"Error getting audit trail: {str(e)}")
             return []
     
+    def get_audit_feed(
+        self,
+        limit: int = AUDIT_PAGE_SIZE,
+        before: Optional[AuditEntry] = None,
+        action: Optional[AuditAction] = None
+    ) -> List[AuditEntry]:
+        """Get a page of audit entries across all purchase requests, newest first.
+        
+        Pages are keyed on (created_at, id) rather than offsets, so reading
+        deep into the history costs the same as reading the first page.
+        """
+        try:
+            query = self.supabase.table('purchase_request_audit')\
+                .select(f"{AUDIT_COLUMNS}, purchase_requests(form_number)")
+            if action:
+                query = query.eq('action', AuditAction(action).value)
+            return self._audit_page(query, limit, before)
+            
+        except Exception as e:
+            print(f"Error getting audit feed: {str(e)}")
+            return []
+    
+    def _audit_page(self, query, limit: int, before: Optional[AuditEntry]) -> List[AuditEntry]:
+        if before is not None:
+            created_at = before.timestamp.isoformat()
+            query = query.or_(
+                f"created_at.lt.{created_at},"
+                f"and(created_at.eq.{created_at},id.lt.{before.id})"
+            )
+        result = query\
+            .order('created_at', desc=True)\
+            .order('id', desc=True)\
+            .limit(limit)\
+            .execute()
+        return [self._audit_entry_from_row(row) for row in result.data or []]
+    
+    def _audit_entry_from_row(self, row: Dict) -> AuditEntry:
+        return AuditEntry(
+            id=row['id'],
+            purchase_request_id=row['purchase_request_id'],
+            action=row['action'],
+            user_id=row['user_id'],
+            timestamp=datetime.fromisoformat(row['created_at'].replace('Z', '+00:00')),
+            details=row.get('details'),
+            user_name=(row.get('profile_names') or {}).get('full_name'),
+            form_number=(row.get('purchase_requests') or {}).get('form_number')
+        )
+    
     def _add_audit_entry(
         self,
         pr_id: UUID,
-        action: str,
+        action: AuditAction,
         details: Optional[str] = None
     ) -> bool:
-        """Add an audit entry"""
+        """Record an audit entry, batched with others when the audit writer is running"""
         try:
             import streamlit as st
             
             if 'user' not in st.session_state:
                 print("No user in session")
                 return False
-                
-            audit_data = {
-                'purchase_request_id': str(pr_id),
-                'action': action,
-                'details': details,
-                'user_id': str(st.session_state.user['id'])
-            }
-            
-            result = self.supabase.table('purchase_request_audit')\
-                .insert(audit_data)\
-                .execute()
             
-            return bool(result.data)
+            if self.audit_writer is None:
+                from .audit import DirectAuditWriter, get_audit_writer
+                self.audit_writer = get_audit_writer() or DirectAuditWriter(self.supabase)
+            
+            return self.audit_writer.record(pr_id, action, st.session_state.user['id'], details)
             
         except Exception as e:
             print(f"Error adding audit entry: {str(e)}")
@@ -432,11 +600,4 @@ class PurchaseRequestManager:
         new_status: PurchaseRequestStatus
     ) -> bool:
         """Validate status transitions"""
-        valid_transitions = {
-            PurchaseRequestStatus.DRAFT: [PurchaseRequestStatus.PENDING],
-            PurchaseRequestStatus.PENDING: [PurchaseRequestStatus.APPROVED, PurchaseRequestStatus.REJECTED],
-            PurchaseRequestStatus.APPROVED: [],  # Final state
-            PurchaseRequestStatus.REJECTED: [PurchaseRequestStatus.PENDING]  # Can resubmit
-        }
-        
-        return new_status in valid_transitions.get(current_status, [])
+        return new_status in STATUS_TRANSITIONS.get(current_status, [])
@@ -0,0 +1,230 @@
+"""Cache of manager read results, evicted by tag when the managers write"""
+import copy
+import dataclasses
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+from uuid import UUID
+
+from ..profiling import query_error_count, read_epoch, record_cache_hit
+
+# Entries kept before the least recently used is dropped, and seconds each
+# is trusted. Writes through the managers evict what they touch at once; the
+# TTL bounds how long writes made by other workers go unseen, for tables the
+# Realtime feed doesn't watch.
+QUERY_CACHE_SIZE = 1000
+QUERY_CACHE_TTL = 60
+
+# ``row`` value of invalidates() for writes that may touch any row of the table
+ALL_ROWS = '*'
+
+_MISSING = object()
+
+class QueryCache:
+    """LRU cache of read results with a TTL, tagged by the table rows they were read from.
+
+    A read of one row is tagged ``table:<id>``, any other read ``table``, and
+    every entry also ``table:*``. Stored and returned values are copies, so
+    sessions never share model objects. When a Realtime change feed is given,
+    a change to a watched table drops every entry of it.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL, feed=None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.feed = feed
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._feed_versions: Dict[str, int] = {}
+        # Bumped by every invalidation, so a read that overlapped a write isn't stored
+        self.generation = 0
+
+    def get(self, key: Hashable, table: str) -> Any:
+        """Get a copy of a fresh entry, or _MISSING"""
+        self._check_feed(table)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[1] <= self.clock():
+                self._drop(key)
+                return _MISSING
+            self._entries.move_to_end(key)
+        return copy.deepcopy(entry[0])
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str], generation: int) -> None:
+        """Store a copy of a value read when the cache was at ``generation``"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            tags = frozenset(tags)
+            self._entries[key] = (value, self.clock() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        """Drop every entry carrying any of the tags"""
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def _drop(self, key: Hashable) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _check_feed(self, table: str) -> None:
+        if self.feed is None or table not in self.feed.tables:
+            return
+        version = self.feed.version(table)
+        if self._feed_versions.get(table) != version:
+            self._feed_versions[table] = version
+            self.invalidate([f"{table}:*"])
+
+def _normalize(value) -> Hashable:
+    """Turn call arguments into a hashable key; equal arguments give equal keys"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((_normalize(v) for v in value), key=repr))
+    if dataclasses.is_dataclass(value):
+        return (type(value).__name__,) + tuple(
+            _normalize(getattr(value, field.name)) for field in dataclasses.fields(value)
+        )
+    return repr(value)
+
+def _arguments(signature: inspect.Signature, args, kwargs) -> Dict[str, Any]:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    arguments.pop('self', None)
+    return arguments
+
+def _row_tags(table: str, arguments: Dict[str, Any], path: str) -> Set[str]:
+    """Tags of the rows whose ids are at ``path``, an argument name optionally followed by attributes"""
+    name, *attributes = path.split('.')
+    values = arguments.get(name)
+    if not isinstance(values, (list, tuple, set)):
+        values = [values]
+    tags = set()
+    for value in values:
+        for attribute in attributes:
+            value = getattr(value, attribute, None)
+        if value is not None:
+            tags.add(f"{table}:{value}")
+    return tags
+
+def cached_read(table: str, row: Optional[str] = None):
+    """Cache a manager read method's results for the caller's row scope.
+
+    ``row`` names the argument holding the id of the one ``table`` row the
+    method reads, e.g. 'pr_id'; without it the read is tagged as one over the
+    whole table. Reads are only cached when the manager's client names a
+    scope (see profiles.query_scope), and never when a query failed or the
+    cache was invalidated while it ran.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = self.query_cache
+            query_scope = getattr(self.supabase, 'query_scope', None)
+            scope = query_scope(table) if cache is not None and query_scope is not None else None
+            if scope is None:
+                return func(self, *args, **kwargs)
+
+            arguments = _arguments(signature, (self, *args), kwargs)
+            key = (func.__qualname__, scope, _normalize(arguments))
+            value = cache.get(key, table)
+            if value is not _MISSING:
+                record_cache_hit('queries')
+                return value
+
+            # Taken before the read is issued; shared reads must have been issued
+            # at the same generation, or an invalidation since could be missed
+            generation, errors = cache.generation, query_error_count()
+            with read_epoch((id(cache), generation)):
+                value = func(self, *args, **kwargs)
+            if query_error_count() == errors:
+                tags = _row_tags(table, arguments, row) if row else {table}
+                cache.set(key, value, tags | {f"{table}:*"}, generation)
+            return value
+        return wrapper
+    return decorator
+
+def invalidates(table: str, row: Optional[str] = None):
+    """Evict cached reads of ``table`` once a manager write method returns or fails.
+
+    Reads over the whole table are always evicted. ``row`` names the
+    argument holding the ids of the rows written, e.g. 'pr_ids' or
+    'supplier.id', whose single-row reads are evicted too; ALL_ROWS evicts
+    every read of the table.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                cache = self.query_cache
+                if cache is not None:
+                    if row == ALL_ROWS:
+                        tags = {f"{table}:*"}
+                    elif row:
+                        tags = {table} | _row_tags(table, _arguments(signature, (self, *args), kwargs), row)
+                    else:
+                        tags = {table}
+                    cache.invalidate(tags)
+        return wrapper
+    return decorator
+
+_cache: Optional[QueryCache] = None
+_cache_lock = threading.Lock()
+
+def get_query_cache() -> QueryCache:
+    """Get the query cache shared by the sessions of this process"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from ..realtime import get_change_feed
+            _cache = QueryCache(feed=get_change_feed())
+        return _cache
@@ -0,0 +1,146 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from src.models import PurchaseRequest, PurchaseRequestItem
+from src.profiling import record_cache_hit
+
+# updated_at is the writing transaction's start time, so a row can commit
+# after rows stamped later than it. Deltas reach back this far behind the
+# high-water mark, and keep being fetched while it is this recent.
+WATERMARK_OVERLAP = timedelta(seconds=30)
+# Largest filtered set kept in a session; bigger ones are paged by the server
+REPLICA_MAX_ROWS = 500
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class PurchaseRequestReplica:
+    """Local replica of a filtered PRF list kept fresh with delta syncs.
+
+    Each sync costs one watermark probe. Rows are only refetched when the
+    probe reports an ``updated_at`` newer than the replica's high-water mark,
+    and a full resync happens when the row count no longer matches (deleted
+    rows, or rows that moved out of the filtered set). Rows are header-only;
+    line items are fetched per PRF when first asked for.
+
+    A filtered set of more than ``max_rows`` PRFs isn't replicated; its pages
+    are read from the server instead.
+    """
+
+    def __init__(self, filters: Optional[Dict] = None, clock: Callable[[], datetime] = _utcnow,
+                 max_rows: int = REPLICA_MAX_ROWS):
+        self.filters = filters
+        self.clock = clock
+        self.max_rows = max_rows
+        self.oversized = False
+        self.rows: Dict[str, PurchaseRequest] = {}
+        self._ordered: Optional[List[PurchaseRequest]] = None
+        self.watermark: Optional[datetime] = None
+        self.synced = False
+        self.feed_version: Optional[int] = None
+        self._items: Dict[str, Tuple[Optional[datetime], List[PurchaseRequestItem]]] = {}
+
+    def matches(self, filters: Optional[Dict]) -> bool:
+        """Check if this replica was built for the given filters"""
+        return self.filters == filters
+
+    def invalidate(self) -> None:
+        """Force a full resync on the next sync; call after writing PRFs"""
+        self.synced = False
+
+    def sync(self, pr_manager, feed_version: Optional[int] = None) -> None:
+        """Bring the replica up to date with the database.
+
+        Args:
+            pr_manager: PurchaseRequestManager used for the probe and refetches.
+            feed_version (int, optional): Realtime change version of
+                purchase_requests. When it matches the version of the last
+                sync, nothing changed and the probe is skipped entirely.
+        """
+        if self.synced and feed_version is not None and feed_version == self.feed_version:
+            record_cache_hit('prf_replica')
+            return
+
+        probe = pr_manager.get_purchase_request_watermark(self.filters)
+        if probe is None:
+            # Keep serving the last known rows if the probe fails
+            return
+
+        count, latest = probe
+        # Recorded before refetching so changes arriving meanwhile trigger another sync
+        self.feed_version = feed_version
+
+        if count > self.max_rows:
+            self._drop_rows()
+            self.oversized = self.synced = True
+            return
+        if self.oversized:
+            self.oversized = self.synced = False
+
+        if not self.synced:
+            self._full_resync(pr_manager)
+            return
+
+        has_changes = latest is not None and (self.watermark is None or latest > self.watermark)
+        # Transactions still open when the watermark was set may commit rows stamped before it
+        in_flight = self.watermark is not None and self.watermark > self.clock() - WATERMARK_OVERLAP
+        if not has_changes and not in_flight and count == len(self.rows):
+            return
+
+        if has_changes or in_flight:
+            since = self.watermark - WATERMARK_OVERLAP if self.watermark else None
+            changed = pr_manager.get_purchase_requests_changed_since(since, self.filters)
+            if changed is None:
+                return
+            self._merge(changed)
+
+        # Rows were deleted or left the filtered set; the delta can't tell which
+        if len(self.rows) != count:
+            self._full_resync(pr_manager)
+
+    def page(self, pr_manager, page: int = 1, page_size: int = 10) -> Tuple[List[PurchaseRequest], int]:
+        """Get a page of PRFs, newest first, and the total count.
+
+        Served from the replica unless the filtered set is too large to keep,
+        in which case ``pr_manager`` reads the page from the server.
+        """
+        if self.oversized:
+            return pr_manager.get_purchase_requests(self.filters, page=page, page_size=page_size)
+        if self._ordered is None:
+            self._ordered = sorted(
+                self.rows.values(),
+                key=lambda pr: pr.created_at.timestamp() if pr.created_at else 0,
+                reverse=True
+            )
+        start = (page - 1) * page_size
+        return self._ordered[start:start + page_size], len(self._ordered)
+
+    def items(self, pr_manager, prf: PurchaseRequest) -> List[PurchaseRequestItem]:
+        """Get a PRF's line items, fetching them only when first requested"""
+        cached = self._items.get(str(prf.id))
+        # Item edits rewrite the header too, so updated_at versions the items
+        if cached is None or cached[0] != prf.updated_at:
+            cached = (prf.updated_at, pr_manager.get_purchase_request_items(prf.id))
+            self._items[str(prf.id)] = cached
+        else:
+            record_cache_hit('prf_items')
+        return cached[1]
+
+    def _full_resync(self, pr_manager) -> None:
+        prfs = pr_manager.get_purchase_requests_changed_since(None, self.filters)
+        if prfs is None:
+            return
+        self._drop_rows()
+        self._merge(prfs)
+        self.synced = True
+
+    def _drop_rows(self) -> None:
+        self.rows = {}
+        self._ordered = None
+        self.watermark = None
+
+    def _merge(self, prfs: List[PurchaseRequest]) -> None:
+        self._ordered = None
+        for prf in prfs:
+            self.rows[str(prf.id)] = prf
+            if prf.updated_at and (self.watermark is None or prf.updated_at > self.watermark):
+                self.watermark = prf.updated_at
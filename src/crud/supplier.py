@@ -1,12 +1,26 @@
 from datetime import datetime
+from typing import Dict, List
 from uuid import UUID
 from ..models.supplier import Supplier
 from ..database import get_supabase_client
+from ..cache import get_shared_cache
+from ..profiling import record_cache_hit
+from .projection import select_columns, hydrate
+from .query_cache import cached_read, get_query_cache, invalidates
+from ..tracing import traced_methods
 
+# Shared cache key and lifetime of the supplier dropdown options
+SUPPLIER_OPTIONS_KEY = 'suppliers:options'
+SUPPLIER_OPTIONS_TTL = 300
+
+@traced_methods
 class SupplierManager:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, supabase=None, cache=None, query_cache=None):
+        self.supabase = supabase or get_supabase_client()
+        self.cache = cache or get_shared_cache()
+        self.query_cache = query_cache if query_cache is not None else get_query_cache()
 
+    @invalidates('suppliers')
     def create(self, supplier: Supplier) -> Supplier:
         """Create a new supplier."""
         data = {
@@ -23,9 +37,11 @@ class SupplierManager:
         }
         
         result = self.supabase.table('suppliers').insert(data).execute()
+        self.cache.delete(SUPPLIER_OPTIONS_KEY)
         created_supplier = result.data[0]
         return Supplier(**created_supplier)
 
+    @invalidates('suppliers', row='supplier.id')
     def update(self, supplier: Supplier) -> Supplier:
         """Update an existing supplier."""
         if not supplier.id:
@@ -44,27 +60,52 @@ class SupplierManager:
         }
         
         result = self.supabase.table('suppliers').update(data).eq('id', str(supplier.id)).execute()
+        self.cache.delete(SUPPLIER_OPTIONS_KEY)
         updated_supplier = result.data[0]
         return Supplier(**updated_supplier)
 
+    @invalidates('suppliers', row='supplier_id')
     def delete(self, supplier_id: UUID) -> bool:
         """Delete a supplier by ID."""
         result = self.supabase.table('suppliers').delete().eq('id', str(supplier_id)).execute()
+        self.cache.delete(SUPPLIER_OPTIONS_KEY)
         return len(result.data) > 0
 
-    def get(self, supplier_id: UUID) -> Supplier:
-        """Get a supplier by ID."""
-        result = self.supabase.table('suppliers').select('*').eq('id', str(supplier_id)).execute()
+    @cached_read('suppliers', row='supplier_id')
+    def get(self, supplier_id: UUID, view: str = 'detail', fields=None) -> Supplier:
+        """Get a supplier by ID, selecting the columns of a named view or field set."""
+        result = self.supabase.table('suppliers').select(select_columns('suppliers', view, fields)).eq('id', str(supplier_id)).execute()
         if not result.data:
             return None
-        return Supplier(**result.data[0])
+        return hydrate(Supplier, result.data[0])
+
+    @cached_read('suppliers')
+    def list(self, search_query: str = None, view: str = 'list', fields=None) -> list[Supplier]:
+        """List all suppliers, optionally filtered by search query.
 
-    def list(self, search_query: str = None) -> list[Supplier]:
-        """List all suppliers, optionally filtered by search query."""
-        query = self.supabase.table('suppliers').select('*')
+        Only the columns of the given view ('list' by default) or field set are
+        selected; the rest of each Supplier is left at its defaults.
+        """
+        query = self.supabase.table('suppliers').select(select_columns('suppliers', view, fields))
         
         if search_query:
             query = query.or_(f"name.ilike.%{search_query}%,contact_person.ilike.%{search_query}%")
             
         result = query.execute()
-        return [Supplier(**item) for item in result.data]
+        return [hydrate(Supplier, item) for item in result.data]
+
+    def options(self) -> List[Dict]:
+        """Get every supplier's id and name for dropdowns, shared by all sessions and workers"""
+        suppliers = self.cache.get(SUPPLIER_OPTIONS_KEY)
+        if suppliers is not None:
+            record_cache_hit('suppliers')
+            return suppliers
+
+        result = self.supabase.table('suppliers')\
+            .select('id, name')\
+            .order('name')\
+            .execute()
+        suppliers = result.data or []
+        if suppliers:
+            self.cache.set(SUPPLIER_OPTIONS_KEY, suppliers, SUPPLIER_OPTIONS_TTL)
+        return suppliers
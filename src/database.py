@@ -1,18 +1,32 @@
-import streamlit as st
-from supabase import create_client
-
 def get_supabase_client():
     """Get a configured Supabase client instance."""
+    import streamlit as st
+    from supabase import create_client
+    from supabase.lib.client_options import ClientOptions
+    from src.credentials import current_credentials
+    from src.profiling import instrument_client
+    from src.profiles import session_query_scope
+    
+    # Requests carry the access token kept current by the background
+    # refresher, so getting a client never waits on an auth round trip
+    credentials = current_credentials()
+    token = credentials.access_token if credentials else None
+    
+    # Reuse the session's client until its token changes
+    cached = st.session_state.get('db_client')
+    if cached and cached[0] == token:
+        return cached[1]
+    
     client = create_client(
         st.secrets["SUPABASE_URL"],
-        st.secrets["SUPABASE_KEY"]
+        st.secrets["SUPABASE_KEY"],
+        options=ClientOptions(auto_refresh_token=False, persist_session=False)
     )
     
     # Set session if authenticated
-    if 'session' in st.session_state and st.session_state.session:
-        client.auth.set_session(
-            st.session_state.session['access_token'],
-            st.session_state.session['refresh_token']
-        )
+    if token:
+        client.postgrest.auth(token)
     
+    client = instrument_client(client, session_query_scope)
+    st.session_state.db_client = (token, client)
     return client
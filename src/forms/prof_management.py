@@ -17,7 +17,7 @@ def can_delete_prf(user: User, prf: PurchaseRequest) -> bool:
         return False
     # Users can only delete their own drafts
     # Admins and Finance can delete any draft
-    return (user['id'] == prf.requestor_id) or user['role'].lower() in ['finance', 'admin']
+    return (str(user['id']) == str(prf.requestor_id)) or user['role'].lower() in ['finance', 'admin']
 
 def format_currency(amount: Decimal) -> str:
     """Format decimal amount as currency string"""
@@ -129,7 +129,7 @@ def render_prf_management():
                                     else:
                                         st.error("Failed to delete draft")
                             
-                            if user['id'] == prf.requestor_id:
+                            if str(user['id']) == str(prf.requestor_id):
                                 if st.button("Submit for Approval", key=f"submit_{prf.id}"):
                                     if pr_manager.update_purchase_request_status(
                                         prf.id,
@@ -1,8 +1,7 @@
 import streamlit as st
-from supabase import create_client
-from datetime import datetime, timedelta
+from datetime import datetime
+import importlib
 import re
-import gotrue
 
 # Page configuration
 st.set_page_config(
@@ -11,12 +10,24 @@ st.set_page_config(
     layout="wide"
 )
 
-from src.views.dashboard import render as dashboard_render
-from src.views.settings import render as settings_render
-from src.views.suppliers import render as suppliers_render
-from src.views.expenses import render as expenses_render
-from src.views.purchase_requests import render as purchase_requests_render
-from src.config import config
+from src.rate_limit import forwarded_client_ip, get_login_limiter
+from src.profiling import instrument_client, render_debug_sidebar
+from src.profiles import get_permissions, get_profile_cache, get_user_permissions, session_query_scope
+from src.credentials import Credentials, current_credentials, get_credential_store
+from src.crud.audit import request_audit_flush
+
+# Views are imported on first visit so the login page doesn't pay for them
+VIEW_MODULES = {
+    "Dashboard": "src.views.dashboard",
+    "Purchase Requests": "src.views.purchase_requests",
+    "Expenses": "src.views.expenses",
+    "Suppliers": "src.views.suppliers",
+    "Settings": "src.views.settings",
+}
+
+def render_view(page):
+    """Import a page's view module if needed and render it"""
+    importlib.import_module(VIEW_MODULES[page]).render()
 
 # Initialize session state once
 if 'authenticated' not in st.session_state:
@@ -25,10 +36,6 @@ if 'user' not in st.session_state:
     st.session_state.user = None
 if 'supabase' not in st.session_state:
     st.session_state.supabase = None
-if 'login_attempts' not in st.session_state:
-    st.session_state.login_attempts = 0
-if 'last_attempt' not in st.session_state:
-    st.session_state.last_attempt = None
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 'login'
 if 'error' not in st.session_state:
@@ -38,15 +45,31 @@ if 'success' not in st.session_state:
 if 'session' not in st.session_state:
     st.session_state.session = None
 
-# Initialize Supabase client
-try:
-    supabase = create_client(
-        supabase_url=st.secrets["SUPABASE_URL"],
-        supabase_key=st.secrets["SUPABASE_KEY"]
-    )
-    st.session_state.supabase = supabase
-except Exception as e:
-    st.error(f"Failed to initialize Supabase client: {str(e)}")
+def get_supabase():
+    """Get the session's Supabase client, creating it on first use"""
+    if st.session_state.supabase is None:
+        try:
+            from supabase import create_client
+            from supabase.lib.client_options import ClientOptions
+            # Token refresh is left to the shared credential store; a client
+            # refreshing on its own would rotate the refresh token under it
+            st.session_state.supabase = instrument_client(create_client(
+                supabase_url=st.secrets["SUPABASE_URL"],
+                supabase_key=st.secrets["SUPABASE_KEY"],
+                options=ClientOptions(auto_refresh_token=False)
+            ), session_query_scope)
+        except Exception as e:
+            st.error(f"Failed to initialize Supabase client: {str(e)}")
+            return None
+
+    # The client never refreshes on its own, so queries carry the token the
+    # credential store renewed last
+    credentials = current_credentials()
+    token = credentials.access_token if credentials else None
+    if token and token != st.session_state.get('supabase_token'):
+        st.session_state.supabase.postgrest.auth(token)
+        st.session_state.supabase_token = token
+    return st.session_state.supabase
 
 def validate_password(password):
     """Validate password strength"""
@@ -62,46 +85,18 @@ def validate_password(password):
         return False, "Password must contain at least one special character"
     return True, "Password is strong"
 
-def get_user_permissions(role):
-    """Get user permissions based on role"""
-    permissions = {
-        'can_view_reports': False,
-        'can_approve': False,
-        'can_manage_users': False
-    }
-    
-    if role == 'Admin':
-        permissions.update({
-            'can_view_reports': True,
-            'can_approve': True,
-            'can_manage_users': True,
-            'can_manage_pcf': True
-        })
-    elif role == 'Finance':
-        permissions.update({
-            'can_view_reports': True,
-            'can_approve': True,
-            'can_manage_users': False
-        })
-    elif role == 'PCF_Custodian':
-        permissions.update({
-            'can_manage_pcf': True
-        })
-    
-    return permissions
+def client_ip():
+    """Get the browser's IP address, as forwarded by the trusted proxies in front of Streamlit"""
+    return forwarded_client_ip(st.context.headers.get('X-Forwarded-For'), getattr(st.context, 'ip_address', None))
 
-def check_rate_limit():
-    """Check if user has exceeded login attempts"""
-    if st.session_state.login_attempts >= 5:
-        if st.session_state.last_attempt:
-            time_diff = datetime.now() - st.session_state.last_attempt
-            if time_diff < timedelta(minutes=15):
-                return False
-            st.session_state.login_attempts = 0
-    return True
+def check_rate_limit(email):
+    """Check the email and client IP are under their failed-login limits in every session and worker"""
+    return get_login_limiter().allow(email, client_ip())
 
 def handle_authentication(email, password, remember_me=False):
     """Handle authentication with Supabase"""
+    import gotrue
+    supabase = get_supabase()
     try:
         auth_response = supabase.auth.sign_in_with_password({
             "email": email,
@@ -109,28 +104,22 @@ def handle_authentication(email, password, remember_me=False):
         })
         
         if auth_response.user and auth_response.session:
-            # Set session in Supabase
-            supabase.auth.set_session(
-                auth_response.session.access_token,
-                auth_response.session.refresh_token
-            )
+            # Hand the tokens to the background refresher
+            credentials = Credentials.from_session(auth_response.session)
+            get_credential_store().put(auth_response.user.id, credentials)
             
             # Get user profile and permissions
-            profile = supabase.table('profiles').select("*").eq('id', auth_response.user.id).single().execute()
+            profile = get_profile_cache().get(auth_response.user.id, supabase)
             
-            if not profile.data:
+            if not profile:
                 st.error("User profile not found. Please contact support.")
                 return False
                 
-            role = profile.data.get('role', 'User')
+            role = profile.get('role', 'User')
             permissions = get_user_permissions(role)
             
             # Store session info
-            st.session_state.session = {
-                'access_token': auth_response.session.access_token,
-                'refresh_token': auth_response.session.refresh_token,
-                'expires_at': auth_response.session.expires_at
-            }
+            st.session_state.session = credentials.to_dict()
             
             # Update session state
             st.session_state.authenticated = True
@@ -139,9 +128,9 @@ def handle_authentication(email, password, remember_me=False):
                 'email': auth_response.user.email,
                 'role': role,
                 'permissions': permissions,
-                'profile': profile.data
+                'profile': profile
             }
-            st.session_state.login_attempts = 0
+            get_login_limiter().succeeded(email)
             st.session_state.error = None
             st.session_state.success = "Login successful!"
             
@@ -151,8 +140,7 @@ def handle_authentication(email, password, remember_me=False):
             return True
         return False
     except gotrue.errors.AuthApiError as e:
-        st.session_state.login_attempts += 1
-        st.session_state.last_attempt = datetime.now()
+        get_login_limiter().failed(email, client_ip())
         
         error_message = str(e).lower()
         if "email not confirmed" in error_message:
@@ -167,8 +155,7 @@ def handle_authentication(email, password, remember_me=False):
         st.write(f"Debug: Full error: {traceback.format_exc()}")
         return False
     except Exception as e:
-        st.session_state.login_attempts += 1
-        st.session_state.last_attempt = datetime.now()
+        # Not a rejected password, e.g. Supabase unreachable; doesn't count as a failed login
         st.error(f"Login failed: {str(e)}")
         # Add detailed error logging
         import traceback
@@ -180,41 +167,30 @@ def check_session():
     try:
         if not st.session_state.get('session'):
             return False
+        supabase = get_supabase()
             
-        # Try to refresh the session if it's about to expire
-        session = st.session_state.session
-        if datetime.fromtimestamp(session['expires_at']) < datetime.now() + timedelta(minutes=5):
-            try:
-                # Refresh the session
-                new_session = supabase.auth.refresh_session(session['refresh_token'])
-                if new_session and new_session.session:
-                    st.session_state.session = {
-                        'access_token': new_session.session.access_token,
-                        'refresh_token': new_session.session.refresh_token,
-                        'expires_at': new_session.session.expires_at
-                    }
-                    supabase.auth.set_session(
-                        new_session.session.access_token,
-                        new_session.session.refresh_token
-                    )
-            except Exception as e:
-                st.write(f"Debug: Session refresh failed: {str(e)}")
-                return False
+        # Tokens near expiry are renewed by the background refresher once the
+        # user is back in the credential store; expired ones need a new login
+        credentials = current_credentials()
+        if credentials is None or credentials.expires_within(0, datetime.now().timestamp()):
+            return False
         
         # Verify the session is still valid
         try:
-            user = supabase.auth.get_user()
+            response = supabase.auth.get_user(credentials.access_token)
+            user = response.user if response else None
             if not user:
                 return False
+            get_credential_store().put(user.id, credentials)
                 
             # Get user profile and permissions
-            profile = supabase.table('profiles').select("*").eq('id', user.id).single().execute()
+            profile = get_profile_cache().get(user.id, supabase)
             
-            if not profile.data:
+            if not profile:
                 st.error("User profile not found")
                 return False
                 
-            role = profile.data.get('role', 'User')
+            role = profile.get('role', 'User')
             permissions = get_user_permissions(role)
             
             # Update session state
@@ -224,7 +200,7 @@ def check_session():
                 'email': user.email,
                 'role': role,
                 'permissions': permissions,
-                'profile': profile.data
+                'profile': profile
             }
             return True
         except Exception as e:
@@ -239,10 +215,6 @@ def check_session():
 def login_page():
     """Render login page"""
     st.title("VIVITA Finance Login")
-    
-    if not check_rate_limit():
-        st.error("Too many login attempts. Please try again in 15 minutes.")
-        return
 
     # Add help text about email verification
     st.info("""
@@ -269,6 +241,10 @@ def login_page():
                     st.error("Please use your @vivita.ph email address")
                     return
                 
+                if not check_rate_limit(email):
+                    st.error("Too many login attempts. Please try again in 15 minutes.")
+                    return
+                
                 if handle_authentication(email, password, remember_me):
                     st.rerun()
 
@@ -328,6 +304,7 @@ def signup_page():
             
             try:
                 # Create auth user
+                supabase = get_supabase()
                 auth_response = supabase.auth.sign_up({
                     "email": email,
                     "password": password,
@@ -384,7 +361,9 @@ def signup_page():
 def logout():
     """Handle user logout"""
     try:
-        supabase.auth.sign_out()
+        if st.session_state.user:
+            get_credential_store().remove(st.session_state.user['id'])
+        get_supabase().auth.sign_out()
         st.session_state.clear()
         st.rerun()
     except Exception as e:
@@ -428,13 +407,16 @@ def main():
             st.write(f"Welcome {st.session_state.user['email']}")
             st.write(f"Role: {st.session_state.user['role']}")
             
-            # Dynamic menu based on user role
+            # Dynamic menu based on user role, re-read from the shared profile cache
+            # so role changes apply without signing out
+            permissions = get_permissions(st.session_state.user, get_supabase())
+            st.session_state.user['permissions'] = permissions
             menu_items = ["Dashboard"]
-            if st.session_state.user['permissions']['can_approve']:
+            if permissions['can_approve']:
                 menu_items.extend(["Purchase Requests", "Expenses"])
-            if st.session_state.user['permissions'].get('can_manage_pcf', False):
+            if permissions.get('can_manage_pcf', False):
                 menu_items.append("Petty Cash Fund")
-            if st.session_state.user['permissions']['can_view_reports']:
+            if permissions['can_view_reports']:
                 menu_items.extend(["Suppliers", "Settings"])
             
             page = st.radio("Select Page", menu_items, label_visibility="collapsed")
@@ -445,19 +427,24 @@ def main():
         # Page routing with permission checks
         try:
             if page == "Dashboard":
-                dashboard_render()
-            elif page == "Purchase Requests" and st.session_state.user['permissions']['can_approve']:
-                purchase_requests_render()
-            elif page == "Expenses" and st.session_state.user['permissions']['can_approve']:
-                expenses_render()
-            elif page == "Petty Cash Fund" and st.session_state.user['permissions'].get('can_manage_pcf', False):
+                render_view("Dashboard")
+            elif page == "Purchase Requests" and permissions['can_approve']:
+                render_view("Purchase Requests")
+            elif page == "Expenses" and permissions['can_approve']:
+                render_view("Expenses")
+            elif page == "Petty Cash Fund" and permissions.get('can_manage_pcf', False):
                 pcf.render()  # You'll need to import and implement this
-            elif page == "Suppliers" and st.session_state.user['permissions']['can_view_reports']:
-                suppliers_render()
-            elif page == "Settings" and st.session_state.user['permissions']['can_view_reports']:
-                settings_render()
+            elif page == "Suppliers" and permissions['can_view_reports']:
+                render_view("Suppliers")
+            elif page == "Settings" and permissions['can_view_reports']:
+                render_view("Settings")
             else:
                 st.error("You don't have permission to access this page")
+
+            render_debug_sidebar()
+            
+            # Write this rerun's audit entries without waiting for them
+            request_audit_flush()
         except Exception as e:
             st.error(f"Error loading page: {str(e)}")
             import traceback
@@ -5,11 +5,15 @@ from uuid import UUID
 
 from supabase import Client, create_client
 
-from src.config import config
+from src.config import get_config
 from src.models.expense import ExpenseReimbursementForm, ExpenseItem, Voucher, VoucherEntry
+from src.models.hydration import expense_items_from_rows
+from src.tracing import traced_methods
 
+@traced_methods
 class ExpenseManager:
     def __init__(self):
+        config = get_config()
         self.supabase: Client = create_client(
             config.SUPABASE_URL,
             config.SUPABASE_KEY
@@ -17,39 +21,9 @@ class ExpenseManager:
 
     def create_erf(self, erf: ExpenseReimbursementForm) -> Optional[ExpenseReimbursementForm]:
         try:
-            # Create the ERF
-            response = self.supabase.table('expense_reimbursement_forms').insert({
-                'employee_id': str(erf.employee_id),
-                'designation': erf.designation,
-                'date': erf.date.isoformat(),
-                'total_amount': str(erf.total_amount),
-                'status': erf.status
-            }).execute()
-
-            if response.data:
-                erf_data = response.data[0]
-                erf.id = UUID(erf_data['id'])
-                erf.form_number = erf_data['form_number']
-                
-                # Create expense items if any
-                if erf.items:
-                    items_data = [{
-                        'erf_id': str(erf.id),
-                        'date': item.date.isoformat(),
-                        'description': item.description,
-                        'payee': item.payee,
-                        'reference_number': item.reference_number,
-                        'amount': str(item.amount),
-                        'account': item.account
-                    } for item in erf.items]
-                    
-                    items_response = self.supabase.table('expense_items').insert(items_data).execute()
-                    if items_response.data:
-                        for i, item_data in enumerate(items_response.data):
-                            erf.items[i].id = UUID(item_data['id'])
-                            erf.items[i].erf_id = erf.id
-                
-                return erf
+            # Same single-transaction write path as the views
+            from src.crud.expense import ExpenseManager as ExpenseCRUD
+            return ExpenseCRUD(self.supabase).create_expense_form(erf)
         except Exception as e:
             print(f"Error creating ERF: {str(e)}")
             return None
@@ -65,21 +39,7 @@ class ExpenseManager:
                 # Get expense items
                 items_response = self.supabase.table('expense_items').select('*').eq('erf_id', str(erf_id)).execute()
                 
-                items = []
-                if items_response.data:
-                    for item_data in items_response.data:
-                        items.append(ExpenseItem(
-                            id=UUID(item_data['id']),
-                            erf_id=UUID(item_data['erf_id']),
-                            date=datetime.fromisoformat(item_data['date']),
-                            description=item_data['description'],
-                            payee=item_data['payee'],
-                            reference_number=item_data['reference_number'],
-                            amount=Decimal(item_data['amount']),
-                            account=item_data['account'],
-                            created_at=datetime.fromisoformat(item_data['created_at']),
-                            updated_at=datetime.fromisoformat(item_data['updated_at'])
-                        ))
+                items = expense_items_from_rows(items_response.data) if items_response.data else []
                 
                 return ExpenseReimbursementForm(
                     id=UUID(erf_data['id']),
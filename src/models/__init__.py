@@ -11,12 +11,13 @@ from .expense import (
 from .purchase_request import (
     PurchaseRequest,
     PurchaseRequestItem,
-    PurchaseRequestStatus,
-    validate_decimal
+    PurchaseRequestStatus
 )
 
+from .money import Money, validate_decimal
+
 from .supplier import Supplier
-from .audit import AuditEntry
+from .audit import AuditAction, AuditEntry
 
 __all__ = [
     'ExpenseReimbursementForm',
@@ -27,7 +28,9 @@ __all__ = [
     'PurchaseRequest',
     'PurchaseRequestItem',
     'PurchaseRequestStatus',
+    'Money',
     'validate_decimal',
     'Supplier',
+    'AuditAction',
     'AuditEntry'
 ]
@@ -1,8 +1,17 @@
 from dataclasses import dataclass, field
+from enum import Enum
 from typing import Optional
 from datetime import datetime
 from uuid import UUID
 
+class AuditAction(Enum):
+    """Actions allowed by purchase_request_audit_action_check"""
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    STATUS_CHANGED = 'status_changed'
+    COMMENT_ADDED = 'comment_added'
+
 @dataclass
 class AuditEntry:
     """Represents an audit trail entry for tracking changes"""
@@ -12,3 +21,5 @@ class AuditEntry:
     timestamp: datetime = field(default_factory=datetime.now)
     details: Optional[str] = None
     id: Optional[UUID] = None
+    user_name: Optional[str] = None
+    form_number: Optional[str] = None
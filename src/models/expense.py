@@ -1,18 +1,12 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 from enum import Enum
 import re
 
-def validate_decimal(value: Decimal) -> Decimal:
-    """Validate decimal to ensure it matches database precision (15,2)"""
-    if value is None:
-        return Decimal('0')
-    if not isinstance(value, Decimal):
-        value = Decimal(str(value))
-    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+from .money import ZERO, centavos_to_decimal, sum_money, to_money, validate_decimal
 
 class ExpenseFormStatus(Enum):
     DRAFT = 'draft'
@@ -20,7 +14,7 @@ class ExpenseFormStatus(Enum):
     APPROVED = 'approved'
     REJECTED = 'rejected'
 
-@dataclass
+@dataclass(slots=True)
 class ExpenseItem:
     date: datetime
     description: str
@@ -35,12 +29,12 @@ class ExpenseItem:
 
     def __post_init__(self):
         # Validate decimal fields
-        self.amount = validate_decimal(self.amount)
+        self.amount = validate_decimal(self.amount, ZERO)
 
     @property
     def total(self) -> Decimal:
         """Calculate total for this item"""
-        return validate_decimal(self.amount)
+        return self.amount
 
 @dataclass
 class ExpenseReimbursementForm:
@@ -63,10 +57,10 @@ class ExpenseReimbursementForm:
             self.status = ExpenseFormStatus(self.status)
         
         # Validate total_amount
-        self.total_amount = validate_decimal(self.total_amount)
+        self.total_amount = validate_decimal(self.total_amount, ZERO)
         
         # Calculate total_amount from items if available and no total provided
-        if self.items and self.total_amount == Decimal('0'):
+        if self.items and not self.total_amount:
             self.total_amount = self.calculate_total()
 
         # Validate form number format
@@ -75,20 +69,20 @@ class ExpenseReimbursementForm:
 
     def calculate_total(self) -> Decimal:
         """Calculate total amount from all items"""
-        return validate_decimal(sum(item.total for item in self.items))
+        return sum_money(item.amount for item in self.items)
 
     def add_item(self, item: ExpenseItem) -> None:
         """Add an item and update total"""
         self.items.append(item)
-        self.total_amount = self.calculate_total()
+        self.total_amount = centavos_to_decimal(to_money(self.total_amount) + to_money(item.amount))
 
     def remove_item(self, index: int) -> None:
         """Remove an item and update total"""
         if 0 <= index < len(self.items):
-            self.items.pop(index)
-            self.total_amount = self.calculate_total()
+            item = self.items.pop(index)
+            self.total_amount = centavos_to_decimal(to_money(self.total_amount) - to_money(item.amount))
 
-@dataclass
+@dataclass(slots=True)
 class VoucherEntry:
     account_title: str
     activity: Optional[str]
@@ -130,10 +124,10 @@ class Voucher:
 
     def __post_init__(self):
         # Validate decimal fields
-        self.total_amount = validate_decimal(self.total_amount)
+        self.total_amount = validate_decimal(self.total_amount, ZERO)
         
         # Calculate total from entries if available
         if self.entries:
-            debit_total = sum((e.debit_amount or Decimal('0')) for e in self.entries)
-            credit_total = sum((e.credit_amount or Decimal('0')) for e in self.entries)
-            self.total_amount = validate_decimal(max(debit_total, credit_total))
+            debit_total = sum_money(e.debit_amount for e in self.entries)
+            credit_total = sum_money(e.credit_amount for e in self.entries)
+            self.total_amount = max(debit_total, credit_total)
@@ -0,0 +1,223 @@
+"""Batched row-to-model converters for rows read back from the database.
+
+Rows coming from Supabase already satisfy the numeric(15,2) column types, the
+generated total_price and the header totals kept by the line item triggers,
+so these converters skip the per-field validation and total recomputation of
+the models' __post_init__. Headers can be converted without their lines and
+still carry the right total. Values that repeat across a batch (parent ids,
+prices, quantities, timestamps written by one insert) are parsed once per
+batch.
+"""
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from .purchase_request import PurchaseRequest, PurchaseRequestItem, PurchaseRequestStatus
+from .expense import ExpenseFormStatus, ExpenseItem, ExpenseReimbursementForm, Voucher, VoucherEntry
+from .money import CENTS
+
+class RowParser:
+    """Memoizing parser for the column types shared by a batch of rows"""
+
+    __slots__ = ('_decimals', '_uuids', '_datetimes')
+
+    def __init__(self):
+        self._decimals = {}
+        self._uuids = {}
+        self._datetimes = {}
+
+    def decimal(self, value) -> Optional[Decimal]:
+        if value is None:
+            return None
+        parsed = self._decimals.get(value)
+        if parsed is None:
+            # JSON numbers drop trailing zeros, so restore the column scale once per value
+            parsed = Decimal(str(value)).quantize(CENTS, rounding=ROUND_HALF_UP)
+            self._decimals[value] = parsed
+        return parsed
+
+    def uuid(self, value) -> Optional[UUID]:
+        if not value:
+            return None
+        parsed = self._uuids.get(value)
+        if parsed is None:
+            parsed = self._uuids[value] = UUID(value)
+        return parsed
+
+    def datetime(self, value) -> Optional[datetime]:
+        if not value:
+            return None
+        parsed = self._datetimes.get(value)
+        if parsed is None:
+            parsed = self._datetimes[value] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return parsed
+
+def purchase_request_items_from_rows(rows: Iterable[Dict], parser: Optional[RowParser] = None) -> List[PurchaseRequestItem]:
+    """Convert purchase_request_items rows into PurchaseRequestItem objects"""
+    parser = parser or RowParser()
+    decimal, uuid, parse_datetime = parser.decimal, parser.uuid, parser.datetime
+    new = PurchaseRequestItem.__new__
+
+    items = []
+    append = items.append
+    for row in rows:
+        get = row.get
+        item = new(PurchaseRequestItem)
+        item.item_description = get('item_description')
+        item.quantity = decimal(get('quantity'))
+        item.unit = get('unit')
+        item.unit_price = decimal(get('unit_price'))
+        item.total_price = decimal(get('total_price'))
+        item.purchase_request_id = uuid(get('purchase_request_id'))
+        item.account_code = get('account_code')
+        item.remarks = get('remarks')
+        item.id = UUID(row['id']) if get('id') else None
+        item.created_at = parse_datetime(get('created_at'))
+        item.updated_at = parse_datetime(get('updated_at'))
+        append(item)
+    return items
+
+def purchase_requests_from_rows(rows: Iterable[Dict], items_by_id: Optional[Dict[str, List[PurchaseRequestItem]]] = None,
+                                parser: Optional[RowParser] = None) -> List[PurchaseRequest]:
+    """Convert purchase_requests rows into PurchaseRequest objects.
+
+    ``items_by_id`` maps a row's id to its already converted items.
+    """
+    parser = parser or RowParser()
+    decimal, uuid, parse_datetime = parser.decimal, parser.uuid, parser.datetime
+    items_by_id = items_by_id or {}
+    new = PurchaseRequest.__new__
+
+    requests = []
+    append = requests.append
+    for row in rows:
+        get = row.get
+        pr = new(PurchaseRequest)
+        pr.requestor_id = uuid(get('requestor_id'))
+        pr.supplier_id = uuid(get('supplier_id'))
+        pr.form_number = get('form_number')
+        pr.status = PurchaseRequestStatus(get('status') or 'draft')
+        pr.total_amount = decimal(get('total_amount'))
+        pr.remarks = get('remarks')
+        pr.items = items_by_id.get(get('id'), [])
+        pr.id = UUID(row['id']) if get('id') else None
+        pr.created_at = parse_datetime(get('created_at'))
+        pr.updated_at = parse_datetime(get('updated_at'))
+        append(pr)
+    return requests
+
+def expense_items_from_rows(rows: Iterable[Dict], parser: Optional[RowParser] = None) -> List[ExpenseItem]:
+    """Convert expense_items rows into ExpenseItem objects"""
+    parser = parser or RowParser()
+    decimal, uuid, parse_datetime = parser.decimal, parser.uuid, parser.datetime
+    new = ExpenseItem.__new__
+
+    items = []
+    append = items.append
+    for row in rows:
+        get = row.get
+        item = new(ExpenseItem)
+        item.date = parse_datetime(get('date'))
+        item.description = get('description')
+        item.payee = get('payee')
+        item.amount = decimal(get('amount')) or Decimal('0.00')
+        item.account = get('account')
+        item.reference_number = get('reference_number')
+        item.id = UUID(row['id']) if get('id') else None
+        item.erf_id = uuid(get('erf_id'))
+        item.created_at = parse_datetime(get('created_at'))
+        item.updated_at = parse_datetime(get('updated_at'))
+        append(item)
+    return items
+
+def expense_forms_from_rows(rows: Iterable[Dict], parser: Optional[RowParser] = None) -> List[ExpenseReimbursementForm]:
+    """Convert expense_reimbursement_forms rows into ExpenseReimbursementForm objects.
+
+    Items embedded in a row, either as ``items`` (create_expense_form) or
+    ``expense_items`` (a PostgREST embed), are converted with the same parser.
+    """
+    parser = parser or RowParser()
+    decimal, uuid, parse_datetime = parser.decimal, parser.uuid, parser.datetime
+    new = ExpenseReimbursementForm.__new__
+
+    forms = []
+    append = forms.append
+    for row in rows:
+        get = row.get
+        form = new(ExpenseReimbursementForm)
+        form.employee_id = uuid(get('employee_id'))
+        form.designation = get('designation')
+        form.date = parse_datetime(get('date'))
+        form.form_number = get('form_number')
+        form.total_amount = decimal(get('total_amount')) or Decimal('0.00')
+        form.status = ExpenseFormStatus(get('status') or 'draft')
+        form.approved_by = uuid(get('approved_by'))
+        form.approved_at = parse_datetime(get('approved_at'))
+        item_rows = get('items', get('expense_items'))
+        form.items = expense_items_from_rows(item_rows, parser) if item_rows else []
+        form.id = UUID(row['id']) if get('id') else None
+        form.created_at = parse_datetime(get('created_at'))
+        form.updated_at = parse_datetime(get('updated_at'))
+        append(form)
+    return forms
+
+def voucher_entries_from_rows(rows: Iterable[Dict], parser: Optional[RowParser] = None) -> List[VoucherEntry]:
+    """Convert voucher_entries rows into VoucherEntry objects"""
+    parser = parser or RowParser()
+    decimal, uuid, parse_datetime = parser.decimal, parser.uuid, parser.datetime
+    new = VoucherEntry.__new__
+
+    entries = []
+    append = entries.append
+    for row in rows:
+        get = row.get
+        entry = new(VoucherEntry)
+        entry.account_title = get('account_title')
+        entry.activity = get('activity')
+        entry.debit_amount = decimal(get('debit_amount'))
+        entry.credit_amount = decimal(get('credit_amount'))
+        entry.id = UUID(row['id']) if get('id') else None
+        entry.voucher_id = uuid(get('voucher_id'))
+        entry.created_at = parse_datetime(get('created_at'))
+        entry.updated_at = parse_datetime(get('updated_at'))
+        append(entry)
+    return entries
+
+def vouchers_from_rows(rows: Iterable[Dict], entries_by_id: Optional[Dict[str, List[VoucherEntry]]] = None,
+                       parser: Optional[RowParser] = None) -> List[Voucher]:
+    """Convert vouchers rows into Voucher objects.
+
+    ``entries_by_id`` maps a row's id to its already converted entries.
+    """
+    parser = parser or RowParser()
+    decimal, uuid, parse_datetime = parser.decimal, parser.uuid, parser.datetime
+    entries_by_id = entries_by_id or {}
+    new = Voucher.__new__
+
+    vouchers = []
+    append = vouchers.append
+    for row in rows:
+        get = row.get
+        voucher = new(Voucher)
+        voucher.date = parse_datetime(get('date'))
+        voucher.payee = get('payee')
+        voucher.total_amount = decimal(get('total_amount')) or Decimal('0.00')
+        voucher.particulars = get('particulars')
+        voucher.prepared_by = uuid(get('prepared_by'))
+        voucher.bank_name = get('bank_name')
+        voucher.transaction_type = get('transaction_type')
+        voucher.reference_number = get('reference_number')
+        voucher.payee_bank_account = get('payee_bank_account')
+        voucher.form_type = get('form_type')
+        voucher.form_number = get('form_number')
+        voucher.form_date = parse_datetime(get('form_date'))
+        voucher.requested_by = get('requested_by')
+        voucher.status = get('status') or 'draft'
+        voucher.voucher_number = get('voucher_number')
+        voucher.entries = entries_by_id.get(get('id'), [])
+        voucher.id = UUID(row['id']) if get('id') else None
+        voucher.created_at = parse_datetime(get('created_at'))
+        voucher.updated_at = parse_datetime(get('updated_at'))
+        append(voucher)
+    return vouchers
@@ -0,0 +1,226 @@
+"""Line items entered through the form grids, validated and totalled in one pass.
+
+Grid rows arrive as dicts of raw cell values, which are strings when a block
+is pasted from a spreadsheet. Each grid is parsed in a single pass over its
+rows; amounts are summed as integer centavos so totals are exact and the
+Decimal for each line is only built once.
+"""
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional
+
+from .expense import ExpenseItem, VoucherEntry
+from .money import Money, centavos_to_decimal, to_money
+from .purchase_request import PurchaseRequestItem
+
+# Currency signs, thousands separators and spaces pasted along with amounts
+_AMOUNT_NOISE = re.compile(r'[₱$,\s]|PHP', re.IGNORECASE)
+
+EXPENSE_COLUMNS = ('date', 'description', 'payee', 'reference_number', 'amount', 'account')
+VOUCHER_COLUMNS = ('account_title', 'activity', 'debit', 'credit')
+PURCHASE_REQUEST_COLUMNS = ('item_description', 'quantity', 'unit', 'unit_price', 'account_code')
+
+@dataclass
+class ParsedLines:
+    """Result of parsing a grid: valid lines, per-row errors and column totals"""
+    items: List[Any] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    totals: Dict[str, Money] = field(default_factory=dict)
+
+    def total(self, column: str) -> Decimal:
+        """Get a column total in pesos"""
+        return centavos_to_decimal(self.totals.get(column, 0))
+
+def records(data) -> List[Dict]:
+    """Get grid rows as dicts from a DataFrame, a dict of columns or a list of rows"""
+    if data is None:
+        return []
+    if hasattr(data, 'to_dict'):
+        return data.to_dict('records')
+    if isinstance(data, dict):
+        columns = list(data)
+        return [dict(zip(columns, values)) for values in zip(*data.values())]
+    return list(data)
+
+def _blank(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        # Empty numeric cells come back as NaN
+        return True
+    return isinstance(value, str) and not value.strip()
+
+def _text(value) -> Optional[str]:
+    return None if _blank(value) else str(value).strip()
+
+def to_centavos(value) -> Optional[Money]:
+    """Parse an amount cell into integer centavos, or None if it is empty.
+
+    Raises:
+        ValueError: If the cell isn't a number
+    """
+    if _blank(value):
+        return None
+    try:
+        amount = Decimal(_AMOUNT_NOISE.sub('', str(value)))
+    except InvalidOperation:
+        raise ValueError(f"'{value}' is not an amount")
+    if not amount.is_finite():
+        raise ValueError(f"'{value}' is not an amount")
+    return to_money(amount)
+
+def to_date(value, default: Optional[date] = None) -> Optional[date]:
+    """Parse a date cell, falling back to ``default`` when it is empty.
+
+    Raises:
+        ValueError: If the cell isn't a date
+    """
+    if _blank(value):
+        return default
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if hasattr(value, 'to_pydatetime'):
+        return value.to_pydatetime().date()
+    text = str(value).strip()
+    for parse in (datetime.fromisoformat, lambda s: datetime.strptime(s, '%m/%d/%Y')):
+        try:
+            return parse(text).date()
+        except ValueError:
+            continue
+    raise ValueError(f"'{value}' is not a date")
+
+def parse_expense_rows(rows: Iterable[Dict], default_date: Optional[date] = None,
+                       default_account: str = 'OPEX') -> ParsedLines:
+    """Validate ERF grid rows into ExpenseItems and total their amounts.
+
+    Completely empty rows are skipped, since dynamic grids keep one open.
+    """
+    parsed = ParsedLines(totals={'amount': 0})
+    for number, row in enumerate(rows, start=1):
+        if all(_blank(row.get(column)) for column in EXPENSE_COLUMNS if column != 'account'):
+            continue
+        try:
+            amount = to_centavos(row.get('amount'))
+            item_date = to_date(row.get('date'), default_date)
+        except ValueError as e:
+            parsed.errors.append(f"Line {number}: {str(e)}")
+            continue
+
+        description, payee = _text(row.get('description')), _text(row.get('payee'))
+        missing = [name for name, value in (('description', description), ('payee', payee), ('date', item_date)) if not value]
+        if missing:
+            parsed.errors.append(f"Line {number}: {', '.join(missing)} required")
+            continue
+        if not amount or amount <= 0:
+            parsed.errors.append(f"Line {number}: amount must be greater than zero")
+            continue
+
+        parsed.totals['amount'] += amount
+        parsed.items.append(ExpenseItem(
+            date=datetime.combine(item_date, datetime.min.time()),
+            description=description,
+            payee=payee,
+            amount=centavos_to_decimal(amount),
+            account=_text(row.get('account')) or default_account,
+            reference_number=_text(row.get('reference_number'))
+        ))
+    return parsed
+
+def parse_voucher_rows(rows: Iterable[Dict]) -> ParsedLines:
+    """Validate voucher grid rows into VoucherEntries and total debits and credits"""
+    parsed = ParsedLines(totals={'debit': 0, 'credit': 0})
+    for number, row in enumerate(rows, start=1):
+        if all(_blank(row.get(column)) for column in VOUCHER_COLUMNS):
+            continue
+        try:
+            debit = to_centavos(row.get('debit')) or 0
+            credit = to_centavos(row.get('credit')) or 0
+        except ValueError as e:
+            parsed.errors.append(f"Line {number}: {str(e)}")
+            continue
+
+        account_title = _text(row.get('account_title'))
+        if not account_title:
+            parsed.errors.append(f"Line {number}: account title required")
+            continue
+        if debit < 0 or credit < 0:
+            parsed.errors.append(f"Line {number}: amounts can't be negative")
+            continue
+        if bool(debit) == bool(credit):
+            parsed.errors.append(f"Line {number}: enter either a debit or a credit")
+            continue
+
+        parsed.totals['debit'] += debit
+        parsed.totals['credit'] += credit
+        parsed.items.append(VoucherEntry(
+            account_title=account_title,
+            activity=_text(row.get('activity')),
+            debit_amount=centavos_to_decimal(debit) if debit else None,
+            credit_amount=centavos_to_decimal(credit) if credit else None
+        ))
+    return parsed
+
+def _purchase_request_line(row: Dict):
+    """Parse one PRF grid row into (item, total centavos) or an error message"""
+    try:
+        # Quantities have two decimal places like prices, so both fit in integer hundredths
+        quantity = to_centavos(row.get('quantity'))
+        unit_price = to_centavos(row.get('unit_price'))
+    except ValueError as e:
+        return str(e)
+
+    description, unit = _text(row.get('item_description')), _text(row.get('unit'))
+    missing = [name for name, value in (('description', description), ('unit', unit)) if not value]
+    if missing:
+        return f"{', '.join(missing)} required"
+    if not quantity or quantity <= 0:
+        return "quantity must be greater than zero"
+    if not unit_price or unit_price <= 0:
+        return "unit price must be greater than zero"
+
+    # quantity x unit price rounded half up to centavos, as PurchaseRequestItem does
+    total = (quantity * unit_price + 50) // 100
+    item = PurchaseRequestItem(
+        item_description=description,
+        quantity=centavos_to_decimal(quantity),
+        unit=unit,
+        unit_price=centavos_to_decimal(unit_price),
+        total_price=centavos_to_decimal(total),
+        purchase_request_id=None,
+        account_code=_text(row.get('account_code'))
+    )
+    return item, total
+
+def parse_purchase_request_rows(rows: Iterable[Dict], cache: Optional[Dict] = None) -> ParsedLines:
+    """Validate PRF grid rows into PurchaseRequestItems and total them.
+
+    Pass the same ``cache`` dict on every rerun to only parse rows that
+    changed since the last one; rows no longer in the grid are dropped from it.
+    """
+    parsed = ParsedLines(totals={'total_price': 0})
+    seen = {}
+    for number, row in enumerate(rows, start=1):
+        if all(_blank(row.get(column)) for column in PURCHASE_REQUEST_COLUMNS):
+            continue
+        key = tuple(None if _blank(row.get(column)) else str(row.get(column)) for column in PURCHASE_REQUEST_COLUMNS)
+        line = cache.get(key) if cache is not None else None
+        if line is None:
+            line = _purchase_request_line(row)
+        seen[key] = line
+
+        if isinstance(line, str):
+            parsed.errors.append(f"Line {number}: {line}")
+            continue
+        item, total = line
+        parsed.totals['total_price'] += total
+        parsed.items.append(item)
+
+    if cache is not None:
+        cache.clear()
+        cache.update(seen)
+    return parsed
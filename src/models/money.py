@@ -0,0 +1,40 @@
+"""Peso amounts: two-place Decimals on the models, integer centavos for totals.
+
+Every amount column is numeric(15,2). Models hold amounts as Decimals rounded
+to that scale once, on construction. Totals, on the models and over parsed
+grid lines alike, are added up as integer centavos (Money), so they are
+exact and are never rounded again.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, NewType, Optional
+
+# An exact amount in integer centavos
+Money = NewType('Money', int)
+
+CENTS = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+def validate_decimal(value, default: Optional[Decimal] = None) -> Optional[Decimal]:
+    """Round a value to the database precision (15,2), or ``default`` if it is None"""
+    if value is None:
+        return default
+    if value.__class__ is not Decimal:
+        # Through str so floats keep the digits they print as
+        value = Decimal(str(value))
+    return value.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+def to_money(value) -> Money:
+    """Convert an amount in pesos to centavos, rounding half up; None is zero"""
+    if value is None:
+        return Money(0)
+    if value.__class__ is not Decimal:
+        value = Decimal(str(value))
+    return Money(int(value.scaleb(2).to_integral_value(rounding=ROUND_HALF_UP)))
+
+def centavos_to_decimal(centavos: int) -> Decimal:
+    """Convert integer centavos to a two-place Decimal"""
+    return Decimal(centavos).scaleb(-2)
+
+def sum_money(amounts: Iterable) -> Decimal:
+    """Total amounts in centavos and return the total in pesos; None adds nothing"""
+    return centavos_to_decimal(sum(map(to_money, amounts)))
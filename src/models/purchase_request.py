@@ -1,25 +1,19 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 from datetime import datetime
 from uuid import UUID
 from enum import Enum
 
+from .money import sum_money, validate_decimal
+
 class PurchaseRequestStatus(Enum):
     DRAFT = 'draft'
     PENDING = 'pending'
     APPROVED = 'approved'
     REJECTED = 'rejected'
 
-def validate_decimal(value: Decimal) -> Decimal:
-    """Validate decimal to ensure it matches database precision (15,2)"""
-    if value is None:
-        return None
-    if not isinstance(value, Decimal):
-        value = Decimal(str(value))
-    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-
-@dataclass
+@dataclass(slots=True)
 class PurchaseRequestItem:
     item_description: str
     quantity: Decimal
@@ -34,15 +28,10 @@ class PurchaseRequestItem:
     updated_at: Optional[datetime] = None
 
     def __post_init__(self):
-        # Validate decimal fields
+        # Validate decimal fields; total_price always follows quantity and unit price
         self.quantity = validate_decimal(self.quantity)
         self.unit_price = validate_decimal(self.unit_price)
-        self.total_price = validate_decimal(self.total_price)
-        
-        # Validate total_price calculation
-        calculated_total = validate_decimal(self.quantity * self.unit_price)
-        if self.total_price != calculated_total:
-            self.total_price = calculated_total
+        self.total_price = validate_decimal(self.quantity * self.unit_price)
 
 @dataclass
 class PurchaseRequest:
@@ -68,5 +57,4 @@ class PurchaseRequest:
         
         # Calculate total_amount from items if available
         if self.items:
-            calculated_total = sum(item.total_price for item in self.items)
-            self.total_amount = validate_decimal(calculated_total)
+            self.total_amount = sum_money(item.total_price for item in self.items)
@@ -0,0 +1,223 @@
+"""Profile and permission lookups cached across reruns and sessions"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from src.cache import CacheBackend, MemoryBackend
+from src.profiling import record_cache_hit
+
+# Seconds a cached profile is trusted before it is fetched again
+PROFILE_TTL = 300
+
+# Tables every signed-in user reads in full, and tables Finance and Admin
+# read in full, going by their select policies. Users only read their own
+# profile; other users' names come from the profile_names view. Audit
+# entries are public, but the feed embeds purchase_requests.
+PUBLIC_READ_TABLES = {'suppliers', 'profile_names'}
+ROLE_READ_TABLES = {'purchase_requests', 'purchase_request_items', 'purchase_request_audit'}
+
+# Full rows, since the session keeps the signed-in user's profile for the settings page
+PROFILE_COLUMNS = '*'
+
+def get_user_permissions(role: Optional[str]) -> Dict[str, bool]:
+    """Get user permissions based on role"""
+    permissions = {
+        'can_view_reports': False,
+        'can_approve': False,
+        'can_manage_users': False
+    }
+
+    if role == 'Admin':
+        permissions.update({
+            'can_view_reports': True,
+            'can_approve': True,
+            'can_manage_users': True,
+            'can_manage_pcf': True
+        })
+    elif role == 'Finance':
+        permissions.update({
+            'can_view_reports': True,
+            'can_approve': True,
+            'can_manage_users': False
+        })
+    elif role == 'PCF_Custodian':
+        permissions.update({
+            'can_manage_pcf': True
+        })
+
+    return permissions
+
+class ProfileCache:
+    """Cache of profile rows keyed by user id, kept in a shared cache backend.
+
+    Entries expire after ``ttl`` seconds. When a Realtime change feed is
+    given, any change to the profiles table drops the whole cache so role
+    changes apply on the next lookup rather than after the TTL.
+
+    Full profiles are only readable by their own user, so other users'
+    display names are cached separately from the profile_names view.
+    """
+
+    KEY_PREFIX = 'profile:'
+    NAME_PREFIX = 'profile:name:'
+
+    def __init__(self, ttl: float = PROFILE_TTL, feed=None, clock: Callable[[], float] = time.monotonic,
+                 backend: Optional[CacheBackend] = None):
+        self.ttl = ttl
+        self.feed = feed
+        self.backend = backend or MemoryBackend(clock=clock)
+        self._feed_version = feed.version('profiles') if feed else None
+
+    def put(self, profile: Dict) -> None:
+        """Store a freshly loaded profile row"""
+        self.backend.set(self.KEY_PREFIX + str(profile['id']), profile, self.ttl)
+
+    def invalidate(self, user_id=None) -> None:
+        """Drop one user's profile, or every profile when no id is given"""
+        if user_id is None:
+            self.backend.delete_prefix(self.KEY_PREFIX)
+        else:
+            self.backend.delete(self.KEY_PREFIX + str(user_id))
+            self.backend.delete(self.NAME_PREFIX + str(user_id))
+
+    def cached(self, user_id) -> Optional[Dict]:
+        """Get a profile if it is cached and still fresh, without querying"""
+        self._check_feed()
+        return self.backend.get(self.KEY_PREFIX + str(user_id))
+
+    def get(self, user_id, supabase=None) -> Optional[Dict]:
+        """Get a user's profile, loading it on a miss"""
+        if not user_id:
+            return None
+        return self.get_many([user_id], supabase).get(str(user_id))
+
+    def get_many(self, user_ids: Iterable, supabase=None) -> Dict[str, Dict]:
+        """Get several profiles, loading every miss in a single query.
+
+        Returns:
+            Dict[str, Dict]: Profiles by user id; ids without a profile are left out
+        """
+        ids = {str(user_id) for user_id in user_ids if user_id}
+        self._check_feed()
+        prefix = len(self.KEY_PREFIX)
+        found = {
+            key[prefix:]: profile
+            for key, profile in self.backend.get_many(self.KEY_PREFIX + user_id for user_id in ids).items()
+        }
+
+        missing = ids - found.keys()
+        if missing:
+            try:
+                if supabase is None:
+                    from src.database import get_supabase_client
+                    supabase = get_supabase_client()
+                result = supabase.table('profiles')\
+                    .select(PROFILE_COLUMNS)\
+                    .in_('id', sorted(missing))\
+                    .execute()
+                for profile in result.data or []:
+                    self.put(profile)
+                    found[str(profile['id'])] = profile
+            except Exception as e:
+                print(f"Error loading profiles: {str(e)}")
+        else:
+            record_cache_hit('profiles')
+
+        return found
+
+    def name(self, user_id, supabase=None) -> Optional[str]:
+        """Get a user's display name, loading it on a miss"""
+        if not user_id:
+            return None
+        return self.names([user_id], supabase).get(str(user_id))
+
+    def names(self, user_ids: Iterable, supabase=None) -> Dict[str, Optional[str]]:
+        """Get several display names from profile_names, loading every miss in a single query.
+
+        Returns:
+            Dict[str, Optional[str]]: Names by user id; None for a user without a name
+        """
+        ids = {str(user_id) for user_id in user_ids if user_id}
+        self._check_feed()
+        prefix = len(self.NAME_PREFIX)
+        found = {
+            key[prefix:]: name
+            for key, name in self.backend.get_many(self.NAME_PREFIX + user_id for user_id in ids).items()
+        }
+
+        missing = ids - found.keys()
+        if missing:
+            try:
+                if supabase is None:
+                    from src.database import get_supabase_client
+                    supabase = get_supabase_client()
+                result = supabase.table('profile_names')\
+                    .select('id, full_name')\
+                    .in_('id', sorted(missing))\
+                    .execute()
+                loaded = {str(row['id']): row.get('full_name') or '' for row in result.data or []}
+                # Users without a profile are cached as '' too, so they aren't queried again
+                for user_id in missing:
+                    found[user_id] = loaded.get(user_id, '')
+                    self.backend.set(self.NAME_PREFIX + user_id, found[user_id], self.ttl)
+            except Exception as e:
+                print(f"Error loading profile names: {str(e)}")
+        else:
+            record_cache_hit('profile_names')
+
+        return {user_id: name or None for user_id, name in found.items()}
+
+    def _check_feed(self) -> None:
+        if self.feed is None:
+            return
+        version = self.feed.version('profiles')
+        if version != self._feed_version:
+            self._feed_version = version
+            self.invalidate()
+
+_cache: Optional[ProfileCache] = None
+_cache_lock = threading.Lock()
+
+def get_profile_cache() -> ProfileCache:
+    """Get the profile cache shared by all sessions, and by all workers using SHARED_CACHE"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from src.cache import get_shared_cache
+            from src.realtime import get_change_feed
+            _cache = ProfileCache(feed=get_change_feed(), backend=get_shared_cache())
+        return _cache
+
+def get_role(user: Dict, supabase=None) -> Optional[str]:
+    """Get a session user's current role, preferring the cached profile"""
+    profile = get_profile_cache().get(user.get('id'), supabase)
+    if profile is not None:
+        return profile.get('role')
+    return user.get('role')
+
+def get_permissions(user: Optional[Dict], supabase=None) -> Dict[str, bool]:
+    """Get a session user's current permissions"""
+    if not user:
+        return get_user_permissions(None)
+    return get_user_permissions(get_role(user, supabase))
+
+def query_scope(user: Optional[Dict], table: str) -> Optional[str]:
+    """Name the rows of a table a user can read, so identical reads in one scope can be shared.
+
+    Only a fresh cached profile is trusted for the role, and this never
+    queries. Anything not known to be shared is scoped to the user.
+    """
+    if not user or not user.get('id'):
+        return None
+    if table in PUBLIC_READ_TABLES:
+        return 'public'
+    profile = get_profile_cache().cached(user['id'])
+    role = profile.get('role') if profile else None
+    if table in ROLE_READ_TABLES and role in ('Finance', 'Admin'):
+        return f"role:{role}"
+    return f"user:{user['id']}"
+
+def session_query_scope(table: str) -> Optional[str]:
+    """query_scope of the running Streamlit session's user"""
+    import streamlit as st
+    return query_scope(st.session_state.get('user'), table)
@@ -0,0 +1,349 @@
+"""Per-rerun profiling of page renders and Supabase queries"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.tracing import span
+
+logger = logging.getLogger('vivita.profiling')
+
+# One JSON object per render is logged at INFO; set PROFILE_LOG to also
+# write them to a file
+if os.environ.get('PROFILE_LOG'):
+    _handler = logging.FileHandler(os.environ['PROFILE_LOG'])
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+# Maximum Supabase round trips per page render. Pages not listed use
+# DEFAULT_QUERY_BUDGET. Override per page with a [query_budgets] table in
+# .streamlit/secrets.toml.
+QUERY_BUDGETS: Dict[str, int] = {
+    'dashboard': 8,
+    'purchase_requests': 6,
+    'expenses': 6,
+    'suppliers': 2,
+    'settings': 1,
+}
+DEFAULT_QUERY_BUDGET = 10
+
+# Number of recent render profiles kept in session state for the debug sidebar
+PROFILE_HISTORY = 20
+
+_OPERATIONS = ('select', 'insert', 'update', 'upsert', 'delete')
+_FILTERS = ('eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'is_', 'in_', 'or_', 'contains')
+
+@dataclass
+class QueryRecord:
+    table: str
+    operation: str
+    duration_ms: float
+    payload_bytes: int
+    error: Optional[str] = None
+
+@dataclass
+class RenderProfile:
+    page: str
+    started_at: float
+    duration_ms: float = 0.0
+    queries: List[QueryRecord] = field(default_factory=list)
+    cache_hits: Dict[str, int] = field(default_factory=dict)
+    sections: Dict[str, float] = field(default_factory=dict)
+    budget: Optional[int] = None
+
+    @property
+    def query_count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def payload_bytes(self) -> int:
+        return sum(q.payload_bytes for q in self.queries)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.query_count > self.budget
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data.update(
+            query_count=self.query_count,
+            payload_bytes=self.payload_bytes,
+            over_budget=self.over_budget
+        )
+        return data
+
+_local = threading.local()
+
+def current_profile() -> Optional[RenderProfile]:
+    """Get the profile of the render running on this thread, if any"""
+    return getattr(_local, 'profile', None)
+
+def record_query(table: str, operation: str, duration_ms: float, payload_bytes: int, error: Optional[str] = None) -> None:
+    """Add a query to the active render profile"""
+    profile = current_profile()
+    if profile is not None:
+        profile.queries.append(QueryRecord(table, operation, round(duration_ms, 2), payload_bytes, error))
+
+@contextmanager
+def read_epoch(epoch: Hashable):
+    """Only let reads made in the block share a flight with reads made in the same epoch.
+
+    For callers that keep what they read, e.g. the query cache passing its
+    generation, so a shared result was never read before the epoch began.
+    """
+    previous = getattr(_local, 'read_epoch', None)
+    _local.read_epoch = epoch
+    try:
+        yield
+    finally:
+        _local.read_epoch = previous
+
+def query_error_count() -> int:
+    """Count the queries on this thread that have raised, so callers can tell a failed read from an empty one"""
+    return getattr(_local, 'query_errors', 0)
+
+def record_cache_hit(name: str) -> None:
+    """Count a cache hit that saved a query in the active render profile"""
+    profile = current_profile()
+    if profile is not None:
+        profile.cache_hits[name] = profile.cache_hits.get(name, 0) + 1
+
+def _payload_size(data) -> int:
+    try:
+        return len(json.dumps(data, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+class _InstrumentedQuery:
+    """Proxy around a postgrest request builder that times ``execute()``"""
+
+    def __init__(self, builder, table: str, operation: str = 'select', filters: Tuple[str, ...] = (),
+                 client: Optional['InstrumentedClient'] = None, calls: Tuple[str, ...] = ()):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._filters = filters
+        self._client = client
+        # Every builder call with its arguments, which identifies the request
+        self._calls = calls
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        operation = name if name in _OPERATIONS else self._operation
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not hasattr(result, 'execute'):
+                return result
+            filters = self._filters
+            if name in _FILTERS:
+                # Only columns and operators are kept; values may be personal data
+                filters += ('or' if name == 'or_' or not args else f"{args[0]}.{name.rstrip('_')}",)
+            calls = self._calls + (repr((name, args, sorted(kwargs.items()))),)
+            return _InstrumentedQuery(result, self._table, operation, filters, self._client, calls)
+        return call
+
+    def execute(self):
+        scope = self._client.query_scope(self._table) if self._client is not None and self._operation == 'select' else None
+        try:
+            if self._operation != 'select' and self._client is not None:
+                return self._write()
+            if scope is None:
+                return self._execute()
+            # Identical reads by sessions that see the same rows share one round trip
+            return self._client.flights.do(
+                (scope, self._table, self._calls, getattr(_local, 'read_epoch', None)),
+                self._execute,
+                lambda: record_cache_hit('coalesced')
+            )
+        except Exception:
+            _local.query_errors = query_error_count() + 1
+            raise
+
+    def _write(self):
+        try:
+            return self._execute()
+        finally:
+            # Reads from here on mustn't join one that may have started before
+            # the write; a function may write any table
+            table = None if self._operation == 'rpc' else self._table
+            self._client.flights.forget(lambda key: table is None or key[1] == table)
+
+    def _execute(self):
+        with span(
+            'supabase.execute',
+            **{'db.table': self._table, 'db.operation': self._operation, 'db.filters': ','.join(self._filters)}
+        ) as current:
+            start = time.perf_counter()
+            try:
+                response = self._builder.execute()
+            except Exception as e:
+                record_query(self._table, self._operation, (time.perf_counter() - start) * 1000, 0, str(e))
+                raise
+            duration_ms = (time.perf_counter() - start) * 1000
+            data = getattr(response, 'data', None)
+            # Sizing re-serialises the whole response, so only when profiles are looked at
+            payload_bytes = _payload_size(data) if payload_sizes_enabled() else 0
+            record_query(self._table, self._operation, duration_ms, payload_bytes)
+            if current is not None:
+                current.set_attribute('db.rows', len(data) if isinstance(data, list) else int(data is not None))
+                current.set_attribute('db.payload_bytes', payload_bytes)
+            return response
+
+class InstrumentedClient:
+    """Supabase client wrapper recording every query into the active render profile.
+
+    Everything except ``table``, ``from_`` and ``rpc`` is passed through, so
+    ``client.auth`` and friends behave as before. Given a ``scope`` function
+    naming the rows of a table the signed-in user can see (see
+    profiles.query_scope), selects identical to one already in flight for the
+    same scope, from any session, wait for its response instead of making
+    their own request. Once a write through any wrapped client returns, new
+    reads of the table it wrote no longer join reads already in flight.
+    """
+
+    def __init__(self, client, scope: Optional[Callable[[str], Optional[str]]] = None, flights=None):
+        self._client = client
+        self._scope = scope
+        self._flights = flights
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    @property
+    def flights(self):
+        if self._flights is None:
+            from src.singleflight import get_single_flight
+            self._flights = get_single_flight()
+        return self._flights
+
+    def query_scope(self, table: str) -> Optional[str]:
+        """Scope reads of a table are shared within, or None to not share them"""
+        return self._scope(table) if self._scope is not None else None
+
+    def table(self, name: str):
+        return _InstrumentedQuery(self._client.table(name), name, client=self)
+
+    def from_(self, name: str):
+        return _InstrumentedQuery(self._client.from_(name), name, client=self)
+
+    def rpc(self, name: str, params: Optional[Dict] = None):
+        return _InstrumentedQuery(self._client.rpc(name, params or {}), f"rpc:{name}", 'rpc', client=self)
+
+def instrument_client(client, scope: Optional[Callable[[str], Optional[str]]] = None):
+    """Wrap a Supabase client for profiling unless it is already wrapped"""
+    if client is None or isinstance(client, InstrumentedClient):
+        return client
+    return InstrumentedClient(client, scope)
+
+def get_query_budget(page: str) -> int:
+    """Get the query budget of a page, preferring overrides from secrets"""
+    try:
+        import streamlit as st
+        overrides = st.secrets.get('query_budgets', {})
+        if page in overrides:
+            return int(overrides[page])
+    except Exception:
+        pass
+    return QUERY_BUDGETS.get(page, DEFAULT_QUERY_BUDGET)
+
+def profiling_enabled() -> bool:
+    """Check if the debug sidebar is switched on via PROFILE_DEBUG"""
+    if os.environ.get('PROFILE_DEBUG', '').lower() in ('1', 'true', 'yes'):
+        return True
+    try:
+        import streamlit as st
+        return bool(st.secrets.get('PROFILE_DEBUG', False))
+    except Exception:
+        return False
+
+def payload_sizes_enabled() -> bool:
+    """Check if query payload sizes are measured: only with PROFILE_LOG or the debug sidebar on"""
+    return bool(os.environ.get('PROFILE_LOG')) or profiling_enabled()
+
+def _finish(profile: RenderProfile) -> None:
+    profile.budget = get_query_budget(profile.page)
+    data = profile.to_dict()
+    logger.info(json.dumps({'event': 'render', **data}, default=str))
+    if profile.over_budget:
+        logger.warning(
+            f"Page '{profile.page}' made {profile.query_count} queries, over its budget of {profile.budget}"
+        )
+
+    try:
+        import streamlit as st
+        history = st.session_state.setdefault('render_profiles', [])
+        history.append(profile)
+        del history[:-PROFILE_HISTORY]
+    except Exception:
+        # Profiling must never break a page
+        pass
+
+def profile_render(page: str):
+    """Decorator recording queries, payload bytes, cache hits and time of a view's render.
+
+    The outermost decorated render on a thread owns the profile; nested
+    decorated renders are recorded as timed sections of it.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            outer = current_profile()
+            start = time.perf_counter()
+            if outer is not None:
+                try:
+                    with span(f"view.{page}"):
+                        return func(*args, **kwargs)
+                finally:
+                    outer.sections[page] = round((time.perf_counter() - start) * 1000, 2)
+
+            profile = RenderProfile(page=page, started_at=time.time())
+            _local.profile = profile
+            try:
+                with span(f"view.{page}"):
+                    return func(*args, **kwargs)
+            finally:
+                _local.profile = None
+                profile.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+                _finish(profile)
+        return wrapper
+    return decorator
+
+def render_debug_sidebar() -> None:
+    """Show the latest render profile in the sidebar when PROFILE_DEBUG is on"""
+    if not profiling_enabled():
+        return
+
+    import streamlit as st
+
+    history = st.session_state.get('render_profiles') or []
+    if not history:
+        return
+
+    profile = history[-1]
+    with st.sidebar.expander("Render profile", expanded=profile.over_budget):
+        st.write(f"Page: {profile.page}")
+        st.write(f"Render time: {profile.duration_ms:.0f} ms")
+        st.write(f"Queries: {profile.query_count} (budget {profile.budget})")
+        st.write(f"Payload: {profile.payload_bytes / 1024:.1f} KB")
+        st.write(f"Cache hits: {sum(profile.cache_hits.values())}")
+        if profile.over_budget:
+            st.warning(f"Query budget exceeded by {profile.query_count - profile.budget}")
+        if profile.queries:
+            st.dataframe(
+                [asdict(q) for q in profile.queries],
+                hide_index=True,
+                use_container_width=True
+            )
+        if profile.sections:
+            st.caption("Sections")
+            st.json(profile.sections)
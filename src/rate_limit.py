@@ -0,0 +1,111 @@
+"""Sliding-window rate limits kept in the shared cache, so they hold across sessions and workers"""
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+from src.cache import CacheBackend, get_shared_cache
+
+# Failed logins allowed per window, per email and per client IP. The IP
+# limit is higher since an office shares one address.
+LOGIN_EMAIL_LIMIT = 5
+LOGIN_IP_LIMIT = 20
+LOGIN_WINDOW = 15 * 60
+
+# Reverse proxies in front of Streamlit that append to X-Forwarded-For
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', '1'))
+
+def forwarded_client_ip(forwarded: Optional[str], peer: Optional[str],
+                        trusted_proxies: int = TRUSTED_PROXIES) -> Optional[str]:
+    """Get the client IP recorded by the outermost trusted proxy.
+
+    Each proxy appends the address it received the request from, so the
+    client's is the ``trusted_proxies``-th entry from the right; anything
+    left of it was sent by the client and can be made up. Without trusted
+    proxies, or when the header is shorter than the proxy chain, the
+    connection's peer address is used.
+    """
+    if trusted_proxies <= 0 or not forwarded:
+        return peer
+    entries = [entry.strip() for entry in forwarded.split(',') if entry.strip()]
+    if len(entries) < trusted_proxies:
+        return peer
+    return entries[-trusted_proxies]
+
+class SlidingWindowLimiter:
+    """Count events per subject over the last ``window`` seconds.
+
+    Approximates a sliding log with two fixed windows: the previous window's
+    count is weighted by how much of it still overlaps the sliding window.
+    Each event is one atomic increment in the shared cache.
+    """
+
+    def __init__(self, name: str, limit: int, window: float, cache: Optional[CacheBackend] = None,
+                 clock: Callable[[], float] = time.time):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.cache = cache or get_shared_cache()
+        self.clock = clock
+
+    def _key(self, subject: str, bucket: int) -> str:
+        return f"rate:{self.name}:{subject}:{bucket}"
+
+    def _bucket(self) -> Tuple[int, float]:
+        """Current fixed window and the fraction of it that has passed"""
+        bucket, offset = divmod(self.clock(), self.window)
+        return int(bucket), offset / self.window
+
+    def count(self, subject: str) -> float:
+        """Estimated events for a subject within the last window"""
+        bucket, elapsed = self._bucket()
+        current, previous = self._key(subject, bucket), self._key(subject, bucket - 1)
+        counts = self.cache.get_many([current, previous])
+        return counts.get(current, 0) + counts.get(previous, 0) * (1 - elapsed)
+
+    def allow(self, subject: str) -> bool:
+        """Check a subject is under its limit"""
+        return self.count(subject) < self.limit
+
+    def hit(self, subject: str) -> None:
+        """Record an event; a window's counter lives until the next window has passed"""
+        bucket, _ = self._bucket()
+        self.cache.incr(self._key(subject, bucket), ttl=2 * self.window)
+
+    def reset(self, subject: str) -> None:
+        self.cache.delete_prefix(f"rate:{self.name}:{subject}:")
+
+class LoginRateLimiter:
+    """Failed-login limits by email and by client IP, checked before calling Supabase Auth"""
+
+    def __init__(self, cache: Optional[CacheBackend] = None, clock: Callable[[], float] = time.time):
+        self.by_email = SlidingWindowLimiter('login_email', LOGIN_EMAIL_LIMIT, LOGIN_WINDOW, cache, clock)
+        self.by_ip = SlidingWindowLimiter('login_ip', LOGIN_IP_LIMIT, LOGIN_WINDOW, cache, clock)
+
+    def _limits(self, email: str, ip: Optional[str]) -> Iterable[Tuple[SlidingWindowLimiter, str]]:
+        yield self.by_email, email.strip().lower()
+        if ip:
+            yield self.by_ip, ip
+
+    def allow(self, email: str, ip: Optional[str] = None) -> bool:
+        """Check neither the email nor the IP is over its limit"""
+        return all(limiter.allow(subject) for limiter, subject in self._limits(email, ip))
+
+    def failed(self, email: str, ip: Optional[str] = None) -> None:
+        for limiter, subject in self._limits(email, ip):
+            limiter.hit(subject)
+
+    def succeeded(self, email: str) -> None:
+        """Clear the email's failures; the IP's stay, as other emails may be tried from it"""
+        self.by_email.reset(email.strip().lower())
+
+_login_limiter: Optional[LoginRateLimiter] = None
+_login_limiter_lock = threading.Lock()
+
+def get_login_limiter() -> LoginRateLimiter:
+    """Get the process-wide login limiter over the shared cache"""
+    global _login_limiter
+    with _login_limiter_lock:
+        if _login_limiter is None:
+            _login_limiter = LoginRateLimiter(get_shared_cache())
+        return _login_limiter
@@ -0,0 +1,176 @@
+"""Supabase Realtime change feed shared by all sessions in the process"""
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+WATCHED_TABLES = ('purchase_requests', 'expense_reimbursement_forms', 'profiles')
+
+# Seconds before the first reconnect attempt, doubling up to the maximum
+RECONNECT_BACKOFF = 1.0
+MAX_RECONNECT_BACKOFF = 60.0
+
+class ChangeFeed:
+    """In-process record of Postgres changes pushed by Supabase Realtime.
+
+    Each watched table has a version counter that is bumped on every change
+    event. Sessions remember the versions they last rendered with, so an idle
+    rerun can tell without a database query whether anything changed.
+    ``connected`` is only true while the channel is subscribed; callers fall
+    back to polling otherwise.
+    """
+
+    def __init__(self, tables: Iterable[str] = WATCHED_TABLES):
+        self.tables = tuple(tables)
+        self.connected = False
+        # Times the channel has been subscribed
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._last_events: Dict[str, Dict] = {}
+
+    def publish(self, table: str, payload: Optional[Dict] = None) -> None:
+        """Record a change event for a table"""
+        with self._lock:
+            self._versions[table] += 1
+            if payload is not None:
+                self._last_events[table] = payload
+
+    def version(self, table: str) -> int:
+        """Get the current change version of a table"""
+        with self._lock:
+            return self._versions[table]
+
+    def versions(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Get the current change versions of several tables"""
+        with self._lock:
+            return tuple(self._versions[table] for table in tables)
+
+    def last_event(self, table: str) -> Optional[Dict]:
+        """Get the most recent change payload received for a table"""
+        with self._lock:
+            return self._last_events.get(table)
+
+    async def listen(self, client) -> None:
+        """Subscribe to the watched tables and process events until disconnected.
+
+        Args:
+            client: Async Supabase client (or a stand-in exposing the same
+                ``realtime`` channel API).
+        """
+        await client.realtime.connect()
+
+        channel = client.realtime.channel('finance-changes')
+        for table in self.tables:
+            channel = channel.on_postgres_changes(
+                '*',
+                schema='public',
+                table=table,
+                callback=lambda payload, table=table: self.publish(table, payload)
+            )
+        await channel.subscribe(self._subscription_changed)
+
+        try:
+            await client.realtime.listen()
+        finally:
+            self.connected = False
+
+    def _subscription_changed(self, status, error=None) -> None:
+        """Track the channel's state; only a subscribed channel delivers events"""
+        if str(getattr(status, 'value', status)) != 'SUBSCRIBED':
+            if self.connected:
+                print(f"Realtime change feed lost its subscription: {status} {error or ''}")
+            self.connected = False
+            return
+        self.connections += 1
+        if self.connections > 1:
+            # Changes made while disconnected weren't pushed; make every reader look
+            for table in self.tables:
+                self.publish(table)
+        self.connected = True
+
+    async def listen_forever(self, connect: Callable[[], Awaitable], backoff: float = RECONNECT_BACKOFF,
+                             max_backoff: float = MAX_RECONNECT_BACKOFF) -> None:
+        """Listen, reconnecting with exponential backoff whenever the connection ends or fails"""
+        delay = backoff
+        while True:
+            connections = self.connections
+            try:
+                await self.listen(await connect())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Realtime change feed disconnected: {str(e)}")
+            if self.connections != connections:
+                delay = backoff
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_backoff)
+
+    def start(self, url: str, key: str) -> threading.Thread:
+        """Run the listener on a background thread with its own event loop"""
+        async def connect():
+            from supabase import acreate_client
+            return await acreate_client(url, key)
+
+        def target():
+            asyncio.run(self.listen_forever(connect))
+
+        thread = threading.Thread(target=target, name='realtime-change-feed', daemon=True)
+        thread.start()
+        return thread
+
+_feed: Optional[ChangeFeed] = None
+_feed_started = False
+_feed_lock = threading.Lock()
+
+def get_change_feed() -> Optional[ChangeFeed]:
+    """Get the process-wide change feed, starting it on first use.
+
+    Needs ``SUPABASE_SERVICE_KEY``: the tables' select policies are for
+    authenticated users, so the anon key would get no events. Events are only
+    used as change signals and their payloads are never shown to users.
+    Without the key there is no feed and pages poll for changes.
+    """
+    global _feed, _feed_started
+    with _feed_lock:
+        if not _feed_started:
+            _feed_started = True
+            try:
+                import streamlit as st
+                key = st.secrets.get("SUPABASE_SERVICE_KEY")
+                if not key:
+                    print("SUPABASE_SERVICE_KEY is not set; realtime change feed disabled, pages will poll")
+                    return None
+                feed = ChangeFeed()
+                feed.start(st.secrets["SUPABASE_URL"], key)
+                _feed = feed
+            except Exception as e:
+                print(f"Error starting realtime change feed: {str(e)}")
+        return _feed
+
+def watch_tables(tables: Iterable[str], interval: int = 5) -> None:
+    """Rerun the page when Realtime reports a change to any of the tables.
+
+    Call this before the page loads its data. The check runs in a fragment
+    every ``interval`` seconds and only compares in-process counters, so idle
+    tabs cost no database queries.
+    """
+    import streamlit as st
+
+    feed = get_change_feed()
+    if feed is None:
+        return
+
+    # The page is about to render fresh data, so it is current as of now
+    tables = tuple(tables)
+    state_key = f"realtime_versions_{'_'.join(tables)}"
+    st.session_state[state_key] = feed.versions(tables)
+
+    @st.fragment(run_every=interval)
+    def check_for_changes():
+        current = feed.versions(tables)
+        if current != st.session_state[state_key]:
+            st.session_state[state_key] = current
+            st.rerun()
+
+    check_for_changes()
@@ -0,0 +1,90 @@
+"""Coalescing of identical concurrent calls, so a burst of sessions shares one round trip"""
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+class SingleFlight:
+    """Run one call per key at a time; callers arriving meanwhile wait for its result.
+
+    Only calls that overlap are shared: once a call finishes, the next caller
+    with its key starts a new one, so nothing is cached. When a result is
+    shared, every caller gets its own copy made by ``share`` so no session
+    sees another's changes to it.
+    """
+
+    def __init__(self, share: Callable[[Any], Any] = copy.deepcopy):
+        self.share = share
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        # Calls made and calls that waited on another's result instead
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], on_shared: Optional[Callable[[], None]] = None) -> Any:
+        """Call ``fn``, or wait for the identical call already running under ``key``.
+
+        ``on_shared`` is called, on the waiting caller's thread, when it gets
+        another call's result.
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if on_shared is not None:
+                on_shared()
+            if flight.error is not None:
+                raise flight.error
+            return self.share(flight.result)
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                # No one can join from here on
+                followers = flight.followers
+            flight.done.set()
+        # The stored result stays untouched while followers copy it
+        return self.share(flight.result) if followers else flight.result
+
+    def forget(self, match: Callable[[Hashable], bool]) -> None:
+        """Make later calls with a matching key start anew rather than join the one in flight.
+
+        Used after a write: a call already in flight may have read what the
+        write replaced. Its current callers still get its result.
+        """
+        with self._lock:
+            for key in [key for key in self._flights if match(key)]:
+                del self._flights[key]
+
+_flights: Optional[SingleFlight] = None
+_flights_lock = threading.Lock()
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight group shared by every session"""
+    global _flights
+    with _flights_lock:
+        if _flights is None:
+            _flights = SingleFlight()
+        return _flights
@@ -0,0 +1,158 @@
+"""OpenTelemetry tracing for views, managers and external calls.
+
+Tracing is off unless TRACE_EXPORTER is set and opentelemetry-sdk is
+installed; otherwise every helper here is a no-op.
+
+    TRACE_EXPORTER=console   print spans to stdout
+    TRACE_EXPORTER=file      append spans as JSON lines to TRACE_FILE
+                             (defaults to traces.jsonl)
+"""
+import functools
+import inspect
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+SERVICE_NAME = 'vivita-finance'
+
+# Keyword arguments recorded as span attributes when a traced function gets
+# them. Only the keys of ``filters`` are recorded, and search text not at all:
+# values may be personal data.
+RECORDED_ARGS = ('filters', 'status', 'view', 'page', 'page_size', 'include_items')
+
+_tracer = None
+_tracer_lock = threading.Lock()
+_disabled = False
+
+def _create_tracer(exporter_name: str):
+    # Imported here so startup doesn't pay for opentelemetry when tracing is off
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        print("Tracing disabled: opentelemetry-sdk is not installed")
+        return None
+
+    if exporter_name == 'file':
+        out = open(os.environ.get('TRACE_FILE', 'traces.jsonl'), 'a')
+        exporter = ConsoleSpanExporter(
+            out=out,
+            formatter=lambda span: span.to_json(indent=None) + os.linesep
+        )
+    else:
+        exporter = ConsoleSpanExporter()
+
+    provider = TracerProvider(resource=Resource.create({'service.name': SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    return provider.get_tracer(__name__)
+
+def get_tracer():
+    """Get the application tracer, or None when tracing is disabled"""
+    global _tracer, _disabled
+    if _tracer is not None or _disabled:
+        return _tracer
+    with _tracer_lock:
+        if _tracer is None and not _disabled:
+            exporter_name = os.environ.get('TRACE_EXPORTER', '').lower()
+            if exporter_name in ('console', 'file'):
+                _tracer = _create_tracer(exporter_name)
+            _disabled = _tracer is None
+        return _tracer
+
+def set_tracer(tracer) -> None:
+    """Use a specific tracer, e.g. one backed by an in-memory exporter in tests"""
+    global _tracer, _disabled
+    with _tracer_lock:
+        _tracer = tracer
+        _disabled = tracer is None
+
+def _attribute(value: Any):
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    if hasattr(value, 'value'):
+        # Enums such as PurchaseRequestStatus
+        return str(value.value)
+    return str(value)
+
+def recorded_arguments(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Span attributes for the RECORDED_ARGS among a call's keyword arguments"""
+    recorded = {}
+    for name in RECORDED_ARGS:
+        value = kwargs.get(name)
+        if name == 'filters' and isinstance(value, dict):
+            value = ','.join(sorted(key for key, filter_value in value.items() if filter_value is not None))
+        recorded[f"arg.{name}"] = value
+    return recorded
+
+def set_attributes(span, attributes: Dict[str, Any]) -> None:
+    """Set span attributes, converting values OpenTelemetry can't store"""
+    if span is None:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(key, _attribute(value))
+
+def record_result(span, result: Any) -> None:
+    """Record row counts of a traced call's result"""
+    if span is None:
+        return
+    if isinstance(result, list):
+        span.set_attribute('rows', len(result))
+    elif isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        # Paginated (rows, total_count) results
+        span.set_attribute('rows', len(result[0]))
+        if isinstance(result[1], int):
+            span.set_attribute('total_count', result[1])
+    elif result is None or result is False:
+        span.set_attribute('empty_result', True)
+
+@contextmanager
+def span(name: str, **attributes):
+    """Open a span, yielding it or None when tracing is disabled"""
+    tracer = get_tracer()
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name) as current:
+        set_attributes(current, attributes)
+        yield current
+
+def traced(name: Optional[str] = None, **attributes):
+    """Decorator wrapping a function or coroutine function in a span.
+
+    Keyword arguments listed in RECORDED_ARGS and the row count of the
+    result are recorded as attributes.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        def call_attributes(kwargs):
+            return {**attributes, **recorded_arguments(kwargs)}
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **call_attributes(kwargs)) as current:
+                    result = await func(*args, **kwargs)
+                    record_result(current, result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **call_attributes(kwargs)) as current:
+                result = func(*args, **kwargs)
+                record_result(current, result)
+                return result
+        return wrapper
+    return decorator
+
+def traced_methods(cls):
+    """Class decorator tracing every public method of a manager"""
+    for attr_name, attr in list(vars(cls).items()):
+        if attr_name.startswith('_') or not inspect.isfunction(attr):
+            continue
+        setattr(cls, attr_name, traced(f"{cls.__name__}.{attr_name}")(attr))
+    return cls
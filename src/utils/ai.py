@@ -3,6 +3,8 @@ import asyncio
 from typing import Dict, List
 import os
 
+from src.tracing import traced
+
 class AccountClassifier:
     def __init__(self):
         self.anthropic = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
@@ -27,6 +29,7 @@ class AccountClassifier:
             ]
         }
 
+    @traced('anthropic.classify_expense', **{'llm.model': 'claude-3-opus-20240229'})
     async def classify_expense(self, description: str, amount: float) -> dict:
         """Classify expense into appropriate accounting categories."""
         expense_accounts = "\n".join([
@@ -2,6 +2,8 @@ from mailjet_rest import Client
 from typing import List
 import os
 
+from src.tracing import traced
+
 class EmailNotifier:
     def __init__(self):
         self.mailjet = Client(
@@ -10,6 +12,7 @@ class EmailNotifier:
             version='v3.1'
         )
     
+    @traced('mailjet.send_prof_notification')
     async def send_prof_notification(
         self,
         prof_data: dict,
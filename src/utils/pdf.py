@@ -5,7 +5,10 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from io import BytesIO
 
+from src.tracing import traced
+
 class FormPrinter:
+    @traced('pdf.generate_prof_pdf')
     def generate_prof_pdf(self, prof_data: dict) -> BytesIO:
         buffer = BytesIO()
         doc = SimpleDocTemplate(
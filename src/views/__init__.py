@@ -1,9 +1,11 @@
 # This file makes the views directory a Python package
 
-from . import dashboard
-from . import settings
-from . import suppliers
-from . import expenses
-from . import purchase_requests
+import importlib
 
 __all__ = ['dashboard', 'settings', 'suppliers', 'expenses', 'purchase_requests']
+
+def __getattr__(name):
+    # View modules are imported on first access so startup only loads the page shown
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
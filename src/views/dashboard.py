@@ -1,29 +1,54 @@
 import streamlit as st
+from typing import Dict
 from ..crud import PurchaseRequestManager
+from ..crud.purchase_request import STATUS_COUNTS_PREFIX
 from ..models.purchase_request import PurchaseRequestStatus
+from ..profiling import profile_render, record_cache_hit
+from .purchase_requests.utils import can_approve_prf
 
+# Seconds the status counts are shared before they are counted again; PRF
+# writes through the manager drop them at once
+DASHBOARD_TTL = 30
+
+def status_counts(pr_manager: PurchaseRequestManager, user: Dict) -> Dict[str, int]:
+    """Count PRFs per status, shared by every session and worker that sees the same PRFs"""
+    # Finance and Admin see every PRF; everyone else only their own
+    scope = 'all' if can_approve_prf(user) else user['id']
+    key = f"{STATUS_COUNTS_PREFIX}{scope}"
+    cache = pr_manager.cache
+    counts = cache.get(key)
+    if counts is not None:
+        record_cache_hit('dashboard')
+        return counts
+    
+    counts = {}
+    for status in (PurchaseRequestStatus.PENDING, PurchaseRequestStatus.APPROVED, PurchaseRequestStatus.REJECTED):
+        watermark = pr_manager.get_purchase_request_watermark({"status": [status.value]})
+        if watermark is None:
+            # Don't share a partial result
+            return {**counts, status.value: 0}
+        counts[status.value] = watermark[0]
+    cache.set(key, counts, DASHBOARD_TTL)
+    return counts
+
+@profile_render('dashboard')
 def render():
     st.title("Dashboard")
     
     pr_manager = PurchaseRequestManager()
+    counts = status_counts(pr_manager, st.session_state.user)
     
     # Display metrics
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        pending_filter = {"status": [PurchaseRequestStatus.PENDING.value]}
-        pending_prs, pending_count = pr_manager.get_purchase_requests(filters=pending_filter)
-        st.metric("Pending PRFs", pending_count)
+        st.metric("Pending PRFs", counts[PurchaseRequestStatus.PENDING.value])
         
     with col2:
-        approved_filter = {"status": [PurchaseRequestStatus.APPROVED.value]}
-        approved_prs, approved_count = pr_manager.get_purchase_requests(filters=approved_filter)
-        st.metric("Approved PRFs", approved_count)
+        st.metric("Approved PRFs", counts[PurchaseRequestStatus.APPROVED.value])
         
     with col3:
-        rejected_filter = {"status": [PurchaseRequestStatus.REJECTED.value]}
-        rejected_prs, rejected_count = pr_manager.get_purchase_requests(filters=rejected_filter)
-        st.metric("Rejected PRFs", rejected_count)
+        st.metric("Rejected PRFs", counts[PurchaseRequestStatus.REJECTED.value])
     
     # Display recent PRFs
     st.subheader("Recent Purchase Requests")
@@ -37,9 +62,12 @@ def render():
                 st.write(f"Date: {pr.created_at.strftime('%Y-%m-%d')}")
                 st.write(f"Total Amount: ₱{pr.total_amount:,.2f}" if pr.total_amount else "Total Amount: ₱0.00")
                 
-                if pr.items:
-                    st.write("Items:")
-                    for item in pr.items:
-                        st.write(f"- {item.item_description}: {item.quantity} {item.unit} @ ₱{item.unit_price:,.2f}")
+                # Load line items only when asked for
+                if st.toggle("Show Items", key=f"dashboard_items_{pr.id}"):
+                    items = pr_manager.get_purchase_request_items(pr.id)
+                    if items:
+                        st.write("Items:")
+                        for item in items:
+                            st.write(f"- {item.item_description}: {item.quantity} {item.unit} @ ₱{item.unit_price:,.2f}")
     else:
         st.info("No purchase requests found.")
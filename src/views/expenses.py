@@ -5,6 +5,9 @@ from typing import List, Optional
 from uuid import UUID
 
 from ..crud import ExpenseManager
+from ..crud.expense import ERF_PAGE_SIZE
+from ..realtime import watch_tables
+from ..profiling import profile_render
 from ..models.expense import (
     ExpenseReimbursementForm,
     ExpenseItem,
@@ -12,202 +15,202 @@ from ..models.expense import (
     Voucher,
     VoucherEntry
 )
+from ..models.line_items import (
+    EXPENSE_COLUMNS,
+    VOUCHER_COLUMNS,
+    parse_expense_rows,
+    parse_voucher_rows,
+    records
+)
+
+def _grid_key(name: str) -> str:
+    # Bumping the version gives the next form a fresh, empty grid
+    version = st.session_state.setdefault(f"{name}_version", 0)
+    return f"{name}_{version}"
 
-def calculate_item_total(amount: Decimal) -> Decimal:
-    """Calculate total for an item"""
-    return Decimal(str(amount)).quantize(Decimal('0.01'))
+def _reset_grid(name: str) -> None:
+    st.session_state[f"{name}_version"] = st.session_state.get(f"{name}_version", 0) + 1
+
+def _show_errors(errors: List[str], limit: int = 10) -> None:
+    for error in errors[:limit]:
+        st.error(error)
+    if len(errors) > limit:
+        st.error(f"...and {len(errors) - limit} more lines with errors")
 
 def render_erf_form():
     st.title("Expense Reimbursement Form")
     
-    expense_manager = ExpenseManager()
+    # Header information
+    col1, col2 = st.columns(2)
+    with col1:
+        date = st.date_input("Date", datetime.now())
+    with col2:
+        designation = st.text_input("Designation", value=st.session_state.user.get('role', ''))
     
-    # Initialize session state for expense items
-    if 'expense_items' not in st.session_state:
-        st.session_state.expense_items = []
+    # Expense items: one editable grid, so adding, removing or pasting any
+    # number of lines costs a single rerun
+    st.subheader("Expense Details")
+    st.caption("Add lines below or paste them from a spreadsheet")
+    rows = st.data_editor(
+        {column: [] for column in EXPENSE_COLUMNS},
+        num_rows="dynamic",
+        use_container_width=True,
+        key=_grid_key("erf_grid"),
+        column_config={
+            "date": st.column_config.DateColumn("Date", help="Defaults to the form date"),
+            "description": st.column_config.TextColumn("Description"),
+            "payee": st.column_config.TextColumn("Payee"),
+            "reference_number": st.column_config.TextColumn("Reference #"),
+            "amount": st.column_config.NumberColumn("Amount", min_value=0.0, step=0.01, format="₱%.2f"),
+            "account": st.column_config.TextColumn("Account", default="OPEX"),
+        }
+    )
+    parsed = parse_expense_rows(records(rows), default_date=date)
     
-    # Form inputs
-    with st.form("erf_form"):
-        # Header information
-        col1, col2 = st.columns(2)
-        with col1:
-            date = st.date_input("Date", datetime.now())
-        with col2:
-            designation = st.text_input("Designation", value=st.session_state.user.get('role', ''))
-        
-        # Expense items
-        st.subheader("Expense Details")
-        
-        # Display existing items
-        grand_total = Decimal('0')
-        for i, item in enumerate(st.session_state.expense_items):
-            col1, col2, col3, col4, col5, col6 = st.columns([2, 3, 3, 2, 2, 1])
-            with col1:
-                item.date = st.date_input(f"Date {i}", item.date)
-            with col2:
-                item.description = st.text_input(f"Description {i}", item.description)
-            with col3:
-                item.payee = st.text_input(f"Payee {i}", item.payee)
-            with col4:
-                item.reference_number = st.text_input(f"Reference # {i}", item.reference_number or '')
-            with col5:
-                amount = st.number_input(f"Amount {i}", value=float(item.amount), step=0.01, format="%.2f")
-                item.amount = Decimal(str(amount))
-                # Calculate item total
-                item_total = calculate_item_total(item.amount)
-                grand_total += item_total
-                st.write(f"Total: ₱{item_total:,.2f}")
-            with col6:
-                if st.button("Remove", key=f"remove_{i}"):
-                    st.session_state.expense_items.pop(i)
-                    st.rerun()
-        
-        # Display grand total
-        st.markdown(f"### Grand Total: ₱{grand_total:,.2f}")
+    # Display grand total
+    st.markdown(f"### Grand Total: ₱{parsed.total('amount'):,.2f}")
+    _show_errors(parsed.errors)
+    
+    if st.button("Submit", key="submit_erf"):
+        if parsed.errors:
+            st.error("Please fix the lines above before submitting")
+            return
+        if not parsed.items:
+            st.error("Please add at least one expense item")
+            return
         
-        # Add new item button
-        if st.button("Add Item"):
-            new_item = ExpenseItem(
-                date=datetime.now(),
-                description="",
-                payee="",
-                amount=Decimal('0'),
-                account="OPEX",  # Default account
-                reference_number=None
+        try:
+            erf = ExpenseReimbursementForm(
+                employee_id=st.session_state.user['id'],
+                designation=designation,
+                date=date,
+                status=ExpenseFormStatus.PENDING,
+                items=parsed.items,
+                total_amount=parsed.total('amount')
             )
-            st.session_state.expense_items.append(new_item)
-            st.rerun()
-        
-        # Submit button
-        if st.form_submit_button("Submit"):
-            try:
-                if not st.session_state.expense_items:
-                    st.error("Please add at least one expense item")
-                    return
-                
-                # Create ERF
-                erf = ExpenseReimbursementForm(
-                    employee_id=st.session_state.user['id'],
-                    designation=designation,
-                    date=date,
-                    status=ExpenseFormStatus.PENDING,
-                    items=st.session_state.expense_items,
-                    total_amount=grand_total  # Set the calculated grand total
-                )
-                
-                # Save ERF
-                result = expense_manager.create_expense_form(erf)
-                
-                if result:
-                    st.success(f"ERF #{result.form_number} submitted successfully!")
-                    st.session_state.expense_items = []  # Clear items
-                    st.rerun()
-                else:
-                    st.error("Failed to submit ERF. Please try again.")
             
-            except Exception as e:
-                st.error(f"Error submitting ERF: {str(e)}")
+            # Header and items are saved in one transaction
+            result = ExpenseManager().create_expense_form(erf)
+            
+            if result:
+                st.success(f"ERF #{result.form_number} submitted successfully!")
+                _reset_grid("erf_grid")
+                st.rerun()
+            else:
+                st.error("Failed to submit ERF. Please try again.")
+        
+        except Exception as e:
+            st.error(f"Error submitting ERF: {str(e)}")
 
 def render_voucher_form():
     st.title("Voucher")
     
-    expense_manager = ExpenseManager()
+    # Header information
+    col1, col2 = st.columns(2)
+    with col1:
+        date = st.date_input("Date", datetime.now())
+        payee = st.text_input("Payee")
+        particulars = st.text_area("Particulars")
+    with col2:
+        bank_name = st.text_input("Bank")
+        transaction_type = st.selectbox("Transaction Type", ["Fund Transfer", "Check", "Cash"])
+        reference_number = st.text_input("Reference Number")
     
-    # Initialize session state for voucher entries
-    if 'voucher_entries' not in st.session_state:
-        st.session_state.voucher_entries = []
+    # Voucher entries
+    st.subheader("Distribution of Account")
+    st.caption("Add entries below or paste them from a spreadsheet")
+    rows = st.data_editor(
+        {column: [] for column in VOUCHER_COLUMNS},
+        num_rows="dynamic",
+        use_container_width=True,
+        key=_grid_key("voucher_grid"),
+        column_config={
+            "account_title": st.column_config.TextColumn("Account Title"),
+            "activity": st.column_config.TextColumn("Activity"),
+            "debit": st.column_config.NumberColumn("Debit", min_value=0.0, step=0.01, format="₱%.2f"),
+            "credit": st.column_config.NumberColumn("Credit", min_value=0.0, step=0.01, format="₱%.2f"),
+        }
+    )
+    parsed = parse_voucher_rows(records(rows))
+    total_debit, total_credit = parsed.total('debit'), parsed.total('credit')
     
-    # Form inputs
-    with st.form("voucher_form"):
-        # Header information
-        col1, col2 = st.columns(2)
-        with col1:
-            date = st.date_input("Date", datetime.now())
-            payee = st.text_input("Payee")
-            particulars = st.text_area("Particulars")
-        with col2:
-            bank_name = st.text_input("Bank")
-            transaction_type = st.selectbox("Transaction Type", ["Fund Transfer", "Check", "Cash"])
-            reference_number = st.text_input("Reference Number")
-        
-        # Voucher entries
-        st.subheader("Distribution of Account")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write(f"Total Debit: ₱{total_debit:,.2f}")
+    with col2:
+        st.write(f"Total Credit: ₱{total_credit:,.2f}")
+    
+    balanced = parsed.totals['debit'] == parsed.totals['credit']
+    if not balanced:
+        st.warning("Debit and Credit totals must be equal")
+    _show_errors(parsed.errors)
+    
+    if st.button("Submit", key="submit_voucher"):
+        if parsed.errors:
+            st.error("Please fix the entries above before submitting")
+            return
+        if not parsed.items:
+            st.error("Please add at least one entry")
+            return
+        if not balanced:
+            st.error("Debit and Credit totals must be equal")
+            return
         
-        # Display existing entries
-        for i, entry in enumerate(st.session_state.voucher_entries):
-            col1, col2, col3, col4, col5 = st.columns([3, 2, 2, 2, 1])
-            with col1:
-                entry.account_title = st.text_input(f"Account Title {i}", entry.account_title)
-            with col2:
-                entry.activity = st.text_input(f"Activity {i}", entry.activity or '')
-            with col3:
-                debit = st.number_input(f"Debit {i}", value=float(entry.debit_amount) if entry.debit_amount else 0.0, step=0.01)
-                entry.debit_amount = Decimal(str(debit)) if debit else None
-            with col4:
-                credit = st.number_input(f"Credit {i}", value=float(entry.credit_amount) if entry.credit_amount else 0.0, step=0.01)
-                entry.credit_amount = Decimal(str(credit)) if credit else None
-            with col5:
-                if st.button("Remove", key=f"remove_entry_{i}"):
-                    st.session_state.voucher_entries.pop(i)
-                    st.rerun()
+        # Create voucher
+        voucher = Voucher(
+            date=datetime.combine(date, datetime.min.time()),
+            payee=payee,
+            total_amount=total_debit,  # or total_credit, they are equal
+            particulars=particulars,
+            prepared_by=UUID(st.session_state.user['id']),
+            bank_name=bank_name,
+            transaction_type=transaction_type,
+            reference_number=reference_number,
+            entries=parsed.items
+        )
         
-        # Add new entry button
-        if st.button("Add Entry"):
-            st.session_state.voucher_entries.append(
-                VoucherEntry(
-                    account_title="",
-                    activity="",
-                    debit_amount=None,
-                    credit_amount=None
-                )
-            )
+        result = ExpenseManager().create_voucher(voucher)
+        if result:
+            st.success(f"Voucher {result.voucher_number} created successfully!")
+            _reset_grid("voucher_grid")
             st.rerun()
-        
-        # Calculate totals
-        total_debit = sum(entry.debit_amount or Decimal('0') for entry in st.session_state.voucher_entries)
-        total_credit = sum(entry.credit_amount or Decimal('0') for entry in st.session_state.voucher_entries)
-        
+        else:
+            st.error("Failed to create voucher. Please try again.")
+
+def render_bulk_erf_actions(expense_manager: ExpenseManager, erfs: List[ExpenseReimbursementForm]):
+    """Approve or reject several pending ERFs with a single request"""
+    form_numbers = {erf.id: erf.form_number for erf in erfs}
+    with st.form("bulk_erf_actions"):
+        selected = st.multiselect(
+            "Select ERFs",
+            options=list(form_numbers),
+            format_func=form_numbers.get
+        )
         col1, col2 = st.columns(2)
         with col1:
-            st.write(f"Total Debit: ₱{total_debit:,.2f}")
+            approve = st.form_submit_button("Approve Selected")
         with col2:
-            st.write(f"Total Credit: ₱{total_credit:,.2f}")
-        
-        if total_debit != total_credit:
-            st.warning("Debit and Credit totals must be equal")
-        
-        submitted = st.form_submit_button("Submit")
-        if submitted:
-            if not st.session_state.voucher_entries:
-                st.error("Please add at least one entry")
-                return
-            
-            if total_debit != total_credit:
-                st.error("Debit and Credit totals must be equal")
-                return
-            
-            # Create voucher
-            voucher = Voucher(
-                date=datetime.combine(date, datetime.min.time()),
-                payee=payee,
-                total_amount=total_debit,  # or total_credit, they should be equal
-                particulars=particulars,
-                prepared_by=UUID(st.session_state.user['id']),
-                bank_name=bank_name,
-                transaction_type=transaction_type,
-                reference_number=reference_number,
-                entries=st.session_state.voucher_entries
-            )
-            
-            result = expense_manager.create_voucher(voucher)
-            if result:
-                st.success(f"Voucher {result.voucher_number} created successfully!")
-                # Clear form
-                st.session_state.voucher_entries = []
-                st.rerun()
-            else:
-                st.error("Failed to create voucher. Please try again.")
+            reject = st.form_submit_button("Reject Selected")
+    
+    if not (approve or reject):
+        return
+    if not selected:
+        st.warning("Select at least one ERF")
+        return
+    
+    status = ExpenseFormStatus.APPROVED if approve else ExpenseFormStatus.REJECTED
+    outcomes = expense_manager.bulk_update_status(selected, status)
+    
+    failed = {erf_id: error for erf_id, error in outcomes.items() if error}
+    updated = len(outcomes) - len(failed)
+    if updated:
+        st.success(f"{updated} ERF(s) {status.value}")
+    for erf_id, error in failed.items():
+        st.error(f"ERF #{form_numbers.get(erf_id, erf_id)}: {error}")
+    if not failed:
+        st.rerun()
 
+@profile_render('expenses')
 def render():
     st.sidebar.title("Expenses")
     page = st.sidebar.radio(
@@ -222,18 +225,42 @@ def render():
     else:
         st.subheader("Expense Reimbursement Forms")
         
-        # Filter by status
-        status_filter = st.selectbox(
-            "Filter by Status",
-            [None] + [status.value for status in ExpenseFormStatus],
-            format_func=lambda x: "All" if x is None else x.title()
-        )
+        # Rerun when another session changes an ERF
+        watch_tables(['expense_reimbursement_forms'])
+        
+        # Filters
+        col1, col2 = st.columns(2)
+        with col1:
+            status_filter = st.selectbox(
+                "Filter by Status",
+                [None] + [status.value for status in ExpenseFormStatus],
+                format_func=lambda x: "All" if x is None else x.title()
+            )
+        with col2:
+            show_mine = st.checkbox("Show only my ERFs")
+        
+        # Each page starts after the last ERF of the page before it; the
+        # cursors are kept so Previous doesn't have to count rows
+        filters = (status_filter, show_mine)
+        if st.session_state.get('erf_filters') != filters:
+            st.session_state.erf_filters = filters
+            st.session_state.erf_cursors = [None]
+        cursors = st.session_state.erf_cursors
         
         # Get ERFs
+        expense_manager = ExpenseManager()
         status = ExpenseFormStatus(status_filter) if status_filter else None
-        erfs = expense_manager.get_expense_forms(status=status)
+        erfs = expense_manager.get_expense_forms(
+            status=status,
+            employee_id=st.session_state.user['id'] if show_mine else None,
+            before=cursors[-1]
+        )
         
         if erfs:
+            pending = [erf for erf in erfs if erf.status == ExpenseFormStatus.PENDING]
+            if pending and st.session_state.user['permissions'].get('can_approve', False):
+                render_bulk_erf_actions(expense_manager, pending)
+            
             for erf in erfs:
                 with st.expander(f"ERF #{erf.form_number} - {erf.status.value.title()}"):
                     st.write(f"Date: {erf.date.strftime('%Y-%m-%d')}")
@@ -254,8 +281,7 @@ def render():
                             if st.button("Approve", key=f"approve_{erf.id}"):
                                 if expense_manager.update_expense_form_status(
                                     erf.id,
-                                    ExpenseFormStatus.APPROVED,
-                                    st.session_state.user['id']
+                                    ExpenseFormStatus.APPROVED
                                 ):
                                     st.success("ERF approved successfully!")
                                     st.rerun()
@@ -265,8 +291,7 @@ def render():
                             if st.button("Reject", key=f"reject_{erf.id}"):
                                 if expense_manager.update_expense_form_status(
                                     erf.id,
-                                    ExpenseFormStatus.REJECTED,
-                                    st.session_state.user['id']
+                                    ExpenseFormStatus.REJECTED
                                 ):
                                     st.success("ERF rejected successfully!")
                                     st.rerun()
@@ -274,3 +299,17 @@ def render():
                                     st.error("Failed to reject ERF")
         else:
             st.info("No expense forms found.")
+        
+        # Pagination controls
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if len(cursors) > 1 and st.button("Previous"):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            st.write(f"Page {len(cursors)}")
+        with col3:
+            # A full page means there may be older ERFs
+            if len(erfs) == ERF_PAGE_SIZE and st.button("Next"):
+                cursors.append(erfs[-1])
+                st.rerun()
@@ -1,13 +1,19 @@
 """Purchase request views package"""
 import streamlit as st
+from ...realtime import watch_tables
+from ...profiling import profile_render
 from .list import render_prf_list
 from .detail import render_prf_details
 from .form import generate_prf
 
+@profile_render('purchase_requests')
 def render():
     """Main entry point for purchase request views"""
     st.title("Purchase Requests")
     
+    # Rerun when another session changes a PRF
+    watch_tables(['purchase_requests'])
+    
     # Add tabs for different PRF views
     tab1, tab2 = st.tabs(["Create New PRF", "View PRFs"])
     
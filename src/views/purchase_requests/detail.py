@@ -3,9 +3,11 @@ from datetime import datetime
 from typing import Dict, Optional
 from uuid import UUID
 from ...models import PurchaseRequest, PurchaseRequestStatus
-from ...crud.purchase_request import PurchaseRequestManager
-from .utils import format_currency, can_approve_prf, can_delete_prf
+from ...crud.purchase_request import AUDIT_PAGE_SIZE, PurchaseRequestManager
+from ...profiling import profile_render
+from .utils import format_currency, can_approve_prf, can_delete_prf, is_requestor, update_prf_status
 
+@profile_render('prf_detail')
 def render_prf_details():
     """Render detailed view of a purchase request"""
     st.title("Purchase Request Details")
@@ -87,10 +89,11 @@ def render_prf_details():
                     else:
                         st.error("Failed to delete draft")
             
-            if user['id'] == prf.requestor_id:
+            if is_requestor(user, prf):
                 if st.button("Submit for Approval"):
-                    if pr_manager.update_purchase_request_status(
-                        prf.id,
+                    if update_prf_status(
+                        pr_manager,
+                        prf,
                         PurchaseRequestStatus.PENDING
                     ):
                         st.success("PRF submitted for approval")
@@ -101,8 +104,9 @@ def render_prf_details():
         elif prf.status == PurchaseRequestStatus.PENDING:
             if can_approve_prf(user):
                 if st.button("Approve"):
-                    if pr_manager.update_purchase_request_status(
-                        prf.id,
+                    if update_prf_status(
+                        pr_manager,
+                        prf,
                         PurchaseRequestStatus.APPROVED
                     ):
                         st.success("PRF approved successfully")
@@ -113,8 +117,9 @@ def render_prf_details():
                 if st.button("Reject"):
                     reason = st.text_area("Rejection Reason")
                     if reason:
-                        if pr_manager.update_purchase_request_status(
-                            prf.id,
+                        if update_prf_status(
+                            pr_manager,
+                            prf,
                             PurchaseRequestStatus.REJECTED,
                             remarks=f"Rejected: {reason}"
                         ):
@@ -130,14 +135,33 @@ def render_prf_details():
     
     # Audit trail
     st.markdown("### History")
-    audit_trail = pr_manager.get_audit_trail(prf.id)
-    if audit_trail:
-        for entry in audit_trail:
-            st.write(
-                f"{entry.timestamp.strftime('%Y-%m-%d %H:%M')} - "
-                f"{entry.action} by {entry.user_name}"
-            )
-            if entry.details:
-                st.write(f"Details: {entry.details}")
-    else:
+    render_history(pr_manager, prf)
+
+def render_history(pr_manager: PurchaseRequestManager, prf: PurchaseRequest, key: str = "history"):
+    """Show a PRF's audit trail one page at a time"""
+    # Loaded pages are kept until the PRF changes
+    state_key = f"{key}_{prf.id}"
+    cached = st.session_state.get(state_key)
+    if cached is None or cached[0] != prf.updated_at:
+        cached = (prf.updated_at, pr_manager.get_audit_trail(prf.id))
+        st.session_state[state_key] = cached
+    audit_trail = cached[1]
+    
+    if not audit_trail:
         st.info("No history available")
+        return
+    
+    for entry in audit_trail:
+        st.write(
+            f"{entry.timestamp.strftime('%Y-%m-%d %H:%M')} - "
+            f"{entry.action.replace('_', ' ')} by {entry.user_name or 'Unknown'}"
+        )
+        if entry.details:
+            st.write(f"Details: {entry.details}")
+    
+    # A full page means there may be older entries
+    if len(audit_trail) % AUDIT_PAGE_SIZE == 0:
+        if st.button("Show older entries", key=f"{state_key}_more"):
+            older = pr_manager.get_audit_trail(prf.id, before=audit_trail[-1])
+            st.session_state[state_key] = (prf.updated_at, audit_trail + older)
+            st.rerun()
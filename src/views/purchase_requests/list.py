@@ -5,8 +5,60 @@ from uuid import UUID
 from decimal import Decimal
 from src.models.purchase_request import PurchaseRequest, PurchaseRequestStatus
 from src.crud.purchase_request import PurchaseRequestManager
-from src.views.purchase_requests.utils import format_currency, can_approve_prf, can_delete_prf
+from src.crud.replica import PurchaseRequestReplica
+from src.realtime import get_change_feed
+from src.profiling import profile_render
+from src.profiles import get_profile_cache
+from src.views.purchase_requests.utils import format_currency, can_approve_prf, can_delete_prf, is_requestor, update_prf_status
+from src.views.purchase_requests.detail import render_history
 
+def render_bulk_actions(pr_manager: PurchaseRequestManager, prfs: List[PurchaseRequest], replica: PurchaseRequestReplica):
+    """Approve or reject several pending PRFs with a single request"""
+    form_numbers = {prf.id: prf.form_number for prf in prfs}
+    with st.form("bulk_prf_actions"):
+        selected = st.multiselect(
+            "Select PRFs",
+            options=list(form_numbers),
+            format_func=form_numbers.get
+        )
+        reason = st.text_input("Rejection Reason", key="bulk_reject_reason")
+        col1, col2 = st.columns(2)
+        with col1:
+            approve = st.form_submit_button("Approve Selected")
+        with col2:
+            reject = st.form_submit_button("Reject Selected")
+    
+    if not (approve or reject):
+        return
+    if not selected:
+        st.warning("Select at least one PRF")
+        return
+    if reject and not reason:
+        st.error("Please provide a rejection reason")
+        return
+    
+    if approve:
+        outcomes = pr_manager.bulk_update_status(selected, PurchaseRequestStatus.APPROVED)
+    else:
+        outcomes = pr_manager.bulk_update_status(
+            selected,
+            PurchaseRequestStatus.REJECTED,
+            remarks=f"Rejected: {reason}"
+        )
+    
+    failed = {pr_id: error for pr_id, error in outcomes.items() if error}
+    updated = len(outcomes) - len(failed)
+    if updated:
+        st.success(f"{updated} PRF(s) {'approved' if approve else 'rejected'}")
+    for pr_id, error in failed.items():
+        st.error(f"PRF #{form_numbers.get(pr_id, pr_id)}: {error}")
+    if updated:
+        # Show the new statuses now rather than when the Realtime event arrives
+        replica.invalidate()
+    if not failed:
+        st.rerun()
+
+@profile_render('prf_list')
 def render_prf_list():
     """Render the PRF management interface"""
     st.title("Purchase Request Management")
@@ -91,13 +143,28 @@ def render_prf_list():
     # Clean up filters by removing None values
     filters = {k: v for k, v in filters.items() if v is not None}
     
-    # Get filtered PRFs with pagination
-    prfs, total_count = pr_manager.get_purchase_requests(
-        filters=filters if filters else None,
+    # Get filtered PRFs with pagination from the session replica, which only
+    # refetches rows that changed since the last rerun
+    filters = filters if filters else None
+    replica = st.session_state.get('prf_replica')
+    if replica is None or not replica.matches(filters):
+        replica = PurchaseRequestReplica(filters)
+        st.session_state.prf_replica = replica
+    
+    # With a live Realtime feed an unchanged version means nothing to fetch at all
+    feed = get_change_feed()
+    feed_version = feed.version('purchase_requests') if feed and feed.connected else None
+    replica.sync(pr_manager, feed_version=feed_version)
+    
+    prfs, total_count = replica.page(
+        pr_manager,
         page=st.session_state.prf_page,
         page_size=st.session_state.items_per_page
     )
     
+    # Load every requestor's name on the page in one query; name lookups below hit the cache
+    get_profile_cache().names((prf.requestor_id for prf in prfs), pr_manager.supabase)
+    
     # Calculate total pages
     total_pages = (total_count + st.session_state.items_per_page - 1) // st.session_state.items_per_page
     
@@ -136,9 +203,29 @@ def render_prf_list():
                 
                 st.table(prf_data)
                 
+                if status_name == "Pending" and can_approve_prf(user):
+                    render_bulk_actions(pr_manager, filtered_prfs, replica)
+                
                 # Handle PRF actions
                 for prf in filtered_prfs:
                     with st.expander(f"Actions for PRF #{prf.form_number}"):
+                        # Line items are only fetched once the user asks for them
+                        if st.toggle("Show Items", key=f"items_{status_name}_{prf.id}"):
+                            items = replica.items(pr_manager, prf)
+                            if items:
+                                st.table([
+                                    {
+                                        "Description": item.item_description,
+                                        "Quantity": f"{float(item.quantity):,.2f}",
+                                        "Unit": item.unit,
+                                        "Unit Price": format_currency(item.unit_price),
+                                        "Total": format_currency(item.total_price)
+                                    }
+                                    for item in items
+                                ])
+                            else:
+                                st.info("No items found")
+                        
                         col1, col2 = st.columns(2)
                         
                         with col1:
@@ -149,17 +236,9 @@ def render_prf_list():
                                 st.rerun()
                             
                             # Show audit trail
-                            if st.button("View History", key=f"history_{prf.id}"):
-                                audit_trail = pr_manager.get_audit_trail(prf.id)
-                                if audit_trail:
-                                    st.write("**Audit Trail**")
-                                    for entry in audit_trail:
-                                        st.write(
-                                            f"{entry.timestamp.strftime('%Y-%m-%d %H:%M')} - "
-                                            f"{entry.action} by {entry.user_name}"
-                                        )
-                                else:
-                                    st.info("No history available")
+                            if st.toggle("View History", key=f"history_{status_name}_{prf.id}"):
+                                st.write("**Audit Trail**")
+                                render_history(pr_manager, prf, key=f"history_{status_name}")
                         
                         with col2:
                             # Status-specific actions
@@ -168,17 +247,20 @@ def render_prf_list():
                                     if st.button("Delete Draft", key=f"delete_{prf.id}"):
                                         if pr_manager.delete_purchase_request(prf.id):
                                             st.success("Draft deleted successfully")
+                                            replica.invalidate()
                                             st.rerun()
                                         else:
                                             st.error("Failed to delete draft")
                                 
-                                if user['id'] == prf.requestor_id:
+                                if is_requestor(user, prf):
                                     if st.button("Submit for Approval", key=f"submit_{prf.id}"):
-                                        if pr_manager.update_purchase_request_status(
-                                            prf.id,
+                                        if update_prf_status(
+                                            pr_manager,
+                                            prf,
                                             PurchaseRequestStatus.PENDING
                                         ):
                                             st.success("PRF submitted for approval")
+                                            replica.invalidate()
                                             st.rerun()
                                         else:
                                             st.error("Failed to submit PRF")
@@ -186,11 +268,13 @@ def render_prf_list():
                             elif prf.status == PurchaseRequestStatus.PENDING:
                                 if can_approve_prf(user):
                                     if st.button("Approve", key=f"approve_{prf.id}"):
-                                        if pr_manager.update_purchase_request_status(
-                                            prf.id,
+                                        if update_prf_status(
+                                            pr_manager,
+                                            prf,
                                             PurchaseRequestStatus.APPROVED
                                         ):
                                             st.success("PRF approved successfully")
+                                            replica.invalidate()
                                             st.rerun()
                                         else:
                                             st.error("Failed to approve PRF")
@@ -201,12 +285,14 @@ def render_prf_list():
                                             key=f"reason_{prf.id}"
                                         )
                                         if reason:
-                                            if pr_manager.update_purchase_request_status(
-                                                prf.id,
+                                            if update_prf_status(
+                                                pr_manager,
+                                                prf,
                                                 PurchaseRequestStatus.REJECTED,
                                                 remarks=f"Rejected: {reason}"
                                             ):
                                                 st.success("PRF rejected")
+                                                replica.invalidate()
                                                 st.rerun()
                                             else:
                                                 st.error("Failed to reject PRF")
@@ -2,6 +2,7 @@ from decimal import Decimal
 from typing import Dict, Optional
 from uuid import UUID
 from ...models import PurchaseRequest, PurchaseRequestStatus
+from ...profiles import get_role
 
 def format_currency(amount: Decimal) -> str:
     """Format decimal amount as currency string"""
@@ -9,10 +10,30 @@ def format_currency(amount: Decimal) -> str:
 
 def can_approve_prf(user: Dict) -> bool:
     """Check if user has permission to approve PRFs"""
-    return user['role'].lower() in ['finance', 'admin']
+    return (get_role(user) or '').lower() in ['finance', 'admin']
+
+def is_requestor(user: Dict, prf: PurchaseRequest) -> bool:
+    """Check if user raised a PRF; session ids are strings, PRF ids UUIDs"""
+    return str(user['id']) == str(prf.requestor_id)
 
 def can_delete_prf(user: Dict, prf: PurchaseRequest) -> bool:
     """Check if user can delete a PRF"""
     if prf.status != PurchaseRequestStatus.DRAFT:
         return False
-    return (user['id'] == prf.requestor_id) or user['role'].lower() in ['finance', 'admin']
+    return is_requestor(user, prf) or (get_role(user) or '').lower() in ['finance', 'admin']
+
+def update_prf_status(pr_manager, prf: PurchaseRequest, status: PurchaseRequestStatus, remarks: Optional[str] = None) -> bool:
+    """Change a PRF's status unless someone else changed it since this page loaded"""
+    import streamlit as st
+    from ...crud import UpdateConflictError
+
+    try:
+        return pr_manager.update_purchase_request_status(
+            prf.id,
+            status,
+            remarks=remarks,
+            expected_updated_at=prf.updated_at
+        ) is not None
+    except UpdateConflictError as e:
+        st.warning(f"PRF #{prf.form_number}: {str(e)}")
+        return False
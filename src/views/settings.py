@@ -1,5 +1,10 @@
 import streamlit as st
+from ..crud import PurchaseRequestManager
+from ..crud.purchase_request import AUDIT_PAGE_SIZE
+from ..profiles import get_permissions
+from ..profiling import profile_render
 
+@profile_render('settings')
 def render():
     """Render the settings page"""
     st.title("Settings")
@@ -38,7 +43,39 @@ def render():
     if st.button("Save Settings"):
         # TODO: Implement settings save
         st.success("Settings saved successfully!")
+    
+    if get_permissions(st.session_state.user)['can_manage_users']:
+        render_activity_feed()
         
     # Display version info
     st.sidebar.markdown("---")
     st.sidebar.write("Version: 1.0.0")
+
+
+def render_activity_feed():
+    """Show the audit trail of every PRF, newest first, for admins"""
+    st.header("Activity Feed")
+    
+    if 'activity_feed' not in st.session_state:
+        st.session_state.activity_feed = PurchaseRequestManager().get_audit_feed()
+    entries = st.session_state.activity_feed
+    
+    if not entries:
+        st.info("No activity yet")
+        return
+    
+    for entry in entries:
+        st.write(
+            f"{entry.timestamp.strftime('%Y-%m-%d %H:%M')} - PRF #{entry.form_number}: "
+            f"{entry.action.replace('_', ' ')} by {entry.user_name or 'Unknown'}"
+        )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(entries) % AUDIT_PAGE_SIZE == 0 and st.button("Show older activity"):
+            st.session_state.activity_feed = entries + PurchaseRequestManager().get_audit_feed(before=entries[-1])
+            st.rerun()
+    with col2:
+        if st.button("Refresh activity"):
+            del st.session_state.activity_feed
+            st.rerun()
@@ -1,8 +1,10 @@
 import streamlit as st
 from ..crud import SupplierManager
 from ..models import Supplier
+from ..profiling import profile_render
 from uuid import UUID
 
+@profile_render('suppliers')
 def render():
     st.title("Supplier Management")
     
@@ -0,0 +1,4 @@
+-- Publish PRF and ERF changes to Supabase Realtime so approver pages can
+-- refresh on push instead of re-querying on every rerun
+alter publication supabase_realtime add table public.purchase_requests;
+alter publication supabase_realtime add table public.expense_reimbursement_forms;
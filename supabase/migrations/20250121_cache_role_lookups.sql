@@ -0,0 +1,88 @@
+-- Look up the caller's role once per statement instead of once per row.
+-- Policies call current_user_role() wrapped in a scalar subquery, which
+-- Postgres evaluates as an initPlan and reuses for every row it checks.
+create or replace function public.current_user_role()
+returns text
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select role from public.profiles where id = auth.uid();
+$$;
+
+grant execute on function public.current_user_role() to authenticated;
+
+drop policy if exists view_purchase_requests on public.purchase_requests;
+create policy view_purchase_requests on public.purchase_requests
+    for select
+    to authenticated
+    using (
+        auth.uid() = requestor_id
+        or (select public.current_user_role()) in ('Finance', 'Admin')
+    );
+
+drop policy if exists update_purchase_requests on public.purchase_requests;
+create policy update_purchase_requests on public.purchase_requests
+    for update
+    to authenticated
+    using (
+        (
+            auth.uid() = requestor_id
+            and (status in ('draft', 'pending') or status is null)
+        )
+        or (select public.current_user_role()) in ('Finance', 'Admin')
+    );
+
+drop policy if exists delete_purchase_requests on public.purchase_requests;
+create policy delete_purchase_requests on public.purchase_requests
+    for delete
+    to authenticated
+    using (
+        (auth.uid() = requestor_id and status = 'draft')
+        or (select public.current_user_role()) = 'Admin'
+    );
+
+drop policy if exists view_purchase_request_items on public.purchase_request_items;
+create policy view_purchase_request_items on public.purchase_request_items
+    for select
+    to authenticated
+    using (
+        (select public.current_user_role()) in ('Finance', 'Admin')
+        or exists (
+            select 1 from public.purchase_requests pr
+            where pr.id = purchase_request_id
+            and pr.requestor_id = auth.uid()
+        )
+    );
+
+drop policy if exists update_purchase_request_items on public.purchase_request_items;
+create policy update_purchase_request_items on public.purchase_request_items
+    for update
+    to authenticated
+    using (
+        (select public.current_user_role()) in ('Finance', 'Admin')
+        or exists (
+            select 1 from public.purchase_requests pr
+            where pr.id = purchase_request_id
+            and pr.requestor_id = auth.uid()
+            and (pr.status in ('draft', 'pending') or pr.status is null)
+        )
+    );
+
+drop policy if exists delete_purchase_request_items on public.purchase_request_items;
+create policy delete_purchase_request_items on public.purchase_request_items
+    for delete
+    to authenticated
+    using (
+        (select public.current_user_role()) = 'Admin'
+        or exists (
+            select 1 from public.purchase_requests pr
+            where pr.id = purchase_request_id
+            and pr.requestor_id = auth.uid()
+            and pr.status = 'draft'
+        )
+    );
+
+-- Profile changes are pushed to the app so its profile cache can drop stale roles
+alter publication supabase_realtime add table public.profiles;
@@ -0,0 +1,40 @@
+-- Audit entries are visible to every authenticated user, so their authors'
+-- names have to be as well, but nothing else from their profiles. The view
+-- runs with its owner's rights, past the profiles select policies, and
+-- returns only the id and name.
+drop policy if exists "Authenticated users can view profile names" on public.profiles;
+
+create or replace view public.profile_names as
+    select id, nullif(trim(concat_ws(' ', first_name, last_name)), '') as full_name
+    from public.profiles;
+
+revoke all on public.profile_names from anon, authenticated;
+grant select on public.profile_names to authenticated;
+
+-- Users who signed up before handle_new_user was installed have no
+-- profile. Give them one from their auth record so every audit author,
+-- past and future, satisfies the constraint below.
+insert into public.profiles (id, first_name, last_name, email, role)
+select
+    u.id,
+    coalesce(u.raw_user_meta_data->>'first_name', split_part(u.email, '@', 1), ''),
+    coalesce(u.raw_user_meta_data->>'last_name', ''),
+    coalesce(u.email, u.id::text),
+    'User'
+from auth.users u
+where not exists (select 1 from public.profiles p where p.id = u.id);
+
+-- Let PostgREST embed the author's name in audit queries:
+-- select=...,profile_names(full_name)
+alter table public.purchase_request_audit
+    add constraint purchase_request_audit_user_id_profiles_fkey
+    foreign key (user_id) references public.profiles(id);
+
+-- Per-PRF history, newest first. id breaks ties between entries written in
+-- the same transaction so keyset pages never skip or repeat a row.
+create index if not exists idx_pr_audit_pr_id_created_at
+    on public.purchase_request_audit (purchase_request_id, created_at desc, id desc);
+
+-- Cross-PRF admin feed, read newest first with keyset pagination
+create index if not exists idx_pr_audit_created_at_id
+    on public.purchase_request_audit (created_at desc, id desc);
@@ -0,0 +1,139 @@
+-- Set-based status changes for the bulk approve/reject actions.
+-- Each function checks every requested row against the allowed transitions,
+-- updates the valid ones in a single statement and returns one outcome row
+-- per requested id, so approving 50 forms is one round trip.
+-- Transitions mirror PurchaseRequestManager._is_valid_status_transition.
+-- Both run as the caller, so the update policies still apply.
+
+create or replace function public.bulk_update_purchase_request_status(
+    p_ids uuid[],
+    p_status text,
+    p_remarks text default null
+)
+returns table (id uuid, updated boolean, previous_status text, error text)
+language sql
+set search_path = public
+as $$
+    with requested as (
+        select distinct unnest(p_ids) as id
+    ),
+    current_rows as (
+        select pr.id, pr.status
+        from public.purchase_requests pr
+        join requested r on r.id = pr.id
+        for update of pr
+    ),
+    valid as (
+        select c.id
+        from current_rows c
+        join (values
+            ('draft', 'pending'),
+            ('pending', 'approved'),
+            ('pending', 'rejected'),
+            ('rejected', 'pending')
+        ) as t(from_status, to_status)
+            on t.from_status = c.status and t.to_status = p_status
+    ),
+    allowed as (
+        -- Only approvers may approve or reject
+        select v.id
+        from valid v
+        where p_status = 'pending'
+            or (select public.current_user_role()) in ('Finance', 'Admin')
+    ),
+    changed as (
+        -- on_purchase_request_status_change logs status_changed for every row
+        update public.purchase_requests pr
+        set status = p_status,
+            remarks = coalesce(p_remarks, pr.remarks),
+            updated_at = now()
+        from allowed a
+        where pr.id = a.id
+        returning pr.id
+    ),
+    comments as (
+        insert into public.purchase_request_audit (purchase_request_id, user_id, action, details)
+        select c.id, auth.uid(), 'comment_added', p_remarks
+        from changed c
+        where p_remarks is not null
+    )
+    select
+        r.id,
+        ch.id is not null,
+        c.status,
+        case
+            when c.id is null then 'Purchase request not found'
+            when ch.id is not null then null
+            when v.id is null then format('Cannot change status from %s to %s', c.status, p_status)
+            else 'Not permitted'
+        end
+    from requested r
+    left join current_rows c on c.id = r.id
+    left join valid v on v.id = r.id
+    left join changed ch on ch.id = r.id;
+$$;
+
+grant execute on function public.bulk_update_purchase_request_status(uuid[], text, text) to authenticated;
+
+create or replace function public.bulk_update_expense_form_status(
+    p_ids uuid[],
+    p_status text
+)
+returns table (id uuid, updated boolean, previous_status text, error text)
+language sql
+set search_path = public
+as $$
+    with requested as (
+        select distinct unnest(p_ids) as id
+    ),
+    current_rows as (
+        select erf.id, erf.status
+        from public.expense_reimbursement_forms erf
+        join requested r on r.id = erf.id
+        for update of erf
+    ),
+    valid as (
+        select c.id
+        from current_rows c
+        join (values
+            ('draft', 'pending'),
+            ('pending', 'approved'),
+            ('pending', 'rejected'),
+            ('rejected', 'pending')
+        ) as t(from_status, to_status)
+            on t.from_status = c.status and t.to_status = p_status
+    ),
+    allowed as (
+        -- Only approvers may approve or reject
+        select v.id
+        from valid v
+        where p_status = 'pending'
+            or (select public.current_user_role()) in ('Finance', 'Admin')
+    ),
+    changed as (
+        update public.expense_reimbursement_forms erf
+        set status = p_status,
+            approved_by = case when p_status = 'approved' then auth.uid() else erf.approved_by end,
+            approved_at = case when p_status = 'approved' then now() else erf.approved_at end,
+            updated_at = now()
+        from allowed a
+        where erf.id = a.id
+        returning erf.id
+    )
+    select
+        r.id,
+        ch.id is not null,
+        c.status,
+        case
+            when c.id is null then 'Expense form not found'
+            when ch.id is not null then null
+            when v.id is null then format('Cannot change status from %s to %s', c.status, p_status)
+            else 'Not permitted'
+        end
+    from requested r
+    left join current_rows c on c.id = r.id
+    left join valid v on v.id = r.id
+    left join changed ch on ch.id = r.id;
+$$;
+
+grant execute on function public.bulk_update_expense_form_status(uuid[], text) to authenticated;
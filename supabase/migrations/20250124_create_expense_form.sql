@@ -0,0 +1,90 @@
+-- Create an ERF and all of its items in one transaction and one round trip.
+
+-- Last ERF number handed out per year; numbers restart at 001 every year
+create table if not exists public.erf_number_counters (
+    year integer primary key,
+    last_number integer not null
+);
+
+alter table public.erf_number_counters enable row level security;
+
+-- Next YYYY-NNN form number. Only create_expense_form calls it; the row
+-- lock is held until the calling transaction ends, so a rolled back ERF
+-- doesn't leave a gap.
+create or replace function public.next_erf_number(p_year integer)
+returns text
+language sql
+security definer
+set search_path = public
+as $$
+    insert into public.erf_number_counters as c (year, last_number)
+    values (p_year, 1)
+    on conflict (year) do update set last_number = c.last_number + 1
+    returning p_year || '-' || lpad(last_number::text, 3, '0');
+$$;
+
+revoke execute on function public.next_erf_number(integer) from public, anon, authenticated;
+
+-- Insert the header and items, then return the form with its items as the
+-- create path's only response. Runs as the owner so it can number the form;
+-- in place of the insert policies it only creates forms for the caller and
+-- only as draft or pending. The header total is the sum of the items.
+create or replace function public.create_expense_form(
+    p_form jsonb,
+    p_items jsonb default '[]'::jsonb
+)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    header public.expense_reimbursement_forms;
+    form public.expense_reimbursement_forms;
+    items jsonb;
+begin
+    select * into header
+    from jsonb_populate_record(null::public.expense_reimbursement_forms, p_form);
+
+    if header.employee_id is distinct from auth.uid() then
+        raise exception 'expense forms can only be created for yourself'
+            using errcode = '42501';
+    end if;
+
+    insert into public.expense_reimbursement_forms (
+        form_number, employee_id, designation, date, total_amount, status
+    )
+    values (
+        public.next_erf_number(extract(year from coalesce(header.date, current_date))::integer),
+        header.employee_id,
+        header.designation,
+        header.date,
+        case
+            when jsonb_array_length(p_items) > 0 then (
+                select sum(i.amount)
+                from jsonb_populate_recordset(null::public.expense_items, p_items) i
+            )
+            else coalesce(header.total_amount, 0)
+        end,
+        case when header.status = 'pending' then 'pending' else 'draft' end
+    )
+    returning * into form;
+
+    with inserted as (
+        insert into public.expense_items (
+            erf_id, date, description, payee, reference_number, amount, account
+        )
+        select form.id, i.date, i.description, i.payee, i.reference_number, i.amount, i.account
+        from jsonb_populate_recordset(null::public.expense_items, p_items) with ordinality as i
+        order by i.ordinality
+        returning *
+    )
+    select coalesce(jsonb_agg(to_jsonb(inserted)), '[]'::jsonb) into items
+    from inserted;
+
+    return to_jsonb(form) || jsonb_build_object('items', items);
+end;
+$$;
+
+revoke execute on function public.create_expense_form(jsonb, jsonb) from public, anon;
+grant execute on function public.create_expense_form(jsonb, jsonb) to authenticated;
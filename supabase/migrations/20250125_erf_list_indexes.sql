@@ -0,0 +1,11 @@
+-- Indexes behind ExpenseManager.get_expense_forms. Pages are read newest
+-- first on (created_at, id), optionally within one status or employee, and
+-- the page's items are embedded by erf_id.
+create index if not exists idx_erf_created_at_id
+    on public.expense_reimbursement_forms (created_at desc, id desc);
+create index if not exists idx_erf_status_created_at_id
+    on public.expense_reimbursement_forms (status, created_at desc, id desc);
+create index if not exists idx_erf_employee_created_at_id
+    on public.expense_reimbursement_forms (employee_id, created_at desc, id desc);
+create index if not exists idx_expense_items_erf_id
+    on public.expense_items (erf_id);
@@ -0,0 +1,122 @@
+-- Line and header totals kept by the database, so a header read on its own
+-- carries the right total and clients never send totals they computed.
+
+-- total_price is derived from quantity and unit_price; clients must no
+-- longer write it. The numeric(15,2) cast rounds half away from zero, like
+-- the models' ROUND_HALF_UP.
+alter table public.purchase_request_items drop column if exists total_price;
+alter table public.purchase_request_items
+    add column total_price numeric(15, 2)
+    generated always as ((quantity * unit_price)::numeric(15, 2)) stored;
+
+-- Recompute the header total of every parent touched by a statement.
+-- Arguments: header table, parent id column on the line table, and the
+-- total over that parent's lines (l). Statement level with transition
+-- tables, so inserting or deleting a whole form's lines updates its header
+-- once. Runs as the owner: totals are derived data and must stay right
+-- even where the caller can't update the header, e.g. after approval.
+create or replace function public.refresh_header_totals()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    header_table text := tg_argv[0];
+    parent_column text := tg_argv[1];
+    total_expression text := tg_argv[2];
+    changed text;
+begin
+    changed := case tg_op
+        when 'INSERT' then format('select %I from new_lines', parent_column)
+        when 'DELETE' then format('select %I from old_lines', parent_column)
+        else format('select %1$I from new_lines union select %1$I from old_lines', parent_column)
+    end;
+
+    execute format(
+        'update public.%1$I h
+            set total_amount = t.total
+           from (
+                select p.id, coalesce((select %4$s from public.%2$I l where l.%3$I = p.id), 0) as total
+                  from (%5$s) p(id)
+           ) t
+          where h.id = t.id
+            and h.total_amount is distinct from t.total',
+        header_table, tg_table_name, parent_column, total_expression, changed
+    );
+    return null;
+end;
+$$;
+
+-- Transition tables allow only one event per trigger
+create trigger purchase_request_items_total_insert
+    after insert on public.purchase_request_items
+    referencing new table as new_lines
+    for each statement execute function public.refresh_header_totals(
+        'purchase_requests', 'purchase_request_id', 'sum(l.total_price)');
+create trigger purchase_request_items_total_update
+    after update on public.purchase_request_items
+    referencing old table as old_lines new table as new_lines
+    for each statement execute function public.refresh_header_totals(
+        'purchase_requests', 'purchase_request_id', 'sum(l.total_price)');
+create trigger purchase_request_items_total_delete
+    after delete on public.purchase_request_items
+    referencing old table as old_lines
+    for each statement execute function public.refresh_header_totals(
+        'purchase_requests', 'purchase_request_id', 'sum(l.total_price)');
+
+create trigger expense_items_total_insert
+    after insert on public.expense_items
+    referencing new table as new_lines
+    for each statement execute function public.refresh_header_totals(
+        'expense_reimbursement_forms', 'erf_id', 'sum(l.amount)');
+create trigger expense_items_total_update
+    after update on public.expense_items
+    referencing old table as old_lines new table as new_lines
+    for each statement execute function public.refresh_header_totals(
+        'expense_reimbursement_forms', 'erf_id', 'sum(l.amount)');
+create trigger expense_items_total_delete
+    after delete on public.expense_items
+    referencing old table as old_lines
+    for each statement execute function public.refresh_header_totals(
+        'expense_reimbursement_forms', 'erf_id', 'sum(l.amount)');
+
+-- A voucher balances, so its total is the larger of the two sides
+create trigger voucher_entries_total_insert
+    after insert on public.voucher_entries
+    referencing new table as new_lines
+    for each statement execute function public.refresh_header_totals(
+        'vouchers', 'voucher_id',
+        'greatest(coalesce(sum(l.debit_amount), 0), coalesce(sum(l.credit_amount), 0))');
+create trigger voucher_entries_total_update
+    after update on public.voucher_entries
+    referencing old table as old_lines new table as new_lines
+    for each statement execute function public.refresh_header_totals(
+        'vouchers', 'voucher_id',
+        'greatest(coalesce(sum(l.debit_amount), 0), coalesce(sum(l.credit_amount), 0))');
+create trigger voucher_entries_total_delete
+    after delete on public.voucher_entries
+    referencing old table as old_lines
+    for each statement execute function public.refresh_header_totals(
+        'vouchers', 'voucher_id',
+        'greatest(coalesce(sum(l.debit_amount), 0), coalesce(sum(l.credit_amount), 0))');
+
+-- Bring existing headers in line with their lines
+update public.purchase_requests h
+   set total_amount = t.total
+  from (select purchase_request_id as id, sum(total_price) as total
+          from public.purchase_request_items group by purchase_request_id) t
+ where h.id = t.id and h.total_amount is distinct from t.total;
+
+update public.expense_reimbursement_forms h
+   set total_amount = t.total
+  from (select erf_id as id, sum(amount) as total
+          from public.expense_items group by erf_id) t
+ where h.id = t.id and h.total_amount is distinct from t.total;
+
+update public.vouchers h
+   set total_amount = t.total
+  from (select voucher_id as id,
+               greatest(coalesce(sum(debit_amount), 0), coalesce(sum(credit_amount), 0)) as total
+          from public.voucher_entries group by voucher_id) t
+ where h.id = t.id and h.total_amount is distinct from t.total;
@@ -0,0 +1,90 @@
+-- updated_at is the version token of ERFs and vouchers: conditional updates
+-- only apply to the version the client read. Set it from the database
+-- clock on every update so clients can't skew it or move it backwards.
+create or replace function public.update_updated_at_column()
+returns trigger as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists update_expense_reimbursement_forms_updated_at on public.expense_reimbursement_forms;
+create trigger update_expense_reimbursement_forms_updated_at
+    before update on public.expense_reimbursement_forms
+    for each row
+    execute function public.update_updated_at_column();
+
+drop trigger if exists update_vouchers_updated_at on public.vouchers;
+create trigger update_vouchers_updated_at
+    before update on public.vouchers
+    for each row
+    execute function public.update_updated_at_column();
+
+-- Update a voucher's header and replace its entries in one transaction.
+-- With p_expected_updated_at, only the version read at is updated; null is
+-- returned when the voucher is gone or has changed since, and nothing is
+-- written. The total is left to the voucher_entries triggers. Returns the
+-- voucher with its entries. Runs as the caller, so the update policies on
+-- both tables still apply.
+create or replace function public.update_voucher(
+    p_voucher jsonb,
+    p_entries jsonb default '[]'::jsonb,
+    p_expected_updated_at timestamptz default null
+)
+returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+    header public.vouchers;
+    voucher public.vouchers;
+    entries jsonb;
+begin
+    select * into header
+    from jsonb_populate_record(null::public.vouchers, p_voucher);
+
+    update public.vouchers v
+       set date = header.date,
+           payee = header.payee,
+           particulars = header.particulars,
+           bank_name = header.bank_name,
+           transaction_type = header.transaction_type,
+           reference_number = header.reference_number,
+           payee_bank_account = header.payee_bank_account,
+           form_type = header.form_type,
+           form_number = header.form_number,
+           form_date = header.form_date,
+           requested_by = header.requested_by,
+           status = header.status,
+           voucher_number = header.voucher_number
+     where v.id = header.id
+       and (p_expected_updated_at is null or v.updated_at = p_expected_updated_at);
+
+    if not found then
+        return null;
+    end if;
+
+    delete from public.voucher_entries where voucher_id = header.id;
+
+    with inserted as (
+        insert into public.voucher_entries (
+            voucher_id, account_title, activity, debit_amount, credit_amount
+        )
+        select header.id, e.account_title, e.activity, e.debit_amount, e.credit_amount
+        from jsonb_populate_recordset(null::public.voucher_entries, p_entries) with ordinality as e
+        order by e.ordinality
+        returning *
+    )
+    select coalesce(jsonb_agg(to_jsonb(inserted)), '[]'::jsonb) into entries
+    from inserted;
+
+    -- Read back after the entries triggers have updated the total
+    select * into voucher from public.vouchers where id = header.id;
+
+    return to_jsonb(voucher) || jsonb_build_object('entries', entries);
+end;
+$$;
+
+revoke execute on function public.update_voucher(jsonb, jsonb, timestamptz) from public, anon;
+grant execute on function public.update_voucher(jsonb, jsonb, timestamptz) to authenticated;
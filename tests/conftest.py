@@ -0,0 +1,98 @@
+"""Shared fixtures for offline tests against the in-memory Supabase stand-in"""
+import uuid
+
+import pytest
+
+from fake_supabase import FakeSupabase
+
+REQUESTOR_ID = '00000000-0000-0000-0000-000000000001'
+
+def seed(client, prfs=20, items_per_prf=5, erfs=10, items_per_erf=3, vouchers=5, entries_per_voucher=4):
+    """Fill a fake client with a small but realistic data set"""
+    tables = client.tables
+    tables['profiles'] = [{
+        'id': REQUESTOR_ID, 'first_name': 'Kevin', 'last_name': 'Santos',
+        'email': 'kevin@vivita.ph', 'role': 'Finance'
+    }]
+    tables['suppliers'] = [
+        {
+            'id': str(uuid.uuid4()), 'name': f"Supplier {i}", 'contact_person': f"Contact {i}",
+            'phone': '0917', 'email': f"s{i}@example.com", 'address': 'Cebu City',
+            'tax_id': '123', 'preferred_payment_method': 'Bank Transfer',
+            'bank_details': {'bank_name': 'BPI', 'account_name': f"Supplier {i}", 'account_number': '0001'},
+            'created_at': client.now(), 'updated_at': client.now()
+        }
+        for i in range(3)
+    ]
+
+    statuses = ['draft', 'pending', 'approved', 'rejected']
+    tables['purchase_requests'], tables['purchase_request_items'] = [], []
+    for i in range(prfs):
+        pr_id = str(uuid.uuid4())
+        stamp = client.now()
+        tables['purchase_requests'].append({
+            'id': pr_id, 'form_number': f"PRF-2025-{i + 1:04d}", 'requestor_id': REQUESTOR_ID,
+            'supplier_id': tables['suppliers'][i % 3]['id'], 'status': statuses[i % 4],
+            'total_amount': 50.0 * items_per_prf, 'remarks': None,
+            'created_at': stamp, 'updated_at': stamp
+        })
+        for j in range(items_per_prf):
+            tables['purchase_request_items'].append({
+                'id': str(uuid.uuid4()), 'purchase_request_id': pr_id,
+                'item_description': f"Item {j}", 'quantity': 2.0, 'unit': 'pcs',
+                'unit_price': 25.0, 'total_price': 50.0, 'account_code': '6008',
+                'remarks': None, 'created_at': stamp, 'updated_at': stamp
+            })
+    client.sequences['prf_number_seq'] = prfs
+
+    tables['expense_reimbursement_forms'], tables['expense_items'] = [], []
+    for i in range(erfs):
+        erf_id = str(uuid.uuid4())
+        stamp = client.now()
+        tables['expense_reimbursement_forms'].append({
+            'id': erf_id, 'form_number': f"2025-{i + 1:03d}", 'employee_id': REQUESTOR_ID,
+            'designation': 'Finance', 'date': '2025-01-15', 'total_amount': 300.0 * items_per_erf,
+            'status': statuses[i % 4], 'approved_by': None, 'approved_at': None,
+            'created_at': stamp, 'updated_at': stamp
+        })
+        for j in range(items_per_erf):
+            tables['expense_items'].append({
+                'id': str(uuid.uuid4()), 'erf_id': erf_id, 'date': '2025-01-15',
+                'description': f"Taxi {j}", 'payee': 'Grab', 'amount': 300.0,
+                'account': '6005', 'reference_number': None,
+                'created_at': stamp, 'updated_at': stamp
+            })
+
+    client.sequences['erf_number_2025'] = erfs
+
+    tables['vouchers'], tables['voucher_entries'] = [], []
+    for i in range(vouchers):
+        voucher_id = str(uuid.uuid4())
+        stamp = client.now()
+        tables['vouchers'].append({
+            'id': voucher_id, 'voucher_number': f"CV-2025-{i + 1:04d}", 'date': '2025-01-20',
+            'payee': 'Supplier 0', 'total_amount': 200.0, 'particulars': 'Supplies',
+            'prepared_by': REQUESTOR_ID, 'bank_name': 'BPI', 'transaction_type': 'Check',
+            'reference_number': None, 'payee_bank_account': None, 'form_type': None,
+            'form_number': None, 'form_date': None, 'requested_by': None, 'status': 'draft',
+            'created_at': stamp, 'updated_at': stamp
+        })
+        for j in range(entries_per_voucher):
+            tables['voucher_entries'].append({
+                'id': str(uuid.uuid4()), 'voucher_id': voucher_id,
+                'account_title': 'Supplies Expense', 'activity': None,
+                'debit_amount': 100.0 if j % 2 == 0 else None,
+                'credit_amount': None if j % 2 == 0 else 100.0,
+                'created_at': stamp, 'updated_at': stamp
+            })
+    return client
+
+@pytest.fixture
+def fake_client():
+    return FakeSupabase()
+
+@pytest.fixture
+def seeded_client():
+    client = seed(FakeSupabase())
+    client.reset_counts()
+    return client
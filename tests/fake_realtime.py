@@ -0,0 +1,53 @@
+"""Local stand-in for the Supabase Realtime websocket used by offline tests"""
+import asyncio
+
+class FakeChannel:
+    def __init__(self, server):
+        self.server = server
+        self.bindings = []
+
+    def on_postgres_changes(self, event, schema, table, callback):
+        self.bindings.append((table, callback))
+        return self
+
+    async def subscribe(self, callback=None):
+        self.server.channels.append(self)
+        if callback is not None:
+            callback('SUBSCRIBED', None)
+        return self
+
+class FakeRealtime:
+    """Delivers pushed change events over an asyncio queue instead of a socket"""
+
+    def __init__(self):
+        self.channels = []
+        self.queue = None
+        self.subscribed = asyncio.Event()
+
+    async def connect(self):
+        self.queue = asyncio.Queue()
+
+    def channel(self, name):
+        return FakeChannel(self)
+
+    async def listen(self):
+        self.subscribed.set()
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                return
+            table, payload = message
+            for channel in self.channels:
+                for bound_table, callback in channel.bindings:
+                    if bound_table == table:
+                        callback(payload)
+
+    async def push(self, table, payload):
+        await self.queue.put((table, payload))
+
+    async def close(self):
+        await self.queue.put(None)
+
+class FakeRealtimeClient:
+    def __init__(self):
+        self.realtime = FakeRealtime()
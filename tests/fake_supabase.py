@@ -0,0 +1,506 @@
+"""In-memory stand-in for the Supabase client used by offline tests and benchmarks.
+
+Implements the subset of the PostgREST query builder the managers use
+(table/select/eq/neq/in_/gt/gte/lt/lte/or_/range/order/limit/single/insert/
+update/delete and rpc) over plain lists of dicts. Every ``execute()`` counts
+as one round trip and can sleep for a configurable simulated latency.
+"""
+import copy
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
+
+class FakeAPIError(Exception):
+    """Raised where PostgREST would answer with an error"""
+
+def _profile_names(tables):
+    """The profile_names view: id and full name only"""
+    return [
+        {
+            'id': profile['id'],
+            'full_name': ' '.join(filter(None, [profile.get('first_name'), profile.get('last_name')])) or None
+        }
+        for profile in tables.get('profiles', [])
+    ]
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+def _like(pattern, case_insensitive):
+    regex = '^' + re.escape(pattern).replace('%', '.*').replace('_', '.') + '$'
+    return re.compile(regex, re.IGNORECASE if case_insensitive else 0)
+
+def _compare(op, column, value):
+    """Build a row predicate for a PostgREST operator"""
+    if op == 'eq':
+        return lambda row: str(row.get(column)) == str(value)
+    if op == 'neq':
+        return lambda row: str(row.get(column)) != str(value)
+    if op in ('gt', 'gte', 'lt', 'lte'):
+        check = {
+            'gt': lambda a, b: a > b,
+            'gte': lambda a, b: a >= b,
+            'lt': lambda a, b: a < b,
+            'lte': lambda a, b: a <= b,
+        }[op]
+        return lambda row: row.get(column) is not None and check(row[column], type(row[column])(value))
+    if op in ('like', 'ilike'):
+        regex = _like(str(value), op == 'ilike')
+        return lambda row: row.get(column) is not None and bool(regex.match(str(row[column])))
+    if op == 'in':
+        values = {str(v) for v in value}
+        return lambda row: str(row.get(column)) in values
+    if op == 'is':
+        return lambda row: row.get(column) is None if value in (None, 'null') else row.get(column) == value
+    raise FakeAPIError(f"Unsupported operator: {op}")
+
+def _split_top_level(expression):
+    parts, depth, current = [], 0, ''
+    for char in expression:
+        if char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        current += char
+    parts.append(current)
+    return parts
+
+def _parse_condition(part):
+    if part.startswith(('and(', 'or(')):
+        combine = all if part.startswith('and(') else any
+        inner = [_parse_condition(p) for p in _split_top_level(part[part.index('(') + 1:-1])]
+        return lambda row: combine(p(row) for p in inner)
+    column, op, value = part.split('.', 2)
+    if op == 'in':
+        value = [v.strip() for v in value.strip('()').split(',')]
+    return _compare(op, column, value)
+
+def _parse_or(expression):
+    """Parse a PostgREST or=() expression like 'name.ilike.%a%,and(a.eq.1,b.lt.2)'"""
+    predicates = [_parse_condition(part) for part in _split_top_level(expression)]
+    return lambda row: any(p(row) for p in predicates)
+
+class FakeQuery:
+    """Chainable query mirroring postgrest's request builder"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.operation = 'select'
+        self.columns = '*'
+        self.count = None
+        self.filters = []
+        self.ordering = []
+        self.row_range = None
+        self.row_limit = None
+        self.single_row = False
+        self.payload = None
+
+    # Operations
+
+    def select(self, columns='*', count=None):
+        self.columns = columns
+        self.count = count
+        return self
+
+    def insert(self, payload):
+        self.operation = 'insert'
+        self.payload = payload
+        return self
+
+    def update(self, payload):
+        self.operation = 'update'
+        self.payload = payload
+        return self
+
+    def delete(self):
+        self.operation = 'delete'
+        return self
+
+    # Filters
+
+    def eq(self, column, value):
+        self.filters.append(_compare('eq', column, value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(_compare('neq', column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(_compare('in', column, values))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(_compare('gt', column, value))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(_compare('gte', column, value))
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(_compare('lt', column, value))
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(_compare('lte', column, value))
+        return self
+
+    def ilike(self, column, pattern):
+        self.filters.append(_compare('ilike', column, pattern))
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(_compare('is', column, value))
+        return self
+
+    def or_(self, expression):
+        self.filters.append(_parse_or(expression))
+        return self
+
+    # Modifiers
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.row_range = (start, end)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def execute(self):
+        self.client.record(self.table_name, self.operation)
+        with self.client.lock:
+            return getattr(self, f"_execute_{self.operation}")()
+
+    def _matching(self):
+        view = self.client.views.get(self.table_name)
+        rows = view(self.client.tables) if view else self.client.tables.setdefault(self.table_name, [])
+        return [row for row in rows if all(f(row) for f in self.filters)]
+
+    def _execute_select(self):
+        matched = self._matching()
+        for column, desc in reversed(self.ordering):
+            matched.sort(key=lambda row: (row.get(column) is not None, row.get(column) or ''), reverse=desc)
+        total = len(matched)
+        if self.row_range:
+            matched = matched[self.row_range[0]:self.row_range[1] + 1]
+        if self.row_limit is not None:
+            matched = matched[:self.row_limit]
+
+        data = [self._project(row) for row in matched]
+
+        if self.single_row:
+            if len(data) != 1:
+                raise FakeAPIError("JSON object requested, multiple (or no) rows returned")
+            return FakeResponse(data[0], total if self.count else None)
+        return FakeResponse(data, total if self.count else None)
+
+    def _project(self, row):
+        columns = [c.strip() for c in _split_top_level(self.columns)]
+        if '*' in columns:
+            projected = copy.deepcopy(row)
+        else:
+            projected = {c: copy.deepcopy(row.get(c)) for c in columns if '(' not in c}
+        for column in columns:
+            if '(' in column:
+                table, inner = column[:-1].split('(', 1)
+                projected[table] = self._embed(row, table.strip(), inner)
+        return projected
+
+    def _embed(self, row, table, columns):
+        """Resolve an embedded resource through client.foreign_keys.
+
+        Many-to-one embeds give a single row or None; one-to-many embeds
+        listed in client.embedded_lists give a list of rows.
+        """
+        local, remote = self.client.foreign_keys[(self.table_name, table)]
+        matches = []
+        view = self.client.views.get(table)
+        targets = view(self.client.tables) if view else self.client.tables.get(table, [])
+        for target in targets:
+            if str(target.get(remote)) == str(row.get(local)):
+                if columns.strip() == '*':
+                    matches.append(copy.deepcopy(target))
+                else:
+                    matches.append({c.strip(): copy.deepcopy(target.get(c.strip())) for c in columns.split(',')})
+        if (self.table_name, table) in self.client.embedded_lists:
+            return matches
+        return matches[0] if matches else None
+
+    def _execute_insert(self):
+        rows = self.client.tables.setdefault(self.table_name, [])
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        created = []
+        for row in payload:
+            self.client.check_generated(self.table_name, row)
+            now = self.client.now()
+            row = {'id': str(uuid.uuid4()), 'created_at': now, 'updated_at': now, **row}
+            self.client.generate(self.table_name, row)
+            for column, unique in self.client.unique_columns.get(self.table_name, ()):
+                if any(existing.get(column) == row.get(column) for existing in rows):
+                    raise FakeAPIError(
+                        f"{{'code': '23505', 'message': 'duplicate key value violates unique constraint \"{unique}\"'}}"
+                    )
+            rows.append(row)
+            created.append(copy.deepcopy(row))
+        self.client.refresh_totals(self.table_name, created)
+        return FakeResponse(created)
+
+    def _execute_update(self):
+        self.client.check_generated(self.table_name, self.payload)
+        matched = self._matching()
+        before = copy.deepcopy(matched)
+        for row in matched:
+            row.update(copy.deepcopy(self.payload))
+            row['updated_at'] = self.client.now()
+            self.client.generate(self.table_name, row)
+        self.client.refresh_totals(self.table_name, before + matched)
+        return FakeResponse(copy.deepcopy(matched))
+
+    def _execute_delete(self):
+        matched = self._matching()
+        ids = {id(row) for row in matched}
+        self.client.tables[self.table_name] = [
+            row for row in self.client.tables.get(self.table_name, []) if id(row) not in ids
+        ]
+        self.client.refresh_totals(self.table_name, matched)
+        return FakeResponse(copy.deepcopy(matched))
+
+def _numeric(value):
+    return Decimal(str(value or 0))
+
+def _numeric_column(value):
+    # numeric(15,2) comes back from PostgREST as a JSON number
+    return float(Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+class FakeRPC:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def execute(self):
+        self.client.record('rpc', self.name)
+        if self.name not in self.client.functions:
+            raise FakeAPIError(f"Could not find the function public.{self.name}")
+        with self.client.lock:
+            return FakeResponse(self.client.functions[self.name](self.client, **self.params))
+
+def _generate_prf_number(client):
+    client.sequences['prf_number_seq'] += 1
+    return f"PRF-2025-{client.sequences['prf_number_seq']:04d}"
+
+# Mirrors the transitions table of the bulk_update_*_status functions
+_STATUS_TRANSITIONS = {
+    ('draft', 'pending'), ('pending', 'approved'), ('pending', 'rejected'), ('rejected', 'pending'),
+}
+
+def _bulk_update_status(client, table, ids, status, extra=None, audit=None):
+    rows = {row['id']: row for row in client.tables.get(table, [])}
+    outcomes = []
+    for row_id in dict.fromkeys(ids):
+        row = rows.get(row_id)
+        if row is None:
+            outcomes.append({'id': row_id, 'updated': False, 'previous_status': None, 'error': 'Not found'})
+            continue
+        previous = row['status']
+        if (previous, status) not in _STATUS_TRANSITIONS:
+            outcomes.append({
+                'id': row_id, 'updated': False, 'previous_status': previous,
+                'error': f"Cannot change status from {previous} to {status}"
+            })
+            continue
+        row.update(status=status, updated_at=client.now(), **(extra or {}))
+        if audit:
+            client.tables.setdefault('purchase_request_audit', []).extend(audit(row, previous))
+        outcomes.append({'id': row_id, 'updated': True, 'previous_status': previous, 'error': None})
+    return outcomes
+
+def _bulk_update_purchase_request_status(client, p_ids, p_status, p_remarks=None):
+    def audit(row, previous):
+        entries = [('status_changed', f"Status changed from {previous} to {p_status}")]
+        if p_remarks is not None:
+            entries.append(('comment_added', p_remarks))
+        return [
+            {'id': str(uuid.uuid4()), 'purchase_request_id': row['id'], 'user_id': None,
+             'action': action, 'details': details, 'created_at': client.now()}
+            for action, details in entries
+        ]
+
+    extra = {'remarks': p_remarks} if p_remarks is not None else {}
+    return _bulk_update_status(client, 'purchase_requests', p_ids, p_status, extra, audit)
+
+def _bulk_update_expense_form_status(client, p_ids, p_status):
+    extra = {'approved_at': client.now()} if p_status == 'approved' else {}
+    return _bulk_update_status(client, 'expense_reimbursement_forms', p_ids, p_status, extra)
+
+def _create_expense_form(client, p_form, p_items=()):
+    year = str(p_form.get('date') or client.now())[:4]
+    client.sequences[f"erf_number_{year}"] += 1
+    stamp = client.now()
+    total = sum(float(item['amount']) for item in p_items) if p_items else float(p_form.get('total_amount') or 0)
+    form = {
+        'id': str(uuid.uuid4()), 'form_number': f"{year}-{client.sequences[f'erf_number_{year}']:03d}",
+        'employee_id': p_form['employee_id'], 'designation': p_form.get('designation'),
+        'date': p_form.get('date'), 'total_amount': total, 'status': 'pending' if p_form.get('status') == 'pending' else 'draft',
+        'approved_by': None, 'approved_at': None, 'created_at': stamp, 'updated_at': stamp
+    }
+    items = [
+        {
+            'id': str(uuid.uuid4()), 'erf_id': form['id'], 'date': item.get('date'),
+            'description': item.get('description'), 'payee': item.get('payee'),
+            'reference_number': item.get('reference_number'), 'amount': float(item['amount']),
+            'account': item.get('account'), 'created_at': stamp, 'updated_at': stamp
+        }
+        for item in p_items
+    ]
+    client.tables.setdefault('expense_reimbursement_forms', []).append(form)
+    client.tables.setdefault('expense_items', []).extend(items)
+    return {**copy.deepcopy(form), 'items': copy.deepcopy(items)}
+
+def _update_voucher(client, p_voucher, p_entries=(), p_expected_updated_at=None):
+    voucher = next((row for row in client.tables.get('vouchers', []) if row['id'] == p_voucher['id']), None)
+    if voucher is None or (p_expected_updated_at and voucher['updated_at'] != p_expected_updated_at):
+        return None
+    voucher.update({k: v for k, v in p_voucher.items() if k != 'id'}, updated_at=client.now())
+    old = [row for row in client.tables.get('voucher_entries', []) if row['voucher_id'] == voucher['id']]
+    client.tables['voucher_entries'] = [row for row in client.tables.get('voucher_entries', []) if row['voucher_id'] != voucher['id']]
+    stamp = client.now()
+    entries = [
+        {
+            'id': str(uuid.uuid4()), 'voucher_id': voucher['id'], 'account_title': entry.get('account_title'),
+            'activity': entry.get('activity'), 'debit_amount': entry.get('debit_amount'),
+            'credit_amount': entry.get('credit_amount'), 'created_at': stamp, 'updated_at': stamp
+        }
+        for entry in p_entries
+    ]
+    client.tables['voucher_entries'].extend(entries)
+    client.refresh_totals('voucher_entries', old + entries)
+    return {**copy.deepcopy(voucher), 'entries': copy.deepcopy(entries)}
+
+class FakeSupabase:
+    """Supabase client stand-in with in-memory tables, request counting and latency.
+
+    Args:
+        latency (float): Seconds each request sleeps, simulating a network round trip.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {}
+        self.requests = []
+        self.lock = threading.RLock()
+        self.sequences = Counter()
+        self.functions = {
+            'generate_prf_number': _generate_prf_number,
+            'bulk_update_purchase_request_status': _bulk_update_purchase_request_status,
+            'bulk_update_expense_form_status': _bulk_update_expense_form_status,
+            'create_expense_form': _create_expense_form,
+            'update_voucher': _update_voucher,
+        }
+        self.unique_columns = {'purchase_requests': [('form_number', 'purchase_requests_form_number_key')]}
+        # (table, embedded table) -> (local column, remote column)
+        self.foreign_keys = {
+            ('purchase_request_audit', 'profiles'): ('user_id', 'id'),
+            ('purchase_request_audit', 'profile_names'): ('user_id', 'id'),
+            ('purchase_request_audit', 'purchase_requests'): ('purchase_request_id', 'id'),
+            ('expense_reimbursement_forms', 'expense_items'): ('id', 'erf_id'),
+        }
+        self.embedded_lists = {('expense_reimbursement_forms', 'expense_items')}
+        # view -> rows computed from the tables, for embedding
+        self.views = {'profile_names': _profile_names}
+        # table -> {generated column: expression over the row}
+        self.generated_columns = {
+            'purchase_request_items': {
+                'total_price': lambda row: _numeric(row.get('quantity')) * _numeric(row.get('unit_price')),
+            },
+        }
+        # Header totals kept by the line item triggers:
+        # line table -> (header table, parent column, total of the header's lines)
+        self.maintained_totals = {
+            'purchase_request_items': (
+                'purchase_requests', 'purchase_request_id',
+                lambda lines: sum(_numeric(line.get('total_price')) for line in lines),
+            ),
+            'expense_items': (
+                'expense_reimbursement_forms', 'erf_id',
+                lambda lines: sum(_numeric(line.get('amount')) for line in lines),
+            ),
+            'voucher_entries': (
+                'vouchers', 'voucher_id',
+                lambda lines: max(sum(_numeric(line.get('debit_amount')) for line in lines),
+                                  sum(_numeric(line.get('credit_amount')) for line in lines)),
+            ),
+        }
+        self._clock = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    @property
+    def request_count(self):
+        return len(self.requests)
+
+    def reset_counts(self):
+        self.requests = []
+
+    def record(self, table, operation):
+        with self.lock:
+            self.requests.append((table, operation))
+        if self.latency:
+            time.sleep(self.latency)
+
+    def now(self):
+        # Strictly increasing timestamps, like updated_at triggers in practice
+        with self.lock:
+            self._clock += timedelta(seconds=1)
+            return self._clock.isoformat()
+
+    def check_generated(self, table, payload):
+        for row in payload if isinstance(payload, list) else [payload]:
+            for column in self.generated_columns.get(table, ()):
+                if column in row:
+                    raise FakeAPIError(
+                        f"{{'code': '428C9', 'message': 'cannot insert a non-DEFAULT value into column \"{column}\"'}}"
+                    )
+
+    def generate(self, table, row):
+        for column, expression in self.generated_columns.get(table, {}).items():
+            row[column] = _numeric_column(expression(row))
+
+    def refresh_totals(self, table, changed_rows):
+        """Recompute the header totals of changed lines, as the statement triggers do"""
+        if table not in self.maintained_totals:
+            return
+        header_table, parent_column, total = self.maintained_totals[table]
+        parents = {str(row.get(parent_column)) for row in changed_rows}
+        lines = [row for row in self.tables.get(table, []) if str(row.get(parent_column)) in parents]
+        for header in self.tables.get(header_table, []):
+            if header['id'] in parents:
+                new_total = _numeric_column(total([line for line in lines if str(line.get(parent_column)) == header['id']]))
+                if header.get('total_amount') != new_total:
+                    header['total_amount'] = new_total
+                    header['updated_at'] = self.now()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def from_(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return FakeRPC(self, name, params)
@@ -0,0 +1,151 @@
+"""Manager operations exercised by the round-trip and timing benchmarks"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from src.crud import ExpenseManager, PurchaseRequestManager, SupplierManager
+from src.crud.replica import PurchaseRequestReplica
+from src.models import (
+    ExpenseFormStatus,
+    ExpenseItem,
+    ExpenseReimbursementForm,
+    PurchaseRequest,
+    PurchaseRequestItem,
+    PurchaseRequestStatus,
+    Supplier,
+    Voucher,
+    VoucherEntry
+)
+
+def _first(client, table, **match):
+    for row in client.tables[table]:
+        if all(row.get(k) == v for k, v in match.items()):
+            return row
+
+def list_prfs(client):
+    return PurchaseRequestManager(client).get_purchase_requests(page=1, page_size=10)
+
+def list_prfs_with_items(client):
+    return PurchaseRequestManager(client).get_purchase_requests(page=1, page_size=10, include_items=True)
+
+def get_prf(client):
+    return PurchaseRequestManager(client).get_purchase_request(UUID(client.tables['purchase_requests'][0]['id']))
+
+def create_prf(client):
+    supplier_id = UUID(client.tables['suppliers'][0]['id'])
+    pr = PurchaseRequest(
+        requestor_id=UUID(client.tables['profiles'][0]['id']),
+        supplier_id=supplier_id,
+        status=PurchaseRequestStatus.DRAFT,
+        items=[
+            PurchaseRequestItem(
+                item_description=f"Item {i}", quantity=Decimal('2'), unit='pcs',
+                unit_price=Decimal('25'), total_price=Decimal('50'),
+                purchase_request_id=uuid.uuid4()
+            )
+            for i in range(3)
+        ]
+    )
+    return PurchaseRequestManager(client).create_purchase_request(pr)
+
+def approve_prf(client):
+    row = _first(client, 'purchase_requests', status='pending')
+    return PurchaseRequestManager(client).update_purchase_request_status(UUID(row['id']), PurchaseRequestStatus.APPROVED)
+
+def bulk_approve_prfs(client):
+    ids = [UUID(row['id']) for row in client.tables['purchase_requests'] if row['status'] == 'pending']
+    return PurchaseRequestManager(client).bulk_update_status(ids, PurchaseRequestStatus.APPROVED)
+
+def delete_prf(client):
+    row = _first(client, 'purchase_requests', status='draft')
+    return PurchaseRequestManager(client).delete_purchase_request(UUID(row['id']))
+
+def sync_idle_replica(client):
+    manager = PurchaseRequestManager(client)
+    replica = PurchaseRequestReplica({'status': ['pending']})
+    replica.sync(manager)
+    client.reset_counts()
+    replica.sync(manager)
+    return replica
+
+def list_suppliers(client):
+    return SupplierManager(client).list()
+
+def get_supplier(client):
+    return SupplierManager(client).get(UUID(client.tables['suppliers'][0]['id']))
+
+def create_supplier(client):
+    return SupplierManager(client).create(Supplier(name='New Supplier', email='new@example.com'))
+
+def list_erfs(client):
+    return ExpenseManager(client).list_erfs(status='pending')
+
+def list_erf_page(client):
+    return ExpenseManager(client).get_expense_forms(status=ExpenseFormStatus.PENDING)
+
+def get_erf_items(client):
+    return ExpenseManager(client).get_expense_items(UUID(client.tables['expense_reimbursement_forms'][0]['id']))
+
+def create_erf(client):
+    erf = ExpenseReimbursementForm(
+        employee_id=UUID(client.tables['profiles'][0]['id']), designation='Finance',
+        date=datetime(2025, 1, 20), status=ExpenseFormStatus.PENDING,
+        items=[
+            ExpenseItem(date=datetime(2025, 1, 20), description=f"Taxi {i}", payee='Grab',
+                        amount=Decimal('150'), account='6005')
+            for i in range(10)
+        ]
+    )
+    return ExpenseManager(client).create_expense_form(erf)
+
+def bulk_approve_erfs(client):
+    ids = [UUID(row['id']) for row in client.tables['expense_reimbursement_forms'] if row['status'] == 'pending']
+    return ExpenseManager(client).bulk_update_status(ids, ExpenseFormStatus.APPROVED)
+
+def list_vouchers(client):
+    return ExpenseManager(client).list_vouchers()
+
+def list_vouchers_with_entries(client):
+    return ExpenseManager(client).list_vouchers(view='detail')
+
+def get_voucher(client):
+    return ExpenseManager(client).get_voucher(UUID(client.tables['vouchers'][0]['id']))
+
+def create_voucher(client):
+    voucher = Voucher(
+        date=datetime(2025, 1, 20), payee='Supplier 0', total_amount=Decimal('200'),
+        particulars='Supplies', prepared_by=UUID(client.tables['profiles'][0]['id']),
+        entries=[
+            VoucherEntry(account_title='Supplies Expense', activity=None,
+                         debit_amount=Decimal('100') if i % 2 == 0 else None,
+                         credit_amount=None if i % 2 == 0 else Decimal('100'))
+            for i in range(4)
+        ]
+    )
+    return ExpenseManager(client).create_voucher(voucher)
+
+# Maximum round trips per operation; lowering a number is an improvement,
+# exceeding one is a regression.
+ROUND_TRIP_BUDGETS = {
+    list_prfs: 2,
+    list_prfs_with_items: 3,
+    get_prf: 2,
+    create_prf: 5,
+    approve_prf: 1,
+    bulk_approve_prfs: 1,
+    delete_prf: 2,
+    sync_idle_replica: 1,
+    list_suppliers: 1,
+    get_supplier: 1,
+    create_supplier: 1,
+    list_erfs: 1,
+    list_erf_page: 1,
+    get_erf_items: 1,
+    create_erf: 1,
+    bulk_approve_erfs: 1,
+    list_vouchers: 1,
+    list_vouchers_with_entries: 2,
+    get_voucher: 2,
+    create_voucher: 7,
+}
@@ -0,0 +1,64 @@
+from uuid import UUID
+
+from conftest import REQUESTOR_ID, seed
+from fake_supabase import FakeSupabase
+from src.crud import PurchaseRequestManager
+from src.models import AuditAction
+
+def seeded_with_audit(entries_per_prf=45):
+    client = seed(FakeSupabase(), prfs=3)
+    rows = []
+    for n in range(entries_per_prf):
+        # Pairs of entries share a timestamp, like rows written in one transaction
+        stamp = client.now() if n % 2 == 0 else rows[-1]['created_at']
+        for pr in client.tables['purchase_requests']:
+            rows.append({
+                'id': f"00000000-0000-0000-0000-{len(rows):012d}",
+                'purchase_request_id': pr['id'], 'user_id': REQUESTOR_ID,
+                'action': 'updated' if n % 3 else 'comment_added',
+                'details': None, 'created_at': stamp
+            })
+    client.tables['purchase_request_audit'] = rows
+    client.reset_counts()
+    return client
+
+def test_audit_trail_pages_cover_every_entry_once_with_names():
+    client = seeded_with_audit()
+    manager = PurchaseRequestManager(client)
+    pr_id = UUID(client.tables['purchase_requests'][0]['id'])
+
+    seen, page = [], manager.get_audit_trail(pr_id, limit=10)
+    while page:
+        seen.extend(page)
+        page = manager.get_audit_trail(pr_id, limit=10, before=page[-1])
+
+    assert len(seen) == 45
+    assert len({entry.id for entry in seen}) == 45
+    assert [e.timestamp for e in seen] == sorted((e.timestamp for e in seen), reverse=True)
+    assert all(entry.user_name == 'Kevin Santos' for entry in seen)
+    # One request per page, names included
+    assert client.request_count == 6
+
+def test_admin_feed_spans_prfs_and_filters_by_action():
+    client = seeded_with_audit()
+    manager = PurchaseRequestManager(client)
+
+    first = manager.get_audit_feed(limit=20)
+    second = manager.get_audit_feed(limit=20, before=first[-1])
+    assert len(first) == len(second) == 20
+    assert not {e.id for e in first} & {e.id for e in second}
+    assert len({e.purchase_request_id for e in first}) == 3
+    assert all(e.form_number for e in first)
+
+    comments = manager.get_audit_feed(limit=100, action=AuditAction.COMMENT_ADDED)
+    assert len(comments) == 45
+    assert {e.action for e in comments} == {'comment_added'}
+
+def test_entries_by_users_without_a_profile_have_no_name():
+    client = seeded_with_audit(entries_per_prf=2)
+    client.tables['purchase_request_audit'][0]['user_id'] = '00000000-0000-0000-0000-00000000dead'
+    manager = PurchaseRequestManager(client)
+
+    names = {entry.id: entry.user_name for entry in manager.get_audit_feed(limit=10)}
+    assert names.pop(client.tables['purchase_request_audit'][0]['id']) is None
+    assert set(names.values()) == {'Kevin Santos'}
@@ -0,0 +1,145 @@
+import json
+import time
+import uuid
+
+from fake_supabase import FakeAPIError, FakeSupabase
+from src.crud.audit import AuditWriter, DirectAuditWriter
+from src.models import AuditAction
+
+USER_ID = str(uuid.uuid4())
+
+def make_writer(client, tmp_path, **kwargs):
+    return AuditWriter(lambda: client, tmp_path, **kwargs)
+
+def crash(writer):
+    # The OS releases a dead process's lock on its spool
+    writer._spool_lock.close()
+
+def test_entries_are_batched_into_few_inserts(tmp_path):
+    client = FakeSupabase()
+    writer = make_writer(client, tmp_path, batch_size=50)
+    for i in range(120):
+        assert writer.record(uuid.uuid4(), AuditAction.UPDATED, USER_ID)
+
+    assert client.request_count == 0
+    assert writer.flush() == 120
+    assert client.request_count == 3
+    assert len(client.tables['purchase_request_audit']) == 120
+    assert writer.spool_path.read_text() == ''
+
+def test_actions_outside_the_check_constraint_are_rejected(tmp_path):
+    writer = make_writer(FakeSupabase(), tmp_path)
+    assert not writer.record(uuid.uuid4(), 'Updated status to approved', USER_ID)
+    assert writer.record(uuid.uuid4(), 'comment_added', USER_ID, 'Looks good')
+    assert writer.pending == 1
+
+def test_spooled_entries_survive_a_crash(tmp_path):
+    crashed = make_writer(FakeSupabase(), tmp_path, worker='1')
+    pr_id = uuid.uuid4()
+    crashed.record(pr_id, AuditAction.CREATED, USER_ID)
+    crashed.record(pr_id, AuditAction.COMMENT_ADDED, USER_ID, 'Urgent')
+    # The process dies before flushing; a half-written line is left behind
+    with open(crashed.spool_path, 'a') as f:
+        f.write('{"purchase_request_id": "')
+    crash(crashed)
+
+    client = FakeSupabase()
+    restarted = make_writer(client, tmp_path, worker='2')
+    assert not crashed.spool_path.exists()
+    assert restarted.flush() == 2
+    assert [row['action'] for row in client.tables['purchase_request_audit']] == ['created', 'comment_added']
+
+def test_failed_flush_keeps_entries(tmp_path):
+    class Failing:
+        def table(self, name):
+            raise ConnectionError('offline')
+
+    writer = AuditWriter(Failing, tmp_path)
+    writer.record(uuid.uuid4(), AuditAction.UPDATED, USER_ID)
+    assert writer.flush() == 0
+    assert writer.pending == 1
+    lines = writer.spool_path.read_text().splitlines()
+    assert json.loads(lines[0])['action'] == 'updated'
+
+def test_background_thread_flushes_on_request(tmp_path):
+    client = FakeSupabase()
+    writer = make_writer(client, tmp_path, interval=60)
+    writer.start()
+    try:
+        writer.record(uuid.uuid4(), AuditAction.CREATED, USER_ID)
+        writer.request_flush()
+        for _ in range(200):
+            if client.tables.get('purchase_request_audit'):
+                break
+            time.sleep(0.01)
+    finally:
+        writer.stop()
+    assert len(client.tables['purchase_request_audit']) == 1
+
+class RejectsUnknownUsers(FakeSupabase):
+    """Fails inserts holding a row whose user has no profile, like the audit_trail foreign key"""
+
+    def __init__(self, unknown):
+        super().__init__()
+        self.unknown = unknown
+        self.batches = []
+
+    def table(self, name):
+        builder = super().table(name)
+        insert = builder.insert
+
+        def checked_insert(rows):
+            self.batches.append(len(rows))
+            if any(row['user_id'] == self.unknown for row in rows):
+                raise FakeAPIError(
+                    "{'code': '23503', 'message': 'insert or update on table \"purchase_request_audit\" "
+                    "violates foreign key constraint'}"
+                )
+            return insert(rows)
+
+        builder.insert = checked_insert
+        return builder
+
+def test_rejected_rows_are_dead_lettered_without_blocking_the_rest(tmp_path):
+    unknown = str(uuid.uuid4())
+    client = RejectsUnknownUsers(unknown)
+    writer = make_writer(client, tmp_path, batch_size=8)
+    for i in range(20):
+        writer.record(uuid.uuid4(), AuditAction.UPDATED, unknown if i == 5 else USER_ID)
+
+    assert writer.flush() == 19
+    assert writer.pending == 0
+    assert len(client.tables['purchase_request_audit']) == 19
+    dead = [json.loads(line) for line in writer.dead_letter_path.read_text().splitlines()]
+    assert [row['entry']['user_id'] for row in dead] == [unknown]
+    assert '23503' in dead[0]['error']
+
+def test_workers_keep_separate_spools(tmp_path):
+    client = FakeSupabase()
+    first = make_writer(client, tmp_path, worker='1')
+    second = make_writer(client, tmp_path, worker='2')
+    first.record(uuid.uuid4(), AuditAction.CREATED, USER_ID)
+    second.record(uuid.uuid4(), AuditAction.UPDATED, USER_ID)
+
+    # A running writer's spool is never taken over
+    third = make_writer(client, tmp_path, worker='3')
+    assert third.pending == 0
+
+    assert first.flush() == 1
+    assert second.spool_path.read_text() != ''
+    assert second.flush() == 1
+    assert [row['action'] for row in client.tables['purchase_request_audit']] == ['created', 'updated']
+
+def test_stopped_writer_removes_its_spool(tmp_path):
+    writer = make_writer(FakeSupabase(), tmp_path)
+    writer.record(uuid.uuid4(), AuditAction.CREATED, USER_ID)
+    writer.stop()
+    assert list(tmp_path.iterdir()) == []
+
+def test_direct_writer_inserts_each_entry_at_once():
+    client = FakeSupabase()
+    writer = DirectAuditWriter(client)
+    assert writer.record(uuid.uuid4(), AuditAction.CREATED, USER_ID, 'PRF-1')
+    assert not writer.record(uuid.uuid4(), 'archived', USER_ID)
+    assert client.request_count == 1
+    assert [row['details'] for row in client.tables['purchase_request_audit']] == ['PRF-1']
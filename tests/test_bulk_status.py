@@ -0,0 +1,50 @@
+from uuid import UUID, uuid4
+
+from conftest import seed
+from fake_supabase import FakeSupabase
+from src.crud import ExpenseManager, PurchaseRequestManager
+from src.models import ExpenseFormStatus, PurchaseRequestStatus
+
+def ids_with_status(client, table, status):
+    return [UUID(row['id']) for row in client.tables[table] if row['status'] == status]
+
+def test_bulk_approve_fifty_prfs_is_one_round_trip():
+    client = seed(FakeSupabase(), prfs=200, items_per_prf=1)
+    pending = ids_with_status(client, 'purchase_requests', 'pending')
+    assert len(pending) == 50
+    client.reset_counts()
+
+    outcomes = PurchaseRequestManager(client).bulk_update_status(pending, PurchaseRequestStatus.APPROVED)
+
+    assert client.request_count == 1
+    assert outcomes == {pr_id: None for pr_id in pending}
+    assert len(ids_with_status(client, 'purchase_requests', 'approved')) == 100
+    changes = [e for e in client.tables['purchase_request_audit'] if e['action'] == 'status_changed']
+    assert len(changes) == 50
+
+def test_bulk_reject_reports_invalid_transitions_per_row():
+    client = seed(FakeSupabase())
+    manager = PurchaseRequestManager(client)
+    pending = ids_with_status(client, 'purchase_requests', 'pending')
+    approved = ids_with_status(client, 'purchase_requests', 'approved')
+    missing = uuid4()
+
+    outcomes = manager.bulk_update_status(
+        pending + approved[:1] + [missing], PurchaseRequestStatus.REJECTED, remarks='Over budget'
+    )
+
+    assert all(outcomes[pr_id] is None for pr_id in pending)
+    assert outcomes[approved[0]] == 'Cannot change status from approved to rejected'
+    assert outcomes[missing] is not None
+    comments = [e for e in client.tables['purchase_request_audit'] if e['action'] == 'comment_added']
+    assert len(comments) == len(pending)
+
+def test_single_erf_status_change_goes_through_bulk_path():
+    client = seed(FakeSupabase())
+    manager = ExpenseManager(client)
+    pending = ids_with_status(client, 'expense_reimbursement_forms', 'pending')
+    draft = ids_with_status(client, 'expense_reimbursement_forms', 'draft')
+
+    assert manager.update_expense_form_status(pending[0], ExpenseFormStatus.APPROVED)
+    assert not manager.update_expense_form_status(draft[0], ExpenseFormStatus.APPROVED)
+    assert manager.bulk_update_status([], ExpenseFormStatus.APPROVED) == {}
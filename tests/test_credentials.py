@@ -0,0 +1,106 @@
+import threading
+
+from src.credentials import CredentialStore, Credentials
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class FakeAuth:
+    """Stands in for gotrue's refresh_session, rotating refresh tokens like Supabase"""
+
+    def __init__(self, clock, lifetime=3600):
+        self.clock = clock
+        self.lifetime = lifetime
+        self.calls = []
+        self.fail = False
+
+    def refresh(self, refresh_token):
+        self.calls.append(refresh_token)
+        if self.fail:
+            raise RuntimeError("network down")
+        n = len(self.calls)
+        return Credentials(f"access-{n}", f"refresh-{n}", self.clock() + self.lifetime)
+
+def test_only_tokens_near_expiry_are_refreshed():
+    clock = Clock()
+    auth = FakeAuth(clock)
+    store = CredentialStore(auth.refresh, margin=300, clock=clock)
+    store.put('a', Credentials('access-a', 'refresh-a', clock() + 200))
+    store.put('b', Credentials('access-b', 'refresh-b', clock() + 3000))
+
+    assert store.refresh_due() == 1
+    assert auth.calls == ['refresh-a']
+    assert store.get('a').access_token == 'access-1'
+    assert store.get('b').access_token == 'access-b'
+
+    # Nothing is due again until the new token nears expiry
+    assert store.refresh_due() == 0
+
+def test_failed_refresh_keeps_token_until_it_expires():
+    clock = Clock()
+    auth = FakeAuth(clock)
+    store = CredentialStore(auth.refresh, margin=300, clock=clock)
+    store.put('a', Credentials('access-a', 'refresh-a', clock() + 100))
+    auth.fail = True
+
+    assert store.refresh_due() == 0
+    assert store.get('a').access_token == 'access-a'
+
+    clock.now += 101
+    store.refresh_due()
+    assert store.get('a') is None
+
+def test_older_credentials_do_not_replace_newer_ones():
+    store = CredentialStore(lambda token: None, clock=Clock())
+    store.put('a', Credentials('new', 'r2', 5000))
+    store.put('a', Credentials('old', 'r1', 4000))
+    assert store.get('a').access_token == 'new'
+
+def test_background_refresher_renews_without_callers_waiting():
+    clock = Clock()
+    auth = FakeAuth(clock)
+    refreshed = threading.Event()
+
+    def refresh(token):
+        credentials = auth.refresh(token)
+        refreshed.set()
+        return credentials
+
+    store = CredentialStore(refresh, margin=300, interval=0.01, clock=clock)
+    store.put('a', Credentials('access-a', 'refresh-a', clock() + 60))
+    store.start()
+    try:
+        assert refreshed.wait(2)
+    finally:
+        store.stop()
+    assert store.get('a').access_token == 'access-1'
+
+def test_idle_users_are_dropped_instead_of_refreshed():
+    clock = Clock()
+    auth = FakeAuth(clock)
+    store = CredentialStore(auth.refresh, margin=300, idle_timeout=3000, clock=clock)
+    store.put('a', Credentials('access-a', 'refresh-a', clock() + 3600))
+    store.put('b', Credentials('access-b', 'refresh-b', clock() + 3600))
+
+    # Only b's session keeps reading its token
+    clock.now += 3500
+    store.get('b')
+    assert store.refresh_due() == 1
+    assert auth.calls == ['refresh-b']
+    assert store.get('a') is None
+    assert store.get('b').access_token == 'access-1'
+
+def test_returning_user_is_renewed_from_the_session_copy():
+    clock = Clock()
+    auth = FakeAuth(clock)
+    store = CredentialStore(auth.refresh, clock=clock)
+    expired = Credentials('access-a', 'refresh-a', clock() - 10)
+    store.put('a', expired)
+    assert store.get('a') is None
+
+    assert store.renew('a', expired).access_token == 'access-1'
+    assert store.get('a').access_token == 'access-1'
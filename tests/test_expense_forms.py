@@ -0,0 +1,75 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from conftest import REQUESTOR_ID, seed
+from fake_supabase import FakeSupabase
+from src.crud import ExpenseManager
+from src.models import ExpenseFormStatus, ExpenseItem, ExpenseReimbursementForm
+
+def new_erf(amounts):
+    return ExpenseReimbursementForm(
+        employee_id=UUID(REQUESTOR_ID), designation='Finance',
+        date=datetime(2025, 2, 3), status=ExpenseFormStatus.PENDING,
+        items=[
+            ExpenseItem(date=datetime(2025, 2, 3), description=f"Meal {i}", payee='Jollibee',
+                        amount=Decimal(amount), account='6010')
+            for i, amount in enumerate(amounts)
+        ]
+    )
+
+def test_create_expense_form_writes_header_and_items_in_one_round_trip():
+    client = seed(FakeSupabase())
+    client.reset_counts()
+
+    erf = ExpenseManager(client).create_expense_form(new_erf(['120.50'] * 25))
+
+    assert client.request_count == 1
+    assert erf.form_number == '2025-011'
+    assert erf.status == ExpenseFormStatus.PENDING
+    assert erf.total_amount == Decimal('3012.50')
+    assert [item.description for item in erf.items] == [f"Meal {i}" for i in range(25)]
+    assert all(item.erf_id == erf.id for item in erf.items)
+    assert sum(1 for row in client.tables['expense_items'] if row['erf_id'] == str(erf.id)) == 25
+
+def test_form_numbers_count_up_per_year():
+    client = FakeSupabase()
+    manager = ExpenseManager(client)
+
+    numbers = [manager.create_expense_form(new_erf(['10'])).form_number for _ in range(3)]
+
+    assert numbers == ['2025-001', '2025-002', '2025-003']
+
+def test_new_forms_start_as_draft_or_pending():
+    manager = ExpenseManager(FakeSupabase())
+    erf = new_erf(['10'])
+    erf.status = ExpenseFormStatus.APPROVED
+
+    assert manager.create_expense_form(erf).status == ExpenseFormStatus.DRAFT
+
+def test_expense_form_pages_cover_every_form_once_with_items():
+    client = seed(FakeSupabase(), erfs=45, items_per_erf=3)
+    manager = ExpenseManager(client)
+    client.reset_counts()
+
+    seen, page = [], manager.get_expense_forms(limit=10)
+    while page:
+        seen.extend(page)
+        page = manager.get_expense_forms(limit=10, before=page[-1])
+
+    assert len({erf.id for erf in seen}) == 45
+    assert [erf.created_at for erf in seen] == sorted((erf.created_at for erf in seen), reverse=True)
+    assert all(len(erf.items) == 3 and erf.items[0].erf_id == erf.id for erf in seen)
+    # One request per page, items included
+    assert client.request_count == 6
+
+def test_expense_form_filters():
+    client = seed(FakeSupabase(), erfs=12)
+    manager = ExpenseManager(client)
+
+    pending = manager.get_expense_forms(status=ExpenseFormStatus.PENDING)
+    assert len(pending) == 3
+    assert all(erf.status == ExpenseFormStatus.PENDING for erf in pending)
+    assert manager.get_expense_forms(employee_id=UUID(int=7)) == []
+    assert len(manager.get_expense_forms(start_date=datetime(2025, 1, 16).date())) == 0
+    assert len(manager.get_expense_forms(end_date=datetime(2025, 1, 15).date(), include_items=False)) == 12
@@ -0,0 +1,100 @@
+# Microbenchmark for hydrating purchase request item rows. The timings only
+# run with pytest-benchmark: python -m pytest tests/test_hydration_benchmark.py --benchmark-only
+import gc
+import importlib.util
+import os
+import tracemalloc
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+from src.models import PurchaseRequestItem
+from src.models.hydration import purchase_request_items_from_rows
+
+ROWS = int(os.environ.get('HYDRATION_BENCH_ROWS', 100_000))
+# Rows converted by the check that runs in every test run
+CHECK_ROWS = 1_000
+ITEMS_PER_PRF = 10
+# Timed runs per converter
+RUNS = int(os.environ.get('HYDRATION_BENCH_RUNS', 3))
+
+benchmark_only = pytest.mark.skipif(
+    importlib.util.find_spec('pytest_benchmark') is None, reason='pytest-benchmark is not installed'
+)
+
+def make_rows(count):
+    rows = []
+    for i in range(count):
+        if i % ITEMS_PER_PRF == 0:
+            pr_id = str(uuid.uuid4())
+            stamp = f"2025-01-{1 + (i // ITEMS_PER_PRF) % 28:02d}T08:00:00.{i % 1000:06d}+00:00"
+        quantity = float(1 + i % 12)
+        unit_price = [12.5, 99.0, 250.75, 1200.0, 15.25][i % 5]
+        rows.append({
+            'id': str(uuid.uuid4()),
+            'purchase_request_id': pr_id,
+            'item_description': f"Item {i}",
+            'quantity': quantity,
+            'unit': 'pcs',
+            'unit_price': unit_price,
+            'total_price': round(quantity * unit_price, 2),
+            'account_code': '6008',
+            'remarks': None,
+            'created_at': stamp,
+            'updated_at': stamp
+        })
+    return rows
+
+def validated_items_from_rows(rows):
+    """Per-field construction through __post_init__, as the managers did before"""
+    return [
+        PurchaseRequestItem(
+            purchase_request_id=UUID(item['purchase_request_id']),
+            item_description=item['item_description'],
+            quantity=Decimal(str(item['quantity'])),
+            unit=item['unit'],
+            unit_price=Decimal(str(item['unit_price'])),
+            total_price=Decimal(str(item['total_price'])),
+            account_code=item.get('account_code'),
+            remarks=item.get('remarks'),
+            id=UUID(item['id']) if item.get('id') else None,
+            created_at=datetime.fromisoformat(item['created_at'].replace('Z', '+00:00')) if item.get('created_at') else None,
+            updated_at=datetime.fromisoformat(item['updated_at'].replace('Z', '+00:00')) if item.get('updated_at') else None
+        )
+        for item in rows
+    ]
+
+def peak_memory(convert, rows):
+    tracemalloc.start()
+    convert(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def test_batched_converter_matches_the_validated_constructor():
+    rows = make_rows(CHECK_ROWS)
+    assert purchase_request_items_from_rows(rows) == validated_items_from_rows(rows)
+    assert peak_memory(purchase_request_items_from_rows, rows) < peak_memory(validated_items_from_rows, rows)
+
+@benchmark_only
+@pytest.mark.parametrize('convert', [validated_items_from_rows, purchase_request_items_from_rows],
+                         ids=['validated', 'batched'])
+def test_hydrate_item_rows(benchmark, convert):
+    rows = make_rows(ROWS)
+
+    def run():
+        # With the collector off, as timeit does: its pauses depend on what
+        # else is alive and swamp the difference between converters
+        gc.collect()
+        gc.disable()
+        try:
+            return convert(rows)
+        finally:
+            gc.enable()
+
+    benchmark.pedantic(run, rounds=RUNS)
+    benchmark.extra_info['rows'] = ROWS
+    benchmark.extra_info['peak_bytes'] = peak_memory(convert, rows)
@@ -0,0 +1,69 @@
+# Import cost of the modules main.py loads before the login page renders
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+# Loaded only once a page, an integration or config.yaml actually needs them
+HEAVY_MODULES = ('yaml', 'reportlab', 'anthropic', 'mailjet_rest', 'pydantic', 'opentelemetry', 'supabase', 'postgrest', 'gotrue')
+
+# Renders main.py's login page the way `streamlit run` does and reports the
+# modules it loaded and how long it took
+LOGIN_PAGE = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file('src/main.py', default_timeout=30)
+before = set(sys.modules)
+start = time.perf_counter()
+app.run()
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'errors': [str(e.value) for e in app.exception],
+    'modules': sorted(set(sys.modules) - before),
+}))
+'''
+
+def import_times(statement):
+    """Run a statement under -X importtime and return {module: cumulative microseconds}
+
+    Top-level imports are also summed under the 'total' key.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {'total': 0}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+        if not name[1:].startswith(' '):
+            times['total'] += int(cumulative)
+    return times
+
+def test_login_page_skips_heavy_modules():
+    pytest.importorskip('streamlit')
+    result = subprocess.run(
+        [sys.executable, '-c', LOGIN_PAGE],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    startup = json.loads(result.stdout.splitlines()[-1])
+    assert startup['errors'] == []
+    loaded = {name.split('.')[0] for name in startup['modules']}
+    assert not loaded & set(HEAVY_MODULES)
+    assert 'src.views.dashboard' not in startup['modules']
+    print(f"\nlogin page: {startup['seconds'] * 1000:.1f} ms")
+
+def test_views_load_on_first_access():
+    times = import_times('import src.views')
+    assert 'src.views.dashboard' not in times
+    assert 'src.views.expenses' not in times
+
+def test_config_is_parsed_on_first_use():
+    times = import_times('import src.config')
+    assert 'yaml' not in times
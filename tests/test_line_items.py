@@ -0,0 +1,91 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from src.models.line_items import (
+    parse_expense_rows, parse_purchase_request_rows, parse_voucher_rows, records, to_centavos
+)
+
+def test_pasted_expense_block_is_parsed_and_totalled_exactly():
+    pasted = {
+        'date': ['2025-02-01', '', '02/03/2025'],
+        'description': ['Taxi', 'Lunch meeting', 'Parking'],
+        'payee': ['Grab', 'Jollibee', 'SM'],
+        'reference_number': [None, 'OR-1', None],
+        'amount': ['₱1,234.50', '0.10', 0.2],
+        'account': [None, '6010', None],
+    }
+
+    parsed = parse_expense_rows(records(pasted), default_date=date(2025, 2, 5))
+
+    assert parsed.errors == []
+    assert parsed.total('amount') == Decimal('1234.80')
+    assert [item.date for item in parsed.items] == [
+        datetime(2025, 2, 1), datetime(2025, 2, 5), datetime(2025, 2, 3)
+    ]
+    assert [item.account for item in parsed.items] == ['OPEX', '6010', 'OPEX']
+
+def test_expense_rows_report_every_bad_line_and_skip_blank_ones():
+    rows = [
+        {'description': 'Taxi', 'payee': 'Grab', 'amount': 'abc'},
+        {'description': None, 'payee': None, 'amount': float('nan'), 'account': 'OPEX'},
+        {'description': 'Lunch', 'payee': '', 'amount': 100},
+        {'description': 'Hotel', 'payee': 'Marco Polo', 'amount': 0},
+    ]
+
+    parsed = parse_expense_rows(rows, default_date=date(2025, 2, 5))
+
+    assert parsed.items == []
+    assert parsed.errors == [
+        "Line 1: 'abc' is not an amount",
+        "Line 3: payee required",
+        "Line 4: amount must be greater than zero",
+    ]
+
+def test_voucher_rows_total_debits_and_credits():
+    rows = [
+        {'account_title': 'Supplies Expense', 'activity': 'Workshop', 'debit': '1,000.25', 'credit': None},
+        {'account_title': 'Input VAT', 'debit': 120, 'credit': None},
+        {'account_title': 'Cash in Bank', 'debit': None, 'credit': '1120.25'},
+        {'account_title': 'Both', 'debit': 1, 'credit': 1},
+    ]
+
+    parsed = parse_voucher_rows(rows)
+
+    assert parsed.totals == {'debit': 112025, 'credit': 112025}
+    assert len(parsed.items) == 3
+    assert parsed.items[2].credit_amount == Decimal('1120.25') and parsed.items[2].debit_amount is None
+    assert parsed.errors == ["Line 4: enter either a debit or a credit"]
+
+def test_to_centavos_rounds_half_up():
+    assert to_centavos('0.005') == 1
+    assert to_centavos('PHP 12') == 1200
+    assert to_centavos('  ') is None
+
+def test_pasted_purchase_request_block_is_validated_in_one_pass():
+    pasted = {
+        'item_description': ['Bond paper A4', 'Ink cartridge', '', 'Stapler', 'Folders'],
+        'quantity': ['10', '2.5', None, 'two', '3'],
+        'unit': ['ream', 'pc', None, 'pc', ''],
+        'unit_price': ['₱245.75', '1,199.99', None, '150', '12'],
+        'account_code': ['6010', None, None, None, None],
+    }
+
+    parsed = parse_purchase_request_rows(records(pasted))
+
+    assert [item.item_description for item in parsed.items] == ['Bond paper A4', 'Ink cartridge']
+    assert parsed.items[1].total_price == Decimal('2999.98')
+    assert parsed.totals == {'total_price': 545748}
+    assert parsed.errors == ["Line 4: 'two' is not an amount", "Line 5: unit required"]
+
+def test_unchanged_purchase_request_rows_are_reused_between_reruns():
+    rows = [{'item_description': f"Item {i}", 'quantity': 1, 'unit': 'pc', 'unit_price': 10} for i in range(3)]
+    cache = {}
+
+    first = parse_purchase_request_rows(rows, cache)
+    rows[1] = dict(rows[1], quantity=4)
+    second = parse_purchase_request_rows(rows, cache)
+
+    assert second.items[0] is first.items[0] and second.items[2] is first.items[2]
+    assert second.items[1] is not first.items[1]
+    assert second.total('total_price') == Decimal('60.00')
+    assert len(cache) == 3
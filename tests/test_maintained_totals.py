@@ -0,0 +1,68 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from conftest import REQUESTOR_ID, seed
+from fake_supabase import FakeSupabase
+from src.crud import ExpenseManager, PurchaseRequestManager
+from src.models import PurchaseRequest, PurchaseRequestItem, Voucher, VoucherEntry
+
+def test_created_prf_items_get_generated_totals_and_the_header_is_summed():
+    client = seed(FakeSupabase(), prfs=0)
+    manager = PurchaseRequestManager(client)
+    items = [
+        PurchaseRequestItem(item_description='Ink', quantity=Decimal('2.5'), unit='pc',
+                            unit_price=Decimal('1199.99'), total_price=0, purchase_request_id=None),
+        PurchaseRequestItem(item_description='Paper', quantity=10, unit='ream',
+                            unit_price=Decimal('245.75'), total_price=0, purchase_request_id=None),
+    ]
+
+    prf = manager.create_purchase_request(PurchaseRequest(
+        requestor_id=UUID(REQUESTOR_ID), supplier_id=UUID(client.tables['suppliers'][0]['id']), items=items
+    ))
+
+    assert [row['total_price'] for row in client.tables['purchase_request_items']] == [2999.98, 2457.5]
+    assert prf.total_amount == Decimal('5457.48')
+
+def test_header_only_reads_see_line_changes():
+    client = seed(FakeSupabase())
+    manager = PurchaseRequestManager(client)
+    pr_id = client.tables['purchase_requests'][0]['id']
+    item_id = next(row['id'] for row in client.tables['purchase_request_items'] if row['purchase_request_id'] == pr_id)
+
+    client.table('purchase_request_items').update({'quantity': 10}).eq('id', item_id).execute()
+    client.reset_counts()
+    prfs, _ = manager.get_purchase_requests(page_size=100)
+
+    prf = next(prf for prf in prfs if str(prf.id) == pr_id)
+    assert prf.items == []
+    assert prf.total_amount == Decimal('450.00')
+    assert all(table == 'purchase_requests' for table, _ in client.requests)
+
+def test_voucher_totals_follow_entries():
+    client = seed(FakeSupabase())
+    manager = ExpenseManager(client)
+    voucher = manager.create_voucher(Voucher(
+        date=datetime(2025, 2, 3), payee='Supplier 0', total_amount=0, particulars='Supplies',
+        prepared_by=UUID(REQUESTOR_ID),
+        entries=[
+            VoucherEntry(account_title='Supplies Expense', activity=None, debit_amount=Decimal('1120.25'), credit_amount=None),
+            VoucherEntry(account_title='Cash in Bank', activity=None, debit_amount=None, credit_amount=Decimal('1120.25')),
+        ]
+    ))
+
+    listed = {v.id: v for v in manager.list_vouchers()}
+
+    assert voucher.total_amount == listed[voucher.id].total_amount == Decimal('1120.25')
+    assert listed[voucher.id].entries == []
+
+def test_reads_trust_the_stored_header_total():
+    client = seed(FakeSupabase(), erfs=1)
+    client.tables['expense_reimbursement_forms'][0]['total_amount'] = 1.0
+    manager = ExpenseManager(client)
+
+    erf = manager.get_expense_forms()[0]
+
+    # Converted as stored rather than re-summed from the items
+    assert len(erf.items) == 3
+    assert erf.total_amount == Decimal('1.00')
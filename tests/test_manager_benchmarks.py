@@ -0,0 +1,29 @@
+# Wall-clock benchmarks of manager operations with simulated network latency.
+# Run with: python -m pytest tests/test_manager_benchmarks.py --benchmark-only
+import os
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from conftest import seed
+from fake_supabase import FakeSupabase
+from manager_operations import ROUND_TRIP_BUDGETS
+
+# Seconds per simulated round trip; 20ms is typical for a nearby Supabase region
+LATENCY = float(os.environ.get('BENCH_LATENCY', '0.02'))
+
+@pytest.mark.parametrize('operation', list(ROUND_TRIP_BUDGETS), ids=lambda op: op.__name__)
+def test_manager_operation(benchmark, operation):
+    def setup():
+        client = seed(FakeSupabase(latency=LATENCY))
+        client.reset_counts()
+        return (client,), {}
+
+    benchmark.pedantic(operation, setup=setup, rounds=5)
+
+    client = seed(FakeSupabase())
+    client.reset_counts()
+    operation(client)
+    benchmark.extra_info['round_trips'] = client.request_count
+    benchmark.extra_info['latency'] = LATENCY
@@ -0,0 +1,115 @@
+# Microbenchmark for building and totalling line items through the models. The
+# timings only run with pytest-benchmark: python -m pytest tests/test_money_benchmark.py --benchmark-only
+import gc
+import importlib.util
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from uuid import UUID
+
+import pytest
+
+from src.models import ExpenseItem, ExpenseReimbursementForm, PurchaseRequest, PurchaseRequestItem
+
+ITEMS = int(os.environ.get('MONEY_BENCH_ITEMS', 100_000))
+ERF_ITEMS = int(os.environ.get('MONEY_BENCH_ERF_ITEMS', 2_000))
+# Items built by the checks that run in every test run
+CHECK_ITEMS = 1_000
+# Timed runs per implementation
+RUNS = int(os.environ.get('MONEY_BENCH_RUNS', 3))
+
+benchmark_only = pytest.mark.skipif(
+    importlib.util.find_spec('pytest_benchmark') is None, reason='pytest-benchmark is not installed'
+)
+
+def legacy_validate_decimal(value):
+    """validate_decimal as each model module defined it before"""
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+@dataclass(slots=True)
+class LegacyPurchaseRequestItem(PurchaseRequestItem):
+    def __post_init__(self):
+        self.quantity = legacy_validate_decimal(self.quantity)
+        self.unit_price = legacy_validate_decimal(self.unit_price)
+        self.total_price = legacy_validate_decimal(self.total_price)
+        calculated_total = legacy_validate_decimal(self.quantity * self.unit_price)
+        if self.total_price != calculated_total:
+            self.total_price = calculated_total
+
+def legacy_total(items):
+    return legacy_validate_decimal(sum(item.total_price for item in items))
+
+def build_items(item_class, count=ITEMS):
+    """Items with prices as they arrive from a form or JSON: floats"""
+    pr_id = UUID(int=1)
+    return [
+        item_class(
+            item_description='Bond paper',
+            quantity=float(1 + i % 12),
+            unit='ream',
+            unit_price=[12.5, 99.0, 250.75, 1200.0, 15.25][i % 5],
+            total_price=0,
+            purchase_request_id=pr_id
+        )
+        for i in range(count)
+    ]
+
+def fill_erf(add, count=ERF_ITEMS):
+    erf = ExpenseReimbursementForm(employee_id=UUID(int=1), designation='Staff', date=datetime(2025, 2, 3))
+    for i in range(count):
+        add(erf, ExpenseItem(date=datetime(2025, 2, 3), description='Taxi', payee='Grab',
+                             amount=Decimal(100 + i % 500).scaleb(-2), account='OPEX'))
+    return erf
+
+def legacy_add(erf, item):
+    # add_item re-summed every item on each call
+    erf.items.append(item)
+    erf.total_amount = legacy_validate_decimal(sum(legacy_validate_decimal(i.amount) for i in erf.items))
+
+def new_add(erf, item):
+    erf.add_item(item)
+
+def build_and_total(item_class):
+    items = build_items(item_class)
+    if item_class is LegacyPurchaseRequestItem:
+        return legacy_total(items)
+    return PurchaseRequest(requestor_id=UUID(int=2), supplier_id=UUID(int=3), items=items).total_amount
+
+def without_gc(function, *args):
+    # Collector pauses depend on what else is alive, so leave them out, as timeit does
+    gc.collect()
+    gc.disable()
+    try:
+        return function(*args)
+    finally:
+        gc.enable()
+
+def test_items_and_totals_match_the_legacy_models():
+    legacy_items = build_items(LegacyPurchaseRequestItem, CHECK_ITEMS)
+    items = build_items(PurchaseRequestItem, CHECK_ITEMS)
+    prf = PurchaseRequest(requestor_id=UUID(int=2), supplier_id=UUID(int=3), items=items)
+
+    assert [item.total_price for item in items] == [item.total_price for item in legacy_items]
+    assert prf.total_amount == legacy_total(legacy_items)
+
+def test_adding_items_one_at_a_time_keeps_the_total():
+    legacy = fill_erf(legacy_add, CHECK_ITEMS)
+    erf = fill_erf(new_add, CHECK_ITEMS)
+    assert erf.total_amount == legacy.total_amount == erf.calculate_total()
+
+@benchmark_only
+@pytest.mark.parametrize('item_class', [LegacyPurchaseRequestItem, PurchaseRequestItem], ids=['legacy', 'models'])
+def test_build_and_total_items(benchmark, item_class):
+    benchmark.pedantic(without_gc, args=(build_and_total, item_class), rounds=RUNS)
+    benchmark.extra_info['items'] = ITEMS
+
+@benchmark_only
+@pytest.mark.parametrize('add', [legacy_add, new_add], ids=['legacy', 'models'])
+def test_add_items_one_at_a_time(benchmark, add):
+    benchmark.pedantic(without_gc, args=(fill_erf, add), rounds=RUNS)
+    benchmark.extra_info['items'] = ERF_ITEMS
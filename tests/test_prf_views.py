@@ -0,0 +1,27 @@
+from uuid import UUID
+
+import pytest
+
+pytest.importorskip('streamlit')
+
+from conftest import REQUESTOR_ID, seed
+from fake_supabase import FakeSupabase
+from src.crud import PurchaseRequestManager
+from src.models import PurchaseRequestStatus
+from src.views.purchase_requests.utils import can_delete_prf, is_requestor
+
+def test_requestor_sees_their_actions_on_hydrated_prfs():
+    client = seed(FakeSupabase(), prfs=4)
+    manager = PurchaseRequestManager(client)
+    draft = next(row for row in client.tables['purchase_requests'] if row['status'] == 'draft')
+    prf = manager.get_purchase_request(UUID(draft['id']))
+    assert isinstance(prf.requestor_id, UUID)
+    assert prf.status == PurchaseRequestStatus.DRAFT
+
+    # Session users carry the id as the string Supabase Auth returned
+    requestor = {'id': REQUESTOR_ID, 'role': 'User'}
+    someone_else = {'id': '00000000-0000-0000-0000-000000000002', 'role': 'User'}
+    assert is_requestor(requestor, prf)
+    assert can_delete_prf(requestor, prf)
+    assert not is_requestor(someone_else, prf)
+    assert not can_delete_prf(someone_else, prf)
@@ -0,0 +1,76 @@
+from conftest import REQUESTOR_ID, seed
+from fake_supabase import FakeSupabase
+from src.profiles import ProfileCache, get_user_permissions
+from src.realtime import ChangeFeed
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def add_profiles(client, count):
+    ids = []
+    for i in range(count):
+        user_id = f"00000000-0000-0000-0001-{i:012d}"
+        client.tables['profiles'].append({
+            'id': user_id, 'first_name': f"User{i}", 'last_name': 'Test',
+            'email': f"user{i}@vivita.ph", 'role': 'User'
+        })
+        ids.append(user_id)
+    return ids
+
+def test_profiles_are_cached_until_ttl_expires():
+    client = seed(FakeSupabase())
+    client.reset_counts()
+    clock = Clock()
+    cache = ProfileCache(ttl=60, clock=clock)
+
+    assert cache.get(REQUESTOR_ID, client)['role'] == 'Finance'
+    assert cache.get(REQUESTOR_ID, client)['role'] == 'Finance'
+    assert client.request_count == 1
+
+    clock.now = 61
+    cache.get(REQUESTOR_ID, client)
+    assert client.request_count == 2
+
+def test_get_many_loads_misses_in_one_query():
+    client = seed(FakeSupabase())
+    ids = add_profiles(client, 10)
+    client.reset_counts()
+    cache = ProfileCache()
+
+    cache.get(ids[0], client)
+    found = cache.get_many(ids + [REQUESTOR_ID], client)
+
+    assert len(found) == 11
+    assert client.request_count == 2
+
+def test_names_come_from_profile_names_and_misses_are_cached():
+    client = seed(FakeSupabase())
+    ids = add_profiles(client, 3)
+    client.reset_counts()
+    cache = ProfileCache()
+    no_profile = '00000000-0000-0000-0002-000000000000'
+
+    names = cache.names(ids + [no_profile], client)
+    assert names == {**{user_id: f"User{i} Test" for i, user_id in enumerate(ids)}, no_profile: None}
+    assert cache.name(no_profile, client) is None
+    assert cache.name(ids[0], client) == 'User0 Test'
+    assert client.requests == [('profile_names', 'select')]
+    # Names never put another user's full profile in the cache
+    assert cache.cached(ids[0]) is None
+
+def test_profile_changes_from_the_feed_invalidate_the_cache():
+    client = seed(FakeSupabase())
+    feed = ChangeFeed()
+    cache = ProfileCache(feed=feed)
+
+    assert cache.get(REQUESTOR_ID, client)['role'] == 'Finance'
+    client.tables['profiles'][0]['role'] = 'User'
+    feed.publish('profiles', {'record': {'id': REQUESTOR_ID}})
+
+    role = cache.get(REQUESTOR_ID, client)['role']
+    assert role == 'User'
+    assert get_user_permissions(role)['can_approve'] is False
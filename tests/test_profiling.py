@@ -0,0 +1,90 @@
+import json
+import logging
+
+import pytest
+
+from conftest import seed
+from fake_supabase import FakeSupabase
+from src.crud import PurchaseRequestManager, SupplierManager
+from src.profiling import current_profile, instrument_client, profile_render, record_cache_hit
+
+def seeded():
+    client = seed(FakeSupabase())
+    client.reset_counts()
+    return instrument_client(client)
+
+def test_render_profile_counts_queries_and_payload(caplog, monkeypatch):
+    monkeypatch.setenv('PROFILE_DEBUG', '1')
+    client = seeded()
+
+    @profile_render('suppliers')
+    def render():
+        SupplierManager(client).list()
+        record_cache_hit('suppliers')
+        return current_profile()
+
+    with caplog.at_level(logging.INFO, logger='vivita.profiling'):
+        profile = render()
+
+    assert profile.query_count == 1
+    assert profile.queries[0].table == 'suppliers'
+    assert profile.queries[0].operation == 'select'
+    assert profile.payload_bytes > 0
+    assert profile.cache_hits == {'suppliers': 1}
+    assert current_profile() is None
+
+    logged = json.loads(caplog.records[0].getMessage())
+    assert logged['page'] == 'suppliers'
+    assert logged['query_count'] == 1
+    assert not logged['over_budget']
+
+def test_payloads_are_not_sized_unless_profiles_are_shown(monkeypatch):
+    monkeypatch.delenv('PROFILE_DEBUG', raising=False)
+    monkeypatch.delenv('PROFILE_LOG', raising=False)
+    monkeypatch.setattr(json, 'dumps', lambda *args, **kwargs: pytest.fail('response re-serialised'))
+    client = seeded()
+
+    @profile_render('suppliers')
+    def render():
+        SupplierManager(client).list()
+        return current_profile()
+
+    monkeypatch.setattr('src.profiling._finish', lambda profile: None)
+    profile = render()
+    assert profile.query_count == 1
+    assert profile.payload_bytes == 0
+
+def test_query_budget_warns_when_exceeded(caplog):
+    client = seeded()
+
+    @profile_render('suppliers')
+    def render():
+        manager = PurchaseRequestManager(client)
+        prfs, _ = manager.get_purchase_requests()
+        # One lookup per row, the N+1 pattern the budget is there to catch
+        for prf in prfs:
+            manager.get_supplier_name(prf.supplier_id)
+        return current_profile()
+
+    with caplog.at_level(logging.WARNING, logger='vivita.profiling'):
+        profile = render()
+
+    assert profile.over_budget
+    assert any('over its budget' in r.getMessage() for r in caplog.records)
+
+def test_nested_renders_are_sections_of_the_outer_profile():
+    client = seeded()
+
+    @profile_render('prf_list')
+    def inner():
+        PurchaseRequestManager(client).get_purchase_requests()
+
+    @profile_render('purchase_requests')
+    def outer():
+        inner()
+        return current_profile()
+
+    profile = outer()
+    assert profile.page == 'purchase_requests'
+    assert profile.query_count == 2
+    assert 'prf_list' in profile.sections
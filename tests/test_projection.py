@@ -0,0 +1,21 @@
+# Tests for column projections and partial model hydration
+import pytest
+
+from src.crud.projection import select_columns, hydrate
+from src.models import ExpenseReimbursementForm, Supplier
+
+def test_named_views_and_field_sets():
+    assert select_columns('suppliers', 'detail') == '*'
+    assert 'bank_details' not in select_columns('suppliers', 'list')
+    assert select_columns('suppliers', fields=['name', 'email']) == 'id, name, email'
+    with pytest.raises(ValueError):
+        select_columns('suppliers', 'summary')
+
+def test_hydrate_partial_rows():
+    supplier = hydrate(Supplier, {'id': 's1', 'name': 'Acme', 'unknown_column': 1})
+    assert supplier.name == 'Acme'
+    assert supplier.bank_details is None
+
+    erf = hydrate(ExpenseReimbursementForm, {'id': 'e1', 'total_amount': 12.5, 'status': 'pending'})
+    assert erf.designation is None
+    assert str(erf.total_amount) == '12.50'
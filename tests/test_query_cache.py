@@ -0,0 +1,208 @@
+import threading
+from decimal import Decimal
+from uuid import UUID
+
+from conftest import REQUESTOR_ID, seed
+from fake_supabase import FakeAPIError, FakeSupabase
+from src.crud import ExpenseManager, PurchaseRequestManager, SupplierManager
+from src.crud.query_cache import QueryCache
+from src.models import ExpenseItem, PurchaseRequestStatus, Supplier
+from src.profiling import instrument_client
+from src.realtime import ChangeFeed
+from src.singleflight import SingleFlight
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def finance(table):
+    return 'role:Finance'
+
+def setup(scope=finance, **kwargs):
+    client = seed(FakeSupabase())
+    cache = QueryCache(**kwargs)
+    session = instrument_client(client, scope)
+    return client, cache, session
+
+def test_entries_are_bounded_and_expire():
+    clock = Clock()
+    cache = QueryCache(max_entries=2, ttl=60, clock=clock)
+    for key in ('a', 'b'):
+        cache.set(key, [key], {'suppliers'}, cache.generation)
+    cache.get('a', 'suppliers')
+    cache.set('c', ['c'], {'suppliers'}, cache.generation)
+
+    # 'b' was the least recently used
+    assert [cache.get(key, 'suppliers') == [key] for key in 'abc'] == [True, False, True]
+    clock.now += 61
+    assert cache.get('a', 'suppliers') != ['a']
+
+def test_repeated_reads_are_served_from_the_cache():
+    client, cache, session = setup()
+    manager = PurchaseRequestManager(session, query_cache=cache)
+    first, total = manager.get_purchase_requests(filters={'status': 'pending'})
+    client.reset_counts()
+
+    again, again_total = manager.get_purchase_requests(filters={'status': 'pending'}, page=1)
+
+    assert client.request_count == 0
+    assert [prf.id for prf in again] == [prf.id for prf in first] and again_total == total
+    # Callers get their own copies
+    assert again[0] is not first[0]
+
+def test_status_change_evicts_lists_and_that_prf_only():
+    client, cache, session = setup()
+    manager = PurchaseRequestManager(session, query_cache=cache)
+    pending = [row['id'] for row in client.tables['purchase_requests'] if row['status'] == 'pending']
+    manager.get_purchase_requests(filters={'status': ['pending']})
+    for pr_id in pending[:2]:
+        manager.get_purchase_request(UUID(pr_id))
+
+    manager.update_purchase_request_status(UUID(pending[0]), PurchaseRequestStatus.APPROVED)
+    client.reset_counts()
+
+    prfs, _ = manager.get_purchase_requests(filters={'status': ['pending']})
+    assert pending[0] not in [str(prf.id) for prf in prfs]
+    assert manager.get_purchase_request(UUID(pending[0])).status == PurchaseRequestStatus.APPROVED
+    before = client.request_count
+    manager.get_purchase_request(UUID(pending[1]))
+    assert client.request_count == before
+
+def test_supplier_writes_evict_reads_in_other_managers():
+    client, cache, session = setup()
+    suppliers = SupplierManager(session, query_cache=cache)
+    prfs = PurchaseRequestManager(session, query_cache=cache)
+    supplier = suppliers.get(UUID(client.tables['suppliers'][0]['id']))
+    assert prfs.get_supplier_name(supplier.id) == 'Supplier 0'
+    assert len(prfs.get_suppliers()) == 3
+
+    supplier.name = 'Renamed Supplier'
+    suppliers.update(supplier)
+    suppliers.create(Supplier(name='New Supplier'))
+
+    assert prfs.get_supplier_name(supplier.id) == 'Renamed Supplier'
+    assert len(prfs.get_suppliers()) == 4
+
+def test_item_writes_evict_their_form():
+    client, cache, session = setup()
+    manager = ExpenseManager(session, query_cache=cache)
+    erf = manager.get_expense_forms(limit=1)[0]
+    manager.get_erf(erf.id)
+
+    manager.create_expense_item(ExpenseItem(date=erf.date, description='Taxi', payee='Grab',
+                                            amount=Decimal('150.00'), account='OPEX', erf_id=erf.id))
+
+    assert len(manager.get_expense_items(erf.id)) == len(erf.items) + 1
+    assert manager.get_erf(erf.id).total_amount == erf.total_amount + Decimal('150.00')
+
+def test_scopes_are_cached_separately():
+    client, cache, _ = setup()
+    finance_manager = PurchaseRequestManager(instrument_client(client, finance), query_cache=cache)
+    own_manager = PurchaseRequestManager(instrument_client(client, lambda table: f"user:{REQUESTOR_ID}"), query_cache=cache)
+    finance_manager.get_purchase_requests()
+    client.reset_counts()
+
+    own_manager.get_purchase_requests()
+    assert client.request_count == 2
+
+def test_failed_reads_are_not_cached(monkeypatch):
+    client, cache, session = setup()
+    manager = PurchaseRequestManager(session, query_cache=cache)
+    record = client.record
+
+    def fail(table, operation):
+        record(table, operation)
+        raise FakeAPIError('connection reset')
+
+    pr_id = UUID(client.tables['purchase_requests'][0]['id'])
+    monkeypatch.setattr(client, 'record', fail)
+    # The manager reports the failure as no items
+    assert manager.get_purchase_request_items(pr_id) == []
+    monkeypatch.setattr(client, 'record', record)
+
+    assert len(manager.get_purchase_request_items(pr_id)) == 5
+
+def test_reads_overlapping_a_write_are_not_stored():
+    cache = QueryCache()
+    generation = cache.generation
+    cache.invalidate({'suppliers'})
+
+    cache.set('options', ['stale'], {'suppliers'}, generation)
+    assert cache.get('options', 'suppliers') != ['stale']
+
+def test_change_feed_drops_a_tables_entries():
+    client, _, session = setup()
+    feed = ChangeFeed()
+    cache = QueryCache(feed=feed)
+    manager = PurchaseRequestManager(session, query_cache=cache)
+    manager.get_purchase_requests()
+    client.reset_counts()
+
+    feed.publish('purchase_requests')
+    manager.get_purchase_requests()
+    assert client.request_count == 2
+
+def test_reads_without_a_scope_are_not_cached():
+    client, cache, session = setup(scope=None)
+    manager = PurchaseRequestManager(session, query_cache=cache)
+    manager.get_suppliers()
+    manager.get_suppliers()
+    assert client.request_count == 2
+
+class SlowFirstRead(FakeSupabase):
+    """Answers its first select with the rows it read only once released"""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def table(self, name):
+        query = super().table(name)
+        execute = query.execute
+
+        def slow_execute():
+            response = execute()
+            if query.operation == 'select' and not self.started.is_set():
+                self.started.set()
+                self.release.wait()
+            return response
+
+        query.execute = slow_execute
+        return query
+
+def test_read_during_an_invalidation_neither_joins_nor_stores_the_older_read():
+    client = seed(SlowFirstRead())
+    cache, flights = QueryCache(), SingleFlight()
+    sessions = [instrument_client(client, finance) for _ in range(2)]
+    for session in sessions:
+        session._flights = flights
+    first, second = (SupplierManager(session, query_cache=cache) for session in sessions)
+
+    before = []
+    thread = threading.Thread(target=lambda: before.append(first.list()))
+    thread.start()
+    assert client.started.wait(2)
+
+    # Another worker adds a supplier; the Realtime feed evicts the table here
+    client.tables['suppliers'].append({**client.tables['suppliers'][0], 'id': str(UUID(int=7)), 'name': 'New Supplier'})
+    cache.invalidate({'suppliers:*'})
+
+    after = []
+    reader = threading.Thread(target=lambda: after.append(second.list()))
+    reader.start()
+    try:
+        # Joining the first read would wait for it
+        reader.join(2)
+        assert [len(suppliers) for suppliers in after] == [4]
+    finally:
+        client.release.set()
+        thread.join()
+
+    assert len(before[0]) == 3
+    client.reset_counts()
+    assert len(first.list()) == 4
+    assert client.request_count == 0
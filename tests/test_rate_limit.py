@@ -0,0 +1,102 @@
+import pytest
+
+from src.cache import MemoryBackend, SQLiteBackend
+from src.rate_limit import (
+    LOGIN_EMAIL_LIMIT, LOGIN_IP_LIMIT, LOGIN_WINDOW, LoginRateLimiter, SlidingWindowLimiter, forwarded_client_ip
+)
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000 * LOGIN_WINDOW
+
+    def __call__(self):
+        return self.now
+
+def attempt(limiter, email, ip, auth_calls):
+    """The login form: check the limits, then call Supabase Auth, which always fails here"""
+    if not limiter.allow(email, ip):
+        return False
+    auth_calls.append(email)
+    limiter.failed(email, ip)
+    return True
+
+def test_window_slides_rather_than_resetting():
+    clock = Clock()
+    limiter = SlidingWindowLimiter('test', 3, 60, MemoryBackend(clock=clock), clock)
+    clock.now += 50
+    for _ in range(5):
+        limiter.hit('kevin')
+    assert not limiter.allow('kevin')
+
+    # A fixed window would reset here; the previous window still counts for 50/60
+    clock.now += 20
+    assert limiter.count('kevin') == pytest.approx(5 * 50 / 60)
+    assert not limiter.allow('kevin')
+    clock.now += 15
+    assert limiter.count('kevin') == pytest.approx(5 * 35 / 60)
+    assert limiter.allow('kevin')
+    clock.now += 45
+    assert limiter.count('kevin') == 0
+
+def test_email_is_locked_out_across_tabs_and_ips():
+    clock = Clock()
+    limiter = LoginRateLimiter(MemoryBackend(clock=clock), clock)
+    auth_calls = []
+
+    for ip in ['10.0.0.1', '10.0.0.2', '10.0.0.3'] * 3:
+        attempt(limiter, 'Kevin@vivita.ph ', ip, auth_calls)
+
+    assert len(auth_calls) == LOGIN_EMAIL_LIMIT
+    assert not limiter.allow('kevin@vivita.ph')
+    clock.now += 2 * LOGIN_WINDOW
+    assert limiter.allow('kevin@vivita.ph')
+
+def test_credential_stuffing_from_one_ip_is_cut_off():
+    clock = Clock()
+    limiter = LoginRateLimiter(MemoryBackend(clock=clock), clock)
+    auth_calls = []
+
+    for i in range(1000):
+        attempt(limiter, f"user{i}@vivita.ph", '203.0.113.7', auth_calls)
+
+    assert len(auth_calls) == LOGIN_IP_LIMIT
+    assert limiter.allow('user0@vivita.ph', '198.51.100.1')
+
+def test_success_clears_the_email_but_not_the_ip():
+    clock = Clock()
+    limiter = LoginRateLimiter(MemoryBackend(clock=clock), clock)
+    for _ in range(LOGIN_EMAIL_LIMIT):
+        limiter.failed('kevin@vivita.ph', '10.0.0.1')
+
+    limiter.succeeded('kevin@vivita.ph')
+
+    assert limiter.allow('kevin@vivita.ph')
+    assert limiter.by_ip.count('10.0.0.1') == LOGIN_EMAIL_LIMIT
+
+def test_workers_share_the_limits(tmp_path):
+    clock = Clock()
+    workers = [LoginRateLimiter(SQLiteBackend(tmp_path / 'cache.db', clock=clock), clock) for _ in range(4)]
+    auth_calls = []
+
+    for i in range(40):
+        attempt(workers[i % 4], 'kevin@vivita.ph', f"10.0.0.{i}", auth_calls)
+
+    assert len(auth_calls) == LOGIN_EMAIL_LIMIT
+
+def test_spoofed_forwarded_for_entries_are_ignored():
+    # The client sent "X-Forwarded-For: 1.2.3.4"; the proxy appended its real address
+    assert forwarded_client_ip('1.2.3.4, 203.0.113.7', '10.0.0.2', trusted_proxies=1) == '203.0.113.7'
+    # Two proxies: the outer one's entry is the client, the inner one's is the outer proxy
+    assert forwarded_client_ip('1.2.3.4, 203.0.113.7, 10.0.0.1', '10.0.0.2', trusted_proxies=2) == '203.0.113.7'
+    # No trusted proxy means nothing in the header can be believed
+    assert forwarded_client_ip('1.2.3.4', '203.0.113.7', trusted_proxies=0) == '203.0.113.7'
+    assert forwarded_client_ip(None, '203.0.113.7') == '203.0.113.7'
+
+def test_rotating_spoofed_ips_do_not_escape_the_ip_limit():
+    clock = Clock()
+    limiter = LoginRateLimiter(MemoryBackend(clock=clock), clock)
+    auth_calls = []
+    for n in range(LOGIN_IP_LIMIT + 5):
+        ip = forwarded_client_ip(f"198.51.100.{n}, 203.0.113.7", '10.0.0.2', trusted_proxies=1)
+        attempt(limiter, f"user{n}@vivita.ph", ip, auth_calls)
+    assert len(auth_calls) == LOGIN_IP_LIMIT
@@ -0,0 +1,164 @@
+# Tests for the realtime change feed and its effect on idle list reruns
+import asyncio
+from datetime import timedelta
+from decimal import Decimal
+
+from fake_realtime import FakeRealtimeClient
+from fake_supabase import FakeSupabase
+from src.crud.purchase_request import PurchaseRequestManager
+from src.crud.replica import PurchaseRequestReplica
+from src.realtime import ChangeFeed
+
+REQUESTOR_ID = '00000000-0000-0000-0000-000000000001'
+SUPPLIER_ID = '00000000-0000-0000-0000-000000000002'
+
+def add_prf(client, form_number, status='pending'):
+    client.table('purchase_requests').insert({
+        'form_number': form_number,
+        'requestor_id': REQUESTOR_ID,
+        'supplier_id': SUPPLIER_ID,
+        'status': status,
+        'total_amount': 100.0
+    }).execute()
+
+def test_feed_versions_follow_pushed_events():
+    async def scenario():
+        feed = ChangeFeed()
+        client = FakeRealtimeClient()
+        listener = asyncio.create_task(feed.listen(client))
+        await client.realtime.subscribed.wait()
+        assert feed.connected
+
+        await client.realtime.push('purchase_requests', {'eventType': 'UPDATE'})
+        await client.realtime.push('expense_reimbursement_forms', {'eventType': 'INSERT'})
+        await client.realtime.push('purchase_requests', {'eventType': 'INSERT'})
+        await client.realtime.close()
+        await listener
+        return feed
+
+    feed = asyncio.run(scenario())
+    assert feed.versions(['purchase_requests', 'expense_reimbursement_forms']) == (2, 1)
+    assert feed.last_event('purchase_requests') == {'eventType': 'INSERT'}
+    assert not feed.connected
+
+def test_feed_reconnects_and_asks_readers_to_look_again():
+    async def scenario():
+        feed = ChangeFeed(['purchase_requests'])
+        clients = []
+
+        async def connect():
+            if len(clients) == 1 and not getattr(connect, 'failed', False):
+                connect.failed = True
+                raise ConnectionError('network unreachable')
+            clients.append(FakeRealtimeClient())
+            return clients[-1]
+
+        listener = asyncio.create_task(feed.listen_forever(connect, backoff=0.01))
+        while not clients:
+            await asyncio.sleep(0.001)
+        await clients[0].realtime.subscribed.wait()
+        await clients[0].realtime.push('purchase_requests', {'eventType': 'UPDATE'})
+        # The socket drops; readers must poll until the feed is back
+        await clients[0].realtime.close()
+        for _ in range(100):
+            if not feed.connected:
+                break
+            await asyncio.sleep(0.001)
+        disconnected = not feed.connected
+
+        while len(clients) < 2:
+            await asyncio.sleep(0.005)
+        await clients[1].realtime.subscribed.wait()
+        listener.cancel()
+        return feed, disconnected
+
+    feed, disconnected = asyncio.run(scenario())
+    assert disconnected
+    assert feed.connections == 2
+    # One pushed event, plus one for changes that may have been missed meanwhile
+    assert feed.version('purchase_requests') == 2
+
+def test_idle_approver_tabs_query_load():
+    tabs, reruns = 20, 10
+    filters = {'status': ['pending']}
+    client = FakeSupabase()
+    for i in range(5):
+        add_prf(client, f'PRF-2025-{i:04d}')
+    pr_manager = PurchaseRequestManager(supabase=client)
+
+    # Before: every rerun of every tab probes the database
+    replicas = [PurchaseRequestReplica(filters) for _ in range(tabs)]
+    for replica in replicas:
+        replica.sync(pr_manager)
+    client.requests.clear()
+    for _ in range(reruns):
+        for replica in replicas:
+            replica.sync(pr_manager)
+    polling_requests = len(client.requests)
+
+    # After: idle reruns compare the feed version in memory only
+    feed = ChangeFeed()
+    replicas = [PurchaseRequestReplica(filters) for _ in range(tabs)]
+    for replica in replicas:
+        replica.sync(pr_manager, feed_version=feed.version('purchase_requests'))
+    client.requests.clear()
+    for _ in range(reruns):
+        for replica in replicas:
+            replica.sync(pr_manager, feed_version=feed.version('purchase_requests'))
+    realtime_requests = len(client.requests)
+
+    print(f"\n{tabs} idle tabs x {reruns} reruns: "
+          f"{polling_requests} requests polling, {realtime_requests} with realtime")
+    assert polling_requests == tabs * reruns
+    assert realtime_requests == 0
+
+    # A pushed change makes each tab pick up the new row on its next rerun
+    add_prf(client, 'PRF-2025-0100')
+    feed.publish('purchase_requests')
+    for replica in replicas:
+        replica.sync(pr_manager, feed_version=feed.version('purchase_requests'))
+        assert replica.page(pr_manager)[1] == 6
+
+def test_replica_picks_up_rows_committed_behind_the_watermark():
+    client = FakeSupabase()
+    for i in range(3):
+        add_prf(client, f'PRF-2025-{i:04d}')
+    pr_manager = PurchaseRequestManager(supabase=client)
+    now = []
+    replica = PurchaseRequestReplica(clock=lambda: now[-1])
+    replica.sync(pr_manager)
+    now.append(replica.watermark + timedelta(seconds=10))
+
+    # A transaction that started before the newest row commits an update now
+    row = client.tables['purchase_requests'][0]
+    row['total_amount'] = 250.0
+    row['updated_at'] = (replica.watermark - timedelta(seconds=5)).isoformat()
+    replica.sync(pr_manager)
+    assert replica.rows[row['id']].total_amount == Decimal('250.00')
+
+    # Once the overlap has passed an idle sync is a single probe again
+    now.append(replica.watermark + timedelta(minutes=1))
+    client.requests.clear()
+    replica.sync(pr_manager)
+    assert len(client.requests) == 1
+
+def test_large_filtered_sets_are_paged_by_the_server():
+    client = FakeSupabase()
+    for i in range(5):
+        add_prf(client, f'PRF-2025-{i:04d}')
+    pr_manager = PurchaseRequestManager(supabase=client)
+    replica = PurchaseRequestReplica(max_rows=3)
+
+    replica.sync(pr_manager)
+    assert replica.oversized and not replica.rows
+    prfs, total = replica.page(pr_manager, page=2, page_size=2)
+    assert total == 5
+    assert [prf.form_number for prf in prfs] == ['PRF-2025-0002', 'PRF-2025-0001']
+
+    # Once the set fits again it is replicated
+    client.tables['purchase_requests'] = client.tables['purchase_requests'][:3]
+    replica.sync(pr_manager)
+    assert not replica.oversized and len(replica.rows) == 3
+    client.requests.clear()
+    assert replica.page(pr_manager)[1] == 3
+    assert client.requests == []
@@ -0,0 +1,18 @@
+# Round trips per manager operation against the in-memory Supabase stand-in
+import pytest
+
+from conftest import seed
+from fake_supabase import FakeSupabase
+from manager_operations import ROUND_TRIP_BUDGETS
+
+@pytest.mark.parametrize('operation', list(ROUND_TRIP_BUDGETS), ids=lambda op: op.__name__)
+def test_round_trip_budget(operation):
+    client = seed(FakeSupabase())
+    client.reset_counts()
+
+    result = operation(client)
+
+    budget = ROUND_TRIP_BUDGETS[operation]
+    print(f"\n{operation.__name__}: {client.request_count} round trips (budget {budget}) {client.requests}")
+    assert result is not None and result is not False
+    assert client.request_count <= budget
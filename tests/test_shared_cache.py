@@ -0,0 +1,138 @@
+import multiprocessing
+from uuid import UUID
+
+import pytest
+
+from conftest import seed
+from fake_supabase import FakeSupabase
+from src.cache import CacheBackend, MemoryBackend, SQLiteBackend, backend_from_url
+from src.crud import PurchaseRequestManager, SupplierManager
+from src.crud.purchase_request import STATUS_COUNTS_PREFIX
+from src.crud.query_cache import QueryCache
+from src.models import PurchaseRequestStatus, Supplier
+from src.profiles import ProfileCache
+
+WORKERS = 4
+RERUNS = 25
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend_and_clock(request, tmp_path):
+    clock = Clock()
+    if request.param == 'memory':
+        return MemoryBackend(clock=clock), clock
+    return SQLiteBackend(tmp_path / 'cache.db', clock=clock), clock
+
+def test_entries_expire_after_their_ttl(backend_and_clock):
+    cache, clock = backend_and_clock
+    cache.set('suppliers:options', [{'id': '1', 'name': 'BPI'}], ttl=60)
+    cache.set('forever', 1)
+
+    assert cache.get('suppliers:options') == [{'id': '1', 'name': 'BPI'}]
+    clock.now += 61
+    assert cache.get('suppliers:options') is None
+    assert cache.get_many(['suppliers:options', 'forever', 'missing']) == {'forever': 1}
+
+def test_counters_keep_their_first_expiry(backend_and_clock):
+    cache, clock = backend_and_clock
+
+    assert [cache.incr('login_attempts:a', ttl=900) for _ in range(3)] == [1, 2, 3]
+    clock.now += 600
+    assert cache.incr('login_attempts:a', ttl=900) == 4
+    clock.now += 301
+    assert cache.get('login_attempts:a') is None
+    assert cache.incr('login_attempts:a', ttl=900) == 1
+
+def test_delete_prefix_only_drops_matching_keys(backend_and_clock):
+    cache, _ = backend_and_clock
+    for key in ('profile:1', 'profile:2', 'profiles', 'supplier:1'):
+        cache.set(key, key)
+
+    cache.delete_prefix('profile:')
+
+    assert cache.get_many(['profile:1', 'profile:2', 'profiles', 'supplier:1']) == {
+        'profiles': 'profiles', 'supplier:1': 'supplier:1'
+    }
+
+def test_backend_from_url(tmp_path):
+    assert isinstance(backend_from_url(None), MemoryBackend)
+    assert isinstance(backend_from_url(f"sqlite:///{tmp_path / 'cache.db'}"), SQLiteBackend)
+    with pytest.raises(ValueError):
+        backend_from_url('redis://localhost')
+
+def test_profile_cache_is_shared_through_the_backend(tmp_path):
+    client = seed(FakeSupabase())
+    first = ProfileCache(backend=SQLiteBackend(tmp_path / 'cache.db'))
+    second = ProfileCache(backend=SQLiteBackend(tmp_path / 'cache.db'))
+    client.reset_counts()
+
+    first.get_many([row['id'] for row in client.tables['profiles']], client)
+    assert second.get(client.tables['profiles'][0]['id'], client)['role'] == 'Finance'
+    assert client.request_count == 1
+
+def test_supplier_writes_drop_the_cached_options():
+    client = seed(FakeSupabase())
+    manager = SupplierManager(client, cache=MemoryBackend())
+
+    assert len(manager.options()) == 3
+    manager.create(Supplier(name='New Supplier'))
+    client.reset_counts()
+
+    assert len(manager.options()) == 4
+    assert len(manager.options()) == 4
+    assert client.request_count == 1
+
+def worker(path, results):
+    """One Streamlit process: its own client, the shared SQLite store"""
+    cache = SQLiteBackend(path)
+    client = seed(FakeSupabase(latency=0.001))
+    client.reset_counts()
+    manager = SupplierManager(client, cache=cache)
+    for _ in range(RERUNS):
+        manager.options()
+        cache.incr('login_attempts:kevin@vivita.ph', ttl=900)
+    results.put(client.request_count)
+
+def test_workers_share_one_store(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    SQLiteBackend(path)
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(path, results)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    queries = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join(timeout=60)
+
+    print(f"\n{WORKERS} workers x {RERUNS} reruns: {sum(queries)} supplier queries")
+    # Once any worker has loaded the options the rest read them from the store
+    assert sum(queries) <= WORKERS
+    # Every worker's increments landed on the same counter
+    assert SQLiteBackend(path).get('login_attempts:kevin@vivita.ph') == WORKERS * RERUNS
+
+def test_backends_must_implement_the_interface():
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+def test_prf_writes_drop_the_dashboard_status_counts():
+    client = seed(FakeSupabase())
+    cache = MemoryBackend()
+    manager = PurchaseRequestManager(client, query_cache=QueryCache(), cache=cache)
+    cache.set(f"{STATUS_COUNTS_PREFIX}all", {'pending': 5}, 30)
+    cache.set('suppliers:options', [], 30)
+
+    pending = next(row for row in client.tables['purchase_requests'] if row['status'] == 'pending')
+    assert manager.update_purchase_request_status(UUID(pending['id']), PurchaseRequestStatus.APPROVED)
+    assert cache.get(f"{STATUS_COUNTS_PREFIX}all") is None
+    assert cache.get('suppliers:options') == []
@@ -0,0 +1,193 @@
+# Coalescing of identical concurrent reads, with a 9 a.m. dashboard burst benchmark
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import REQUESTOR_ID, seed
+from fake_supabase import FakeAPIError, FakeSupabase
+from src.crud import PurchaseRequestManager
+from src.profiles import get_profile_cache, query_scope
+from src.profiling import instrument_client
+from src.singleflight import SingleFlight
+
+SESSIONS = int(os.environ.get('SINGLE_FLIGHT_SESSIONS', 50))
+LATENCY = float(os.environ.get('SINGLE_FLIGHT_LATENCY', 0.05))
+
+def together(count, fn):
+    """Run ``fn(i)`` on ``count`` threads released at the same moment"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(i):
+        barrier.wait()
+        results[i] = fn(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_overlapping_calls_share_one_result():
+    flights = SingleFlight()
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.1)
+        return [{'status': 'pending'}]
+
+    results = together(10, lambda i: flights.do('prfs', load))
+
+    assert len(calls) == 1
+    assert flights.calls == 10 and flights.shared == 9
+    assert all(result == [{'status': 'pending'}] for result in results)
+    # Each caller has its own copy
+    assert len({id(result) for result in results}) == 10
+
+def test_calls_after_one_finishes_are_not_shared():
+    flights = SingleFlight()
+    assert flights.do('prfs', lambda: 1) == 1
+    assert flights.do('prfs', lambda: 2) == 2
+    assert flights.shared == 0
+
+def test_followers_get_the_leaders_error():
+    flights = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise FakeAPIError('timeout')
+
+    def call(i):
+        try:
+            flights.do('prfs', fail)
+        except FakeAPIError as e:
+            return str(e)
+
+    assert together(5, call) == ['timeout'] * 5
+
+def test_query_scope_follows_row_visibility():
+    cache = get_profile_cache()
+    finance = {'id': REQUESTOR_ID, 'role': 'Finance'}
+    staff = {'id': '00000000-0000-0000-0000-000000000002', 'role': 'Finance'}
+    cache.put({'id': REQUESTOR_ID, 'role': 'Finance'})
+    cache.put({'id': staff['id'], 'role': 'User'})
+    try:
+        assert query_scope(finance, 'purchase_requests') == 'role:Finance'
+        # The session's role may be stale; only the fresh profile counts
+        assert query_scope(staff, 'purchase_requests') == f"user:{staff['id']}"
+        assert query_scope(staff, 'suppliers') == query_scope(finance, 'suppliers') == 'public'
+        assert query_scope(staff, 'profile_names') == 'public'
+        # Only the user's own profile is readable, and the audit feed embeds PRFs
+        assert query_scope(staff, 'profiles') == f"user:{staff['id']}"
+        assert query_scope(staff, 'purchase_request_audit') == f"user:{staff['id']}"
+        assert query_scope(finance, 'purchase_request_audit') == 'role:Finance'
+        assert query_scope(finance, 'expense_reimbursement_forms') == f"user:{REQUESTOR_ID}"
+        assert query_scope(None, 'suppliers') is None
+    finally:
+        cache.invalidate()
+
+def dashboard_burst(scopes):
+    """Sessions opening the dashboard at once, each through its own instrumented client"""
+    client = seed(FakeSupabase(latency=LATENCY), prfs=200)
+    flights = SingleFlight()
+    sessions = [instrument_client(client, scope) for scope in scopes]
+    for session in sessions:
+        session._flights = flights
+    client.reset_counts()
+
+    def open_dashboard(i):
+        manager = PurchaseRequestManager(sessions[i])
+        prfs, total = manager.get_purchase_requests(filters={'status': ['pending', 'approved']}, page_size=10)
+        return [str(prf.id) for prf in prfs], total, manager.get_suppliers()
+
+    start = time.perf_counter()
+    results = together(len(sessions), open_dashboard)
+    return time.perf_counter() - start, client.request_count, flights, results
+
+def test_dashboard_burst_shares_queries():
+    finance = lambda table: 'role:Finance'
+    baseline_time, baseline_requests, _, expected = dashboard_burst([None] * SESSIONS)
+    elapsed, requests, flights, results = dashboard_burst([finance] * SESSIONS)
+
+    print(f"\n{SESSIONS} sessions opening the dashboard at once:")
+    print(f"  before: {baseline_requests} requests in {baseline_time:.3f}s")
+    print(f"  after:  {requests} requests in {elapsed:.3f}s, {flights.shared} of {flights.calls} calls coalesced")
+
+    assert all(result == results[0] for result in results)
+    assert [total for _, total, _ in results] == [total for _, total, _ in expected]
+    assert requests < baseline_requests
+    assert requests + flights.shared == baseline_requests
+
+def test_sessions_in_other_scopes_do_not_share():
+    own = [lambda table, i=i: f"user:{i}" for i in range(4)]
+    _, requests, flights, _ = dashboard_burst(own)
+
+    assert flights.shared == 0
+    assert requests == 4 * 3
+
+class GatedTable:
+    """A table whose first select reads at once but answers only when released, like a slow network"""
+
+    def __init__(self, rows, release):
+        self.rows = rows
+        self.release = release
+        self.selects = 0
+        self.started = threading.Event()
+
+    def table(self, name):
+        return GatedQuery(self, name)
+
+class GatedQuery:
+    def __init__(self, client, name):
+        self.client = client
+        self.operation = 'select'
+        self.payload = None
+
+    def select(self, columns='*'):
+        return self
+
+    def insert(self, payload):
+        self.operation, self.payload = 'insert', payload
+        return self
+
+    def execute(self):
+        if self.operation == 'insert':
+            self.client.rows.append(self.payload)
+            return type('Response', (), {'data': [self.payload]})()
+        self.client.selects += 1
+        data = list(self.client.rows)
+        if self.client.selects == 1:
+            self.client.started.set()
+            self.client.release.wait()
+        return type('Response', (), {'data': data})()
+
+def test_reads_after_a_write_do_not_join_reads_from_before_it():
+    release = threading.Event()
+    gated = GatedTable([{'name': 'Old Supplier'}], release)
+    flights = SingleFlight()
+    reader, writer = instrument_client(gated, lambda table: 'public'), instrument_client(gated, lambda table: 'public')
+    reader._flights = writer._flights = flights
+
+    before = []
+    thread = threading.Thread(target=lambda: before.append(reader.table('suppliers').select('*').execute().data))
+    thread.start()
+    assert gated.started.wait(2)
+
+    writer.table('suppliers').insert({'name': 'New Supplier'}).execute()
+    after = []
+    second = threading.Thread(target=lambda: after.append(reader.table('suppliers').select('*').execute().data))
+    second.start()
+    try:
+        # Joining the first read would wait for it
+        second.join(2)
+        assert after == [[{'name': 'Old Supplier'}, {'name': 'New Supplier'}]]
+    finally:
+        release.set()
+        thread.join()
+
+    assert before == [[{'name': 'Old Supplier'}]]
+    assert gated.selects == 2 and flights.shared == 0
@@ -0,0 +1,101 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+from conftest import seed
+from fake_supabase import FakeSupabase
+from src.crud import ExpenseManager, PurchaseRequestManager, UpdateConflictError
+from src.models import PurchaseRequestStatus
+
+def first_prf(manager, status):
+    row = next(r for r in manager.supabase.tables['purchase_requests'] if r['status'] == status)
+    return manager.get_purchase_request(UUID(row['id']), view='list')
+
+def test_approval_is_a_single_conditional_update():
+    manager = PurchaseRequestManager(seed(FakeSupabase()))
+    prf = first_prf(manager, 'pending')
+    manager.supabase.reset_counts()
+
+    updated = manager.update_purchase_request_status(
+        prf.id, PurchaseRequestStatus.APPROVED, expected_updated_at=prf.updated_at
+    )
+
+    assert manager.supabase.request_count == 1
+    assert updated.status == PurchaseRequestStatus.APPROVED
+    assert updated.updated_at > prf.updated_at
+
+def test_second_of_two_racing_approvers_gets_a_conflict():
+    manager = PurchaseRequestManager(seed(FakeSupabase()))
+    prf = first_prf(manager, 'pending')
+
+    assert manager.update_purchase_request_status(
+        prf.id, PurchaseRequestStatus.APPROVED, expected_updated_at=prf.updated_at
+    )
+    with pytest.raises(UpdateConflictError) as conflict:
+        manager.update_purchase_request_status(
+            prf.id, PurchaseRequestStatus.REJECTED, expected_updated_at=prf.updated_at
+        )
+    assert conflict.value.current['status'] == 'approved'
+    assert 'now approved' in str(conflict.value)
+
+def test_status_guard_applies_without_a_version():
+    manager = PurchaseRequestManager(seed(FakeSupabase()))
+    pending = first_prf(manager, 'pending')
+    approved = first_prf(manager, 'approved')
+
+    assert manager.update_purchase_request_status(pending.id, PurchaseRequestStatus.APPROVED)
+    assert manager.update_purchase_request_status(pending.id, PurchaseRequestStatus.APPROVED) is None
+    # An unchanged row in the wrong status is a bad transition, not a conflict
+    assert manager.update_purchase_request_status(
+        approved.id, PurchaseRequestStatus.PENDING, expected_updated_at=approved.updated_at
+    ) is None
+
+def test_stale_voucher_update_is_rejected():
+    client = seed(FakeSupabase())
+    manager = ExpenseManager(client)
+    voucher = manager.get_voucher(UUID(client.tables['vouchers'][0]['id']))
+    voucher.date = datetime(2025, 1, 20)
+
+    voucher.payee = 'First edit'
+    manager.update_voucher(voucher)
+    voucher.payee = 'Second edit'
+    with pytest.raises(UpdateConflictError):
+        manager.update_voucher(voucher)
+    assert client.tables['vouchers'][0]['payee'] == 'First edit'
+
+def test_voucher_update_is_one_call_and_the_database_sets_total_and_version():
+    client = seed(FakeSupabase())
+    manager = ExpenseManager(client)
+    voucher = manager.get_voucher(UUID(client.tables['vouchers'][0]['id']))
+    voucher.entries = voucher.entries[:2]
+    voucher.total_amount = Decimal('1')
+    client.reset_counts()
+
+    updated = manager.update_voucher(voucher)
+
+    assert client.request_count == 1
+    assert [entry.account_title for entry in updated.entries] == [entry.account_title for entry in voucher.entries]
+    assert updated.total_amount == max(
+        sum(entry.debit_amount or 0 for entry in updated.entries),
+        sum(entry.credit_amount or 0 for entry in updated.entries)
+    )
+    assert updated.updated_at > voucher.updated_at
+    # The returned version is the one to send with the next edit
+    updated.payee = 'Second edit'
+    assert manager.update_voucher(updated).payee == 'Second edit'
+
+def test_stale_erf_update_is_rejected():
+    client = seed(FakeSupabase())
+    manager = ExpenseManager(client)
+    erf = manager.get_erf(UUID(client.tables['expense_reimbursement_forms'][0]['id']))
+
+    erf.designation = 'First edit'
+    updated = manager.update_erf(erf)
+    erf.designation = 'Second edit'
+    with pytest.raises(UpdateConflictError):
+        manager.update_erf(erf)
+    assert client.tables['expense_reimbursement_forms'][0]['designation'] == 'First edit'
+    updated.designation = 'Third edit'
+    assert manager.update_erf(updated).designation == 'Third edit'
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from conftest import seed
+from fake_supabase import FakeSupabase
+from src import tracing
+from src.crud import PurchaseRequestManager
+from src.profiling import instrument_client
+from src.tracing import traced
+
+def test_traced_is_transparent_without_a_tracer():
+    @traced('sync_call')
+    def sync_call(x):
+        return [x, x]
+
+    @traced('async_call')
+    async def async_call(x):
+        return x * 2
+
+    assert sync_call(1) == [1, 1]
+    assert asyncio.run(async_call(2)) == 4
+    assert PurchaseRequestManager.get_purchase_requests.__name__ == 'get_purchase_requests'
+
+def test_only_filter_keys_are_recorded():
+    recorded = tracing.recorded_arguments({
+        'filters': {'search': 'Juan Dela Cruz', 'status': ['pending'], 'end_date': None},
+        'search_query': 'juan@example.com',
+        'page': 2
+    })
+
+    assert recorded['arg.filters'] == 'search,status'
+    assert recorded['arg.page'] == 2
+    assert 'juan' not in repr(recorded).lower()
+
+def test_manager_and_supabase_spans():
+    pytest.importorskip('opentelemetry.sdk')
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracing.set_tracer(provider.get_tracer(__name__))
+    try:
+        client = instrument_client(seed(FakeSupabase()))
+        PurchaseRequestManager(client).get_purchase_requests(filters={'status': ['pending']}, page_size=5)
+    finally:
+        tracing.set_tracer(None)
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    manager_span = spans['PurchaseRequestManager.get_purchase_requests']
+    assert manager_span.attributes['rows'] == 5
+    assert manager_span.attributes['total_count'] == 5
+
+    queries = [s for s in exporter.get_finished_spans() if s.name == 'supabase.execute']
+    assert len(queries) == 2
+    assert all(q.parent.span_id == manager_span.context.span_id for q in queries)
+    assert queries[0].attributes['db.table'] == 'purchase_requests'
+    assert 'status.in' in queries[0].attributes['db.filters']